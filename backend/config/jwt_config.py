@@ -2,6 +2,7 @@
 # Xử lý cấu hình JWT và các hàm liên quan (hash mật khẩu, tạo token, v.v.).
 # Tuân thủ SRP: Chỉ xử lý logic liên quan đến JWT và xác thực.
 
+import os
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
@@ -21,12 +22,26 @@ def get_jwt_config():
     return JWTConfig()
 
 # Hash mật khẩu
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Cost của bcrypt (log2 số vòng) cấu hình qua BCRYPT_ROUNDS. min/max bằng nhau: hash có cost khác chính sách
+# được coi là cần cập nhật, và được hash lại khi người dùng đăng nhập (verify_and_update_password).
+# Các hàm dưới đây chạy blocking: luôn gọi qua pool "crypto" của ExecutorService.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Xác thực mật khẩu bằng cách so sánh mật khẩu đã hash với mật khẩu người dùng nhập vào."""
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple:
+    """Xác thực mật khẩu, trả về (hợp lệ, hash mới). Hash mới khác None khi hash cũ có cost khác BCRYPT_ROUNDS."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password: str) -> str:
     """Hash mật khẩu người dùng nhập vào."""
     try:
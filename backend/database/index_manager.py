@@ -0,0 +1,97 @@
+#database/index_manager.py
+#Áp dụng INDEX_REGISTRY lên MongoDB: tạo index còn thiếu (idempotent), báo cáo drift,
+#và lấy thống kê sử dụng index ($indexStats) cho trang quản trị.
+
+from .index_registry import INDEX_REGISTRY, index_name
+from ..logging_config import logger
+
+# Các option của index cần so sánh khi kiểm tra drift
+COMPARED_OPTIONS = ("unique", "expireAfterSeconds")
+
+class IndexManager:
+    def __init__(self, db, registry: dict = None):
+        self.db = db
+        self.registry = registry or INDEX_REGISTRY
+        self.last_report = None
+        
+    def _options(self, spec: dict) -> dict:
+        """Lấy các option (ngoài keys) của một index trong registry"""
+        return {k: v for k, v in spec.items() if k != "keys"}
+    
+    def _diff_options(self, expected: dict, existing: dict) -> dict:
+        """So sánh option giữa registry và index thực tế, trả về các option khác nhau"""
+        diff = {}
+        for option in COMPARED_OPTIONS:
+            want = expected.get(option, False if option == "unique" else None)
+            have = existing.get(option, False if option == "unique" else None)
+            if want != have:
+                diff[option] = {"expected": want, "actual": have}
+        return diff
+        
+    async def apply(self) -> dict:
+        """Tạo các index còn thiếu và trả về báo cáo: created, unchanged, drift, unmanaged, errors"""
+        report = {"created": [], "unchanged": [], "drift": [], "unmanaged": [], "errors": []}
+        
+        for collection, specs in self.registry.items():
+            try:
+                existing = await self.db[collection].index_information()
+            except Exception as e:
+                logger.error(f"Failed to read indexes of {collection}: {e}")
+                report["errors"].append({"collection": collection, "error": str(e)})
+                continue
+            
+            expected_names = set()
+            for spec in specs:
+                name = index_name(spec["keys"])
+                expected_names.add(name)
+                entry = {"collection": collection, "name": name}
+                
+                if name in existing:
+                    diff = self._diff_options(spec, existing[name])
+                    if diff:
+                        # Không tự động drop index: chỉ báo cáo để admin xử lý
+                        logger.warning(f"Index drift on {collection}.{name}: {diff}")
+                        report["drift"].append({**entry, "diff": diff})
+                    else:
+                        report["unchanged"].append(entry)
+                    continue
+                
+                try:
+                    await self.db[collection].create_index(spec["keys"], name=name, **self._options(spec))
+                    logger.info(f"Created index {collection}.{name}")
+                    report["created"].append(entry)
+                except Exception as e:
+                    # Vd: dữ liệu cũ bị trùng khiến unique index không tạo được
+                    logger.error(f"Failed to create index {collection}.{name}: {e}")
+                    report["errors"].append({**entry, "error": str(e)})
+            
+            for name in existing:
+                if name != "_id_" and name not in expected_names:
+                    report["unmanaged"].append({"collection": collection, "name": name})
+        
+        self.last_report = report
+        logger.info(
+            f"Index bootstrap: {len(report['created'])} created, {len(report['drift'])} drift, "
+            f"{len(report['unmanaged'])} unmanaged, {len(report['errors'])} errors"
+        )
+        return report
+    
+    async def get_index_stats(self) -> dict:
+        """Thống kê số lần sử dụng từng index (theo $indexStats) của các collection trong registry"""
+        stats = {}
+        for collection in self.registry:
+            try:
+                cursor = self.db[collection].aggregate([{"$indexStats": {}}])
+                stats[collection] = [
+                    {
+                        "name": item["name"],
+                        "key": dict(item["key"]),
+                        "ops": item.get("accesses", {}).get("ops", 0),
+                        "since": item.get("accesses", {}).get("since"),
+                    }
+                    async for item in cursor
+                ]
+            except Exception as e:
+                logger.error(f"Failed to get index stats of {collection}: {e}")
+                stats[collection] = {"error": str(e)}
+        return {"stats": stats, "last_report": self.last_report}
@@ -0,0 +1,42 @@
+#database/index_registry.py
+#Khai báo tập trung các index cần có cho từng collection.
+#IndexManager đọc registry này khi khởi động để tạo index còn thiếu và báo cáo sai lệch (drift).
+#Thêm index mới: chỉ cần thêm một dòng vào INDEX_REGISTRY, không cần sửa code khác.
+
+from ..utils import AUDIO_CACHE_MAX_AGE_DAYS
+
+ASC = 1
+DESC = -1
+
+# Chỉ mục audio TTS hết hạn sớm hơn một ngày so với lúc object bị xóa khỏi bucket (CacheService hoặc lifecycle rule),
+# để không bao giờ trả về URL của file đã bị xóa
+TTS_AUDIO_TTL_SECONDS = max((AUDIO_CACHE_MAX_AGE_DAYS - 1) * 24 * 3600, 3600)
+
+INDEX_REGISTRY = {
+    "users": [
+        {"keys": [("email", ASC)], "unique": True}, # find_user_by_email
+    ],
+    "chats": [
+        {"keys": [("user_id", ASC), ("updatedAt", DESC), ("_id", DESC)]}, # danh sách chat/sidebar theo user
+    ],
+    "messages": [
+        {"keys": [("chat_id", ASC), ("seq", ASC)], "unique": True}, # lịch sử chat, phân trang theo seq
+    ],
+    "vocabs": [
+        {"keys": [("user_id", ASC), ("chat_id", ASC), ("word", ASC)], "unique": True}, # kiểm tra trùng từ, vocab theo chat + user
+        {"keys": [("chat_id", ASC)]}, # find_vocab_by_chat_id
+    ],
+    "tts_audio": [
+        {"keys": [("createdAt", ASC)], "expireAfterSeconds": TTS_AUDIO_TTL_SECONDS}, # TTL của chỉ mục audio TTS
+    ],
+    "word_info_cache": [
+        {"keys": [("expiresAt", ASC)], "expireAfterSeconds": 0}, # TTL theo từng document (kết quả rỗng hết hạn sớm hơn)
+    ],
+    "translation_cache": [
+        {"keys": [("expiresAt", ASC)], "expireAfterSeconds": 0}, # TTL của bản dịch đã lưu
+    ],
+}
+
+def index_name(keys: list) -> str:
+    """Tên index theo quy ước mặc định của MongoDB (vd: user_id_1_updatedAt_-1)"""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
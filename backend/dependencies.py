@@ -5,11 +5,16 @@
 import os
 from fastapi import Depends
 from .database.database_factory import database
+from .database.index_manager import IndexManager
 from .repositories.mongo_repository import MongoRepository
 from .repositories.auth_repository import AuthRepository
 from .repositories.chat_repository import ChatRepository
 from .repositories.vocab_repository import VocabRepository
 from .repositories.config_repository import ConfigRepository
+from .repositories.tts_audio_repository import TTSAudioRepository
+from .repositories.word_info_repository import WordInfoRepository
+from .repositories.translation_repository import TranslationRepository
+from .repositories.user_invalidation_repository import UserInvalidationRepository
 from .storage.minio_client import MinioClient
 from .services.http.httpx_client import HttpxClient
 from .services.ai.openai_client import OpenAIClient
@@ -21,11 +26,20 @@ from .services.dictionary.dictionaryapi_client import DictionaryAPIClient
 from .services.dictionary.wordnik_client import WordnikClient
 from .services.tts.gtts_client import GTTSClient
 from .services.tts.piper_client import PiperClient
+from .services.tts.tts_audio_cache import TTSAudioCache
+from .services.dictionary.word_info_cache import WordInfoCache
+from .services.translation.translation_cache import TranslationCache
+from .services.translation_service import TranslationService
 from .services.stt.vosk_stt_client import VoskSTTClient
 from .services.stt.assemblyai_stt_client import AssemblyAISTTClient
 from .services.stt.google_stt_client import GoogleSTTClient
 from .services.translation.google_translation_client import GoogleTranslationClient
 from .services.vocab_service import VocabService
+from .services.executor_service import ExecutorService
+from .services.tts_service import TTSService
+from .services.tts_prefetch_service import TTSPrefetchService
+from .services.single_flight import SingleFlight
+from .services.user_cache import UserCache
 
 # Singleton instance cho database
 class DatabaseSingleton:
@@ -39,11 +53,25 @@ class DatabaseSingleton:
     
 # Singleton instances cho các dependency
 class DependencyContainer:
+    _index_manager = None
+    _executor_service = None
+    _single_flight = None
     _mongo_repository = None
     _auth_repository = None
     _chat_repository = None
     _vocab_repository = None
     _config_repository = None
+    _tts_audio_repository = None
+    _tts_audio_cache = None
+    _word_info_repository = None
+    _word_info_cache = None
+    _translation_repository = None
+    _translation_cache = None
+    _translation_service = None
+    _user_invalidation_repository = None
+    _user_cache = None
+    _tts_service = None
+    _tts_prefetch_service = None
     _storage_client = None
     _http_client = None
     _openai_client = None
@@ -68,6 +96,41 @@ class DependencyContainer:
         enabled_clients = os.getenv("ENABLED_AI_CLIENTS", "")
         return set(enabled_clients.split(",")) if enabled_clients else set()
     
+    @classmethod
+    async def shutdown(cls):
+        """Giải phóng các tài nguyên dùng chung khi app tắt (connection pool, thread/process pool)"""
+        if cls._tts_prefetch_service is not None:
+            await cls._tts_prefetch_service.close()
+        if cls._user_cache is not None:
+            await cls._user_cache.close()
+        if cls._http_client is not None:
+            await cls._http_client.aclose()
+        if cls._vosk_client is not None:
+            cls._vosk_client.close()
+        if cls._piper_client is not None:
+            cls._piper_client.close()
+        if cls._executor_service is not None:
+            cls._executor_service.shutdown()
+    
+    @classmethod
+    def get_executor_service(cls):
+        if cls._executor_service is None:
+            cls._executor_service = ExecutorService()
+        return cls._executor_service
+
+    @classmethod
+    def get_single_flight(cls):
+        if cls._single_flight is None:
+            cls._single_flight = SingleFlight()
+        return cls._single_flight
+    
+    @classmethod
+    async def get_index_manager(cls):
+        if cls._index_manager is None:
+            db = await DatabaseSingleton.get_instance()
+            cls._index_manager = IndexManager(db)
+        return cls._index_manager
+    
     @classmethod
     async def get_mongo_repository(cls):
         if cls._mongo_repository is None:
@@ -102,6 +165,94 @@ class DependencyContainer:
             mongo_repo = await cls.get_mongo_repository()
             cls._config_repository = ConfigRepository(mongo_repo)
         return cls._config_repository
+
+    @classmethod
+    async def get_tts_audio_repository(cls):
+        if cls._tts_audio_repository is None:
+            mongo_repo = await cls.get_mongo_repository()
+            cls._tts_audio_repository = TTSAudioRepository(mongo_repo)
+        return cls._tts_audio_repository
+
+    @classmethod
+    async def get_tts_audio_cache(cls):
+        if cls._tts_audio_cache is None:
+            tts_audio_repository = await cls.get_tts_audio_repository()
+            cls._tts_audio_cache = TTSAudioCache(tts_audio_repository)
+        return cls._tts_audio_cache
+
+    @classmethod
+    async def get_word_info_repository(cls):
+        if cls._word_info_repository is None:
+            mongo_repo = await cls.get_mongo_repository()
+            cls._word_info_repository = WordInfoRepository(mongo_repo)
+        return cls._word_info_repository
+
+    @classmethod
+    async def get_word_info_cache(cls):
+        if cls._word_info_cache is None:
+            word_info_repository = await cls.get_word_info_repository()
+            cls._word_info_cache = WordInfoCache(word_info_repository)
+        return cls._word_info_cache
+
+    @classmethod
+    async def get_user_invalidation_repository(cls):
+        if cls._user_invalidation_repository is None:
+            mongo_repo = await cls.get_mongo_repository()
+            cls._user_invalidation_repository = UserInvalidationRepository(mongo_repo)
+        return cls._user_invalidation_repository
+
+    @classmethod
+    async def get_user_cache(cls):
+        if cls._user_cache is None:
+            user_invalidation_repository = await cls.get_user_invalidation_repository()
+            cls._user_cache = UserCache(user_invalidation_repository)
+        return cls._user_cache
+
+    @classmethod
+    async def get_translation_repository(cls):
+        if cls._translation_repository is None:
+            mongo_repo = await cls.get_mongo_repository()
+            cls._translation_repository = TranslationRepository(mongo_repo)
+        return cls._translation_repository
+
+    @classmethod
+    async def get_translation_cache(cls):
+        if cls._translation_cache is None:
+            translation_repository = await cls.get_translation_repository()
+            cls._translation_cache = TranslationCache(translation_repository)
+        return cls._translation_cache
+
+    @classmethod
+    async def get_translation_service(cls):
+        if cls._translation_service is None:
+            cls._translation_service = TranslationService(
+                cls.get_google_translation_client(),
+                cls.get_executor_service(),
+                await cls.get_translation_cache(),
+                cls.get_single_flight()
+            )
+        return cls._translation_service
+
+    @classmethod
+    async def get_tts_service(cls):
+        if cls._tts_service is None:
+            cls._tts_service = TTSService(
+                cls.get_audio_processor(),
+                cls.get_storage_client(),
+                cls.get_gtts_client(),
+                cls.get_piper_client(),
+                cls.get_executor_service(),
+                await cls.get_tts_audio_cache(),
+                cls.get_single_flight()
+            )
+        return cls._tts_service
+
+    @classmethod
+    async def get_tts_prefetch_service(cls):
+        if cls._tts_prefetch_service is None:
+            tts_service = await cls.get_tts_service()
+            cls._tts_prefetch_service = TTSPrefetchService(tts_service)
+        return cls._tts_prefetch_service
 #
     @classmethod
     def get_storage_client(cls):
@@ -121,7 +272,7 @@ class DependencyContainer:
         if "chatgpt" not in enabled_clients:
             return None
         if cls._openai_client is None:
-            cls._openai_client = OpenAIClient()
+            cls._openai_client = OpenAIClient(cls.get_http_client())
         return cls._openai_client
     
     @classmethod
@@ -130,7 +281,7 @@ class DependencyContainer:
         if "deepseek" not in enabled_clients:
             return None
         if cls._deepseek_client is None:
-            cls._deepseek_client = DeepSeekClient()
+            cls._deepseek_client = DeepSeekClient(cls.get_http_client())
         return cls._deepseek_client
     
     @classmethod
@@ -139,7 +290,7 @@ class DependencyContainer:
         if "openrouter" not in enabled_clients:
             return None
         if cls._openrouter_client is None:
-            cls._openrouter_client = OpenRouterClient()
+            cls._openrouter_client = OpenRouterClient(cls.get_http_client())
         return cls._openrouter_client
 
     @classmethod
@@ -189,7 +340,8 @@ class DependencyContainer:
             vocab_repository = await cls.get_vocab_repository()
             dictionaryapi_client = cls.get_dictionaryapi_client()
             wordnik_client = cls.get_wordnik_client()
-            cls._vocab_service = VocabService(vocab_repository, dictionaryapi_client, wordnik_client)
+            word_info_cache = await cls.get_word_info_cache()
+            cls._vocab_service = VocabService(vocab_repository, dictionaryapi_client, wordnik_client, word_info_cache, cls.get_single_flight())
         return cls._vocab_service
 
     @classmethod
@@ -238,6 +390,15 @@ class DependencyContainer:
         return cls._google_translation_client
     
 # Dependency injection functions
+def get_executor_service():
+    return DependencyContainer.get_executor_service()
+
+def get_single_flight():
+    return DependencyContainer.get_single_flight()
+
+async def get_index_manager():
+    return await DependencyContainer.get_index_manager()
+
 async def get_auth_repository():
     return await DependencyContainer.get_auth_repository()
 
@@ -250,6 +411,24 @@ async def get_vocab_repository():
 async def get_config_repository():
     return await DependencyContainer.get_config_repository()
 
+async def get_tts_audio_cache():
+    return await DependencyContainer.get_tts_audio_cache()
+
+async def get_word_info_cache():
+    return await DependencyContainer.get_word_info_cache()
+
+async def get_user_cache():
+    return await DependencyContainer.get_user_cache()
+
+async def get_translation_cache():
+    return await DependencyContainer.get_translation_cache()
+
+async def get_translation_service():
+    return await DependencyContainer.get_translation_service()
+
+async def get_tts_prefetch_service():
+    return await DependencyContainer.get_tts_prefetch_service()
+
 def get_storage_client():
     return DependencyContainer.get_storage_client()
 
@@ -9,23 +9,27 @@ class AuthRepository:
     def __init__(self, repository):
         self.repository = repository
         
-    async def find_user_by_email(self, email: str):
+    async def find_user_by_email(self, email: str, projection: dict = None):
         """Tìm người dùng theo email."""
         query = {"email": email}
-        return await self.repository.find_one("users", query)
+        return await self.repository.find_one("users", query, projection)
     
-    async def find_user_by_id(self, user_id: str):
+    async def user_exists(self, email: str) -> bool:
+        """Kiểm tra email đã được đăng ký chưa (chỉ đếm, không tải document)."""
+        return await self.repository.count_documents("users", {"email": email}, limit=1) > 0
+    
+    async def find_user_by_id(self, user_id: str, projection: dict = None):
         """Tìm người dùng theo ID."""
         try:
             query = {"_id": ObjectId(user_id)}
-            return await self.repository.find_one("users", query)
+            return await self.repository.find_one("users", query, projection)
         except Exception as e:
             raise ValueError(f"Invalid user ID: {user_id}")
         
-    async def get_all_users(self):
+    async def get_all_users(self, projection: dict = None, skip: int = 0, limit: int = 0):
         """Lấy danh sách tất cả người dùng."""
         query = {}
-        return await self.repository.find_many("users", query)
+        return await self.repository.find_many("users", query, projection, sort=[("_id", 1)], skip=skip, limit=limit)
     
     async def create_user(self, user_data: dict):
         """Tạo người dùng mới."""
@@ -36,6 +40,11 @@ class AuthRepository:
         query = {"email": email}
         return await self.repository.update_one("users", query, update_data)
     
+    async def update_user_and_return(self, email: str, update_data: dict, projection: dict = None):
+        """Cập nhật thông tin người dùng và trả về bản ghi sau khi cập nhật (một lần gọi database)."""
+        query = {"email": email}
+        return await self.repository.find_one_and_update("users", query, update_data, projection)
+    
     async def update_user_by_id(self, user_id: str, update_data: dict):
         """Cập nhật thông tin người dùng theo ID."""
         try:
@@ -44,6 +53,14 @@ class AuthRepository:
         except Exception as e:
             raise ValueError(f"Invalid user ID: {user_id}")
         
+    async def update_user_by_id_and_return(self, user_id: str, update_data: dict, projection: dict = None):
+        """Cập nhật thông tin người dùng theo ID và trả về bản ghi sau khi cập nhật."""
+        try:
+            query = {"_id": ObjectId(user_id)}
+        except Exception as e:
+            raise ValueError(f"Invalid user ID: {user_id}")
+        return await self.repository.find_one_and_update("users", query, update_data, projection)
+        
     async def delete_user(self, user_id: str):
         """Xóa người dùng theo ID."""
         try:
@@ -2,21 +2,57 @@
 #Định nghĩa các phương thức trừu tượng để các implementation (như MongoRepository) có thể triển khai theo cách riêng
 
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional
+from typing import Any, AsyncIterator, List, Optional
 
 # resource ở đây có thể là collection nếu là mongo, hoặc table nếu là postgres
+# Các thao tác trong bulk_write được mô tả bằng dict trung lập (không phụ thuộc driver), ví dụ:
+#   {"insert_one": {"document": {...}}}
+#   {"update_one": {"filter": {...}, "update": {...}, "upsert": False}}
+#   {"update_many": {"filter": {...}, "update": {...}}}
+#   {"delete_one": {"filter": {...}}}
+#   {"delete_many": {"filter": {...}}}
 class BaseRepository(ABC):
     def __init__(self, db):
         self.db = db
     
     @abstractmethod
-    async def find_one(self, resource: str, query: dict) -> Optional[Any]:
-        """Tìm một bản ghi trong resource dựa trên query"""
+    async def find_one(self, resource: str, query: dict, projection: dict = None) -> Optional[Any]:
+        """Tìm một bản ghi trong resource dựa trên query.
+        projection: chỉ lấy các trường cần thiết (None = lấy toàn bộ)"""
         pass
     
     @abstractmethod
-    async def find_many(self, resource: str, query: dict) -> List[Any]:
-        """Tìm nhiều bản ghi trong resource dựa trên query"""
+    async def find_many(
+        self,
+        resource: str,
+        query: dict,
+        projection: dict = None,
+        sort: list = None,
+        skip: int = 0,
+        limit: int = 0
+    ) -> List[Any]:
+        """Tìm nhiều bản ghi trong resource dựa trên query.
+        sort: danh sách (field, direction), skip/limit để phân trang, limit=0 nghĩa là không giới hạn"""
+        pass
+    
+    @abstractmethod
+    def iter_many(
+        self,
+        resource: str,
+        query: dict,
+        projection: dict = None,
+        sort: list = None,
+        skip: int = 0,
+        limit: int = 0,
+        batch_size: int = 100
+    ) -> AsyncIterator[Any]:
+        """Duyệt lần lượt các bản ghi (async for) thay vì tải hết vào bộ nhớ.
+        batch_size: số bản ghi lấy về mỗi lượt từ database"""
+        pass
+    
+    @abstractmethod
+    async def count_documents(self, resource: str, query: dict, limit: int = 0) -> int:
+        """Đếm số bản ghi khớp với query (limit > 0 để dừng đếm sớm)"""
         pass
     
     @abstractmethod
@@ -24,12 +60,40 @@ class BaseRepository(ABC):
         """Chèn một bản ghi vào resource"""
         pass
     
+    @abstractmethod
+    async def insert_many(self, resource: str, documents: List[dict], ordered: bool = True) -> Any:
+        """Chèn nhiều bản ghi trong một lần gọi.
+        ordered=False: tiếp tục chèn các bản ghi còn lại khi có bản ghi lỗi"""
+        pass
+    
     @abstractmethod
     async def update_one(self, resource: str, query: dict, update: dict, upsert: bool = False) -> Any:
         """Cập nhật một bản ghi trong resource dựa trên query.
         Nếu upsert=True, tạo mới nếu không tìm thấy."""
         pass
     
+    @abstractmethod
+    async def find_one_and_update(
+        self,
+        resource: str,
+        query: dict,
+        update: dict | list,
+        projection: dict = None,
+        upsert: bool = False,
+        return_updated: bool = True
+    ) -> Optional[Any]:
+        """Cập nhật một bản ghi và trả về bản ghi trong cùng một thao tác (nguyên tử).
+        query có thể chứa điều kiện (quyền sở hữu, giá trị cũ, ...) để chỉ cập nhật khi thỏa mãn.
+        update có thể là dict toán tử hoặc pipeline (list) để tính giá trị mới từ giá trị hiện tại.
+        return_updated=True trả về bản ghi SAU khi cập nhật, False trả về bản ghi TRƯỚC khi cập nhật.
+        Trả về None nếu không có bản ghi nào khớp với query."""
+        pass
+    
+    @abstractmethod
+    async def bulk_write(self, resource: str, operations: List[dict], ordered: bool = True) -> Any:
+        """Thực hiện nhiều thao tác ghi (insert/update/delete) trong một lần gọi database"""
+        pass
+    
     @abstractmethod
     async def delete_one(self, resource: str, query: dict) -> Any:
         """Xóa một bản ghi trong resource dựa trên query"""
@@ -38,4 +102,15 @@ class BaseRepository(ABC):
     @abstractmethod
     async def delete_many(self, resource: str, query: dict) -> Any:
         """Xóa nhiều bản ghi trong resource dựa trên query"""
-        pass
\ No newline at end of file
+        pass
+    
+    @abstractmethod
+    async def ensure_capped(self, resource: str, size_bytes: int) -> None:
+        """Tạo resource dạng capped (kích thước cố định, ghi vòng) nếu chưa có"""
+        pass
+    
+    @abstractmethod
+    def tail(self, resource: str, query: dict) -> AsyncIterator[Any]:
+        """Theo dõi (async for) các bản ghi mới được thêm vào resource capped, chờ khi chưa có bản ghi mới.
+        Kết thúc khi cursor bị đóng phía database (vd: collection rỗng), phía gọi tự mở lại."""
+        pass
@@ -3,6 +3,8 @@
 # Nhận một instance của BaseRepository thông qua constructor để không phụ thuộc vào implementation cụ thể.
 # Tuân thủ DIP: Chỉ phụ thuộc vào abstraction BaseRepository.
 # Tuân thủ OCP: Có thể đổi database (MongoDB sang PostgreSQL) mà không cần sửa code.
+# Lịch sử tin nhắn được lưu trong collection "messages" (mỗi tin nhắn 1 document, định danh bởi chat_id + seq)
+# thay vì mảng "history" nhúng trong document chat, để document chat không phình to theo độ dài hội thoại.
 
 from bson import ObjectId
 
@@ -14,15 +16,15 @@ class ChatRepository:
         """Tạo một chat mới."""
         return await self.repository.insert_one("chats", chat_data)
     
-    async def find_chats_by_user(self, user_id: str):
+    async def find_chats_by_user(self, user_id: str, projection: dict = None):
         """Lấy danh sách chat của user"""
         query = {"user_id": user_id}
-        return await self.repository.find_many("chats", query)
+        return await self.repository.find_many("chats", query, projection)
     
-    async def find_chat_by_id_and_user(self, chat_id: str, user_id: str):
+    async def find_chat_by_id_and_user(self, chat_id: str, user_id: str, projection: dict = None):
         """Lấy chat theo ID và user ID"""
         query = {"_id": ObjectId(chat_id), "user_id": user_id}
-        return await self.repository.find_one("chats", query)
+        return await self.repository.find_one("chats", query, projection)
     
     async def delete_chat(self, chat_id: str, user_id: str):
         """Xóa chat theo ID và user ID"""
@@ -34,42 +36,204 @@ class ChatRepository:
         query = {"chat_id": chat_id, "user_id": user_id}
         return await self.repository.delete_many("vocabs", query)
     
+    async def delete_messages_by_chat(self, chat_id: str, user_id: str):
+        """Xóa toàn bộ tin nhắn của chat"""
+        query = {"chat_id": chat_id, "user_id": user_id}
+        return await self.repository.delete_many("messages", query)
+    
     async def update_chat(self, chat_id: str, user_id: str, update_data: dict):
         """Cập nhật chat theo ID và user ID"""
         query = {"_id": ObjectId(chat_id), "user_id": user_id}
         return await self.repository.update_one("chats", query, update_data)
     
-    async def update_chat_history_audio(self, chat_id: str, index: int, audio_url: str):
-        """Cập nhật audioUrl trong history tại index"""
-        return await self.repository.update_one(
+    async def find_chat_summaries(self, user_id: str, before: tuple = None, limit: int = 0):
+        """Lấy danh sách chat dạng rút gọn (cho sidebar), sắp xếp theo updatedAt giảm dần.
+        before: cursor (updatedAt, _id) của phần tử cuối trang trước."""
+        query = {"user_id": user_id}
+        if before is not None:
+            updated_at, last_id = before
+            query["$or"] = [
+                {"updatedAt": {"$lt": updated_at}},
+                {"updatedAt": updated_at, "_id": {"$lt": last_id}},
+            ]
+        projection = {"title": 1, "updatedAt": 1, "message_count": 1, "last_message": 1}
+        return await self.repository.find_many(
             "chats",
-            {"_id": ObjectId(chat_id)},
-            {"$set": {f"history.{index}.audioUrl": audio_url}}
+            query,
+            projection,
+            sort=[("updatedAt", -1), ("_id", -1)],
+            limit=limit
         )
     
-    async def update_chat_history(self, chat_id: str, message: dict, title_update: dict = None):
-        """Thêm tin nhắn vào history và cập nhật title nếu cần"""
-        update_data = {
-            "$push": {"history": message}
+    async def update_chat_title(self, chat_id: str, user_id: str, title: str, updated_at):
+        """Đổi title trong một thao tác: chỉ cập nhật khi chat thuộc user và title thực sự thay đổi.
+        Trả về None nếu chat không tồn tại, không thuộc user hoặc title không đổi."""
+        return await self.repository.find_one_and_update(
+            "chats",
+            {"_id": ObjectId(chat_id), "user_id": user_id, "title": {"$ne": title}},
+            {"$set": {"title": title, "updatedAt": updated_at}},
+            projection={"_id": 1}
+        )
+    
+    async def allocate_message_seq(self, chat_id: str, user_id: str, first_title: str, chat_update: dict = None):
+        """Tăng bộ đếm message_count của chat và trả về chat sau khi tăng, trong một thao tác nguyên tử.
+        seq của tin nhắn mới = message_count - 1. Trả về None nếu chat không tồn tại hoặc không thuộc user.
+        first_title: dùng làm title nếu đây là tin nhắn đầu tiên và chat chưa có title.
+        chat_update: các trường cần ghi cùng lúc (updatedAt, last_message, ...)"""
+        current_count = {"$ifNull": ["$message_count", 0]}
+        is_first_untitled = {"$and": [
+            {"$eq": [current_count, 0]},
+            {"$eq": [{"$ifNull": ["$title", ""]}, ""]},
+        ]}
+        # Pipeline update: các tham chiếu "$field" đọc giá trị TRƯỚC khi cập nhật.
+        # Giá trị do người dùng nhập được bọc $literal để không bị hiểu nhầm là toán tử/field path.
+        fields = {
+            "message_count": {"$add": [current_count, 1]},
+            "title": {"$cond": [is_first_untitled, {"$literal": first_title}, "$title"]},
         }
-        if title_update:
-            update_data["$set"] = title_update
+        for key, value in (chat_update or {}).items():
+            fields[key] = {"$literal": value}
+        return await self.repository.find_one_and_update(
+            "chats",
+            {"_id": ObjectId(chat_id), "user_id": user_id},
+            [{"$set": fields}],
+            projection={"title": 1, "message_count": 1}
+        )
+    
+    async def release_message_seq(self, chat_id: str, seq: int, chat_update: dict = None):
+        """Trả lại seq vừa cấp khi không lưu được tin nhắn: chỉ giảm bộ đếm nếu chưa có tin nhắn nào được cấp seq sau đó.
+        chat_update: các trường tóm tắt cần khôi phục (last_message, ...)"""
         return await self.repository.update_one(
             "chats",
-            {"_id": ObjectId(chat_id)},
-            update_data
+            {"_id": ObjectId(chat_id), "message_count": seq + 1},
+            {"$set": {"message_count": seq, **(chat_update or {})}}
+        )
+    
+    async def insert_message(self, message: dict):
+        """Thêm một tin nhắn vào collection messages"""
+        return await self.repository.insert_one("messages", message)
+    
+    async def find_messages(self, chat_id: str, before: int = None, limit: int = 0):
+        """Lấy tin nhắn của chat theo thứ tự seq tăng dần.
+        before: chỉ lấy các tin nhắn có seq < before (phân trang ngược từ cuối hội thoại).
+        limit: số tin nhắn tối đa (0 = không giới hạn), lấy các tin nhắn MỚI NHẤT thỏa điều kiện."""
+        query = {"chat_id": chat_id}
+        if before is not None:
+            query["seq"] = {"$lt": before}
+        projection = {"_id": 0, "chat_id": 0, "user_id": 0}
+        if not limit:
+            return await self.repository.find_many("messages", query, projection, sort=[("seq", 1)])
+        # Lấy theo seq giảm dần để giới hạn ở các tin nhắn mới nhất, sau đó đảo lại cho đúng thứ tự hội thoại
+        messages = await self.repository.find_many("messages", query, projection, sort=[("seq", -1)], limit=limit)
+        messages.reverse()
+        return messages
+    
+    async def find_message(self, chat_id: str, user_id: str, index: int, projection: dict = None):
+        """Lấy một tin nhắn theo chat_id và seq (chỉ khi thuộc user)"""
+        query = {"chat_id": chat_id, "user_id": user_id, "seq": index}
+        return await self.repository.find_one("messages", query, projection)
+    
+    async def update_chat_history_audio(self, chat_id: str, user_id: str, index: int, audio_url: str):
+        """Cập nhật audioUrl của tin nhắn tại vị trí index (seq).
+        Quyền sở hữu và phạm vi index được kiểm tra ngay trong điều kiện của câu update."""
+        return await self.repository.update_one(
+            "messages",
+            {"chat_id": chat_id, "user_id": user_id, "seq": index},
+            {"$set": {"audioUrl": audio_url}}
         )
         
-    async def update_chat_history_translation(self, chat_id: str, index: int, translated_text: str, original_ai_text: str):
-        """Cập nhật bản dịch của tin nhắn AI trong history"""
+    async def set_message_audio_if_missing(self, chat_id: str, user_id: str, index: int, ai_text: str, audio_url: str):
+        """Gán audioUrl (tổng hợp trước) cho tin nhắn chưa có audio, chỉ khi nội dung AI vẫn là text đã tổng hợp"""
+        return await self.repository.update_one(
+            "messages",
+            {"chat_id": chat_id, "user_id": user_id, "seq": index, "ai": ai_text, "audioUrl": {"$in": ["", None]}},
+            {"$set": {"audioUrl": audio_url}}
+        )
+    
+    async def set_suggestion_audio_if_current(self, chat_id: str, user_id: str, suggestion: str, audio_url: str):
+        """Gán suggestion_audio_url khi câu gợi ý trên chat vẫn là câu đã tổng hợp (chưa bị thay bằng gợi ý mới)"""
         return await self.repository.update_one(
             "chats",
-            {"_id": ObjectId(chat_id),
-             f"history.{index}.ai": original_ai_text},
-            {"$set": {f"history.{index}.translateAi": translated_text}}
+            {"_id": ObjectId(chat_id), "user_id": user_id, "latest_suggestion": suggestion},
+            {"$set": {"suggestion_audio_url": audio_url}}
+        )
+        
+    async def update_chat_history_translation(self, chat_id: str, user_id: str, index: int, translated_text: str, original_ai_text: str):
+        """Cập nhật bản dịch của tin nhắn AI tại vị trí index (seq), chỉ khi nội dung AI chưa thay đổi"""
+        return await self.repository.update_one(
+            "messages",
+            {"chat_id": chat_id, "user_id": user_id, "seq": index, "ai": original_ai_text},
+            {"$set": {"translateAi": translated_text}}
         )
         
+    async def find_untranslated_messages(self, chat_id: str, user_id: str):
+        """Lấy seq và nội dung AI của các tin nhắn chưa có bản dịch, theo thứ tự hội thoại"""
+        query = {"chat_id": chat_id, "user_id": user_id, "ai": {"$nin": ["", None]}, "translateAi": {"$in": ["", None]}}
+        return await self.repository.find_many("messages", query, {"_id": 0, "seq": 1, "ai": 1}, sort=[("seq", 1)])
+    
+    async def update_chat_history_translations(self, chat_id: str, user_id: str, translations: list):
+        """Ghi bản dịch của nhiều tin nhắn trong một lần gọi; translations: các tuple (seq, nội dung AI gốc, bản dịch).
+        Như update_chat_history_translation: chỉ ghi khi nội dung AI chưa thay đổi."""
+        if not translations:
+            return None
+        operations = [
+            {"update_one": {
+                "filter": {"chat_id": chat_id, "user_id": user_id, "seq": seq, "ai": original_ai_text},
+                "update": {"$set": {"translateAi": translated_text}}
+            }}
+            for seq, original_ai_text, translated_text in translations
+        ]
+        return await self.repository.bulk_write("messages", operations, ordered=False)
+        
     async def find_vocab_by_chat(self, chat_id: str, user_id: str):
         """Lấy danh sách từ vựng theo chat ID và user ID"""
         query = {"chat_id": chat_id, "user_id": user_id}
-        return await self.repository.find_many("vocabs", query)
\ No newline at end of file
+        return await self.repository.find_many("vocabs", query, sort=[("_id", 1)])
+    
+    async def count_messages(self, chat_id: str) -> int:
+        """Đếm số tin nhắn của chat trong collection messages"""
+        return await self.repository.count_documents("messages", {"chat_id": chat_id})
+    
+    def iter_chats_with_embedded_history(self):
+        """Duyệt (async for) các chat còn mảng history nhúng (dữ liệu cũ, chưa tách sang messages)"""
+        query = {"history": {"$exists": True}}
+        projection = {"history": 1, "user_id": 1, "message_count": 1, "updatedAt": 1}
+        return self.repository.iter_many("chats", query, projection, batch_size=20)
+    
+    async def upsert_messages(self, messages: list):
+        """Ghi nhiều tin nhắn theo khóa (chat_id, seq) trong một lần gọi, không tạo bản trùng nếu chạy lại"""
+        if not messages:
+            return None
+        operations = []
+        for message in messages:
+            key = {"chat_id": message["chat_id"], "seq": message["seq"]}
+            fields = {k: v for k, v in message.items() if k not in key}
+            operations.append({"update_one": {"filter": key, "update": {"$setOnInsert": fields}, "upsert": True}})
+        return await self.repository.bulk_write("messages", operations, ordered=False)
+    
+    async def finalize_history_split(self, chat_id: str, message_count: int, summary: dict = None):
+        """Xóa mảng history nhúng và ghi lại bộ đếm message_count (cùng các trường tóm tắt) sau khi đã tách"""
+        return await self.repository.update_one(
+            "chats",
+            {"_id": ObjectId(chat_id)},
+            {"$unset": {"history": ""}, "$set": {"message_count": message_count, **(summary or {})}}
+        )
+    
+    def iter_chats_missing_summary(self):
+        """Duyệt (async for) các chat chưa có trường updatedAt (tạo trước khi có danh sách rút gọn)"""
+        return self.repository.iter_many("chats", {"updatedAt": {"$exists": False}}, {"_id": 1})
+    
+    async def update_chat_summary(self, chat_id: str, summary: dict):
+        """Ghi các trường tóm tắt (updatedAt, last_message) của chat"""
+        return await self.repository.update_one("chats", {"_id": ObjectId(chat_id)}, {"$set": summary})
+    
+    async def update_context_summary(self, chat_id: str, user_id: str, previous_upto: int, context_summary: dict):
+        """Ghi bản tóm tắt hội thoại (rolling summary) dùng làm ngữ cảnh cho AI.
+        Chỉ ghi khi bản tóm tắt hiện tại vẫn bao phủ tới previous_upto (compare-and-set),
+        tránh ghi đè bản mới hơn khi có nhiều lần cập nhật chạy song song."""
+        query = {"_id": ObjectId(chat_id), "user_id": user_id}
+        if previous_upto:
+            query["context_summary.upto_seq"] = previous_upto
+        else:
+            query["context_summary"] = {"$exists": False}
+        return await self.repository.update_one("chats", query, {"$set": {"context_summary": context_summary}})
@@ -19,4 +19,13 @@ class ConfigRepository:
             {"_id": self.config_id},
             {"$set": update_data},
             upsert=True
+        )
+        
+    async def update_config_and_return(self, update_data: dict) -> dict:
+        """Cập nhật site config và trả về config sau khi cập nhật trong một lần gọi database"""
+        return await self.repository.find_one_and_update(
+            "site_configs",
+            {"_id": self.config_id},
+            {"$set": update_data},
+            upsert=True
         )
\ No newline at end of file
@@ -0,0 +1,24 @@
+# repositories/expiring_cache_repository.py
+# Định nghĩa ExpiringCacheRepository: thao tác chung cho các collection làm bộ đệm (khóa _id, TTL index tự xóa entry hết hạn).
+# Lớp con chỉ khai báo tên collection và các trường cần đọc.
+# Nhận một instance của BaseRepository thông qua constructor để không phụ thuộc vào implementation cụ thể.
+# Tuân thủ DIP: Chỉ phụ thuộc vào abstraction BaseRepository.
+
+class ExpiringCacheRepository:
+    collection = None
+    projection = None
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    async def find_entry(self, key: str):
+        """Tìm entry theo khóa"""
+        return await self.repository.find_one(self.collection, {"_id": key}, self.projection)
+
+    async def find_entries(self, keys: list):
+        """Tìm nhiều entry trong một truy vấn (dùng cho tra cứu theo lô)"""
+        return await self.repository.find_many(self.collection, {"_id": {"$in": keys}}, self.projection)
+
+    async def save_entry(self, key: str, entry: dict):
+        """Lưu (hoặc ghi đè) entry; TTL index của collection tự xóa khi hết hạn"""
+        return await self.repository.update_one(self.collection, {"_id": key}, {"$set": entry}, upsert=True)
@@ -2,31 +2,123 @@
 #Triển khai BaseRepository cho MongoDB
 #Nếu cần hỗ trợ PostgreSQL, có thể tạo PostgresRepository mà không ảnh hưởng đến các file khác
 
+from pymongo import ReturnDocument, InsertOne, UpdateOne, UpdateMany, DeleteOne, DeleteMany, CursorType
+from pymongo.errors import CollectionInvalid
 from .base_repository import BaseRepository
-from typing import Any, List, Optional
+from typing import Any, AsyncIterator, List, Optional
+
+# Chuyển mô tả thao tác dạng dict (của BaseRepository.bulk_write) sang request của pymongo
+BULK_OPERATIONS = {
+    "insert_one": lambda op: InsertOne(op["document"]),
+    "update_one": lambda op: UpdateOne(op["filter"], op["update"], upsert=op.get("upsert", False)),
+    "update_many": lambda op: UpdateMany(op["filter"], op["update"], upsert=op.get("upsert", False)),
+    "delete_one": lambda op: DeleteOne(op["filter"]),
+    "delete_many": lambda op: DeleteMany(op["filter"]),
+}
 
 # Implementation cụ thể cho MongoDB
 class MongoRepository(BaseRepository):
     def __init__(self, db):
         self.db = db
         
-    async def find_one(self, resource: str, query: dict) -> Optional[Any]:
-        return await self.db[resource].find_one(query)
+    def _cursor(self, resource: str, query: dict, projection: dict, sort: list, skip: int, limit: int):
+        cursor = self.db[resource].find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
+        
+    async def find_one(self, resource: str, query: dict, projection: dict = None) -> Optional[Any]:
+        return await self.db[resource].find_one(query, projection)
+    
+    async def find_many(
+        self,
+        resource: str,
+        query: dict,
+        projection: dict = None,
+        sort: list = None,
+        skip: int = 0,
+        limit: int = 0
+    ) -> List[Any]:
+        cursor = self._cursor(resource, query, projection, sort, skip, limit)
+        return await cursor.to_list(length=None) # Lấy tất cả document trả về (đã giới hạn bởi limit nếu có)
     
-    async def find_many(self, resource: str, query: dict) -> List[Any]:
-        return await self.db[resource].find(query).to_list(length=None) # Lấy tất cả document trả về, không giới hạn số lượng
+    async def iter_many(
+        self,
+        resource: str,
+        query: dict,
+        projection: dict = None,
+        sort: list = None,
+        skip: int = 0,
+        limit: int = 0,
+        batch_size: int = 100
+    ) -> AsyncIterator[Any]:
+        cursor = self._cursor(resource, query, projection, sort, skip, limit).batch_size(batch_size)
+        async for document in cursor:
+            yield document
+    
+    async def count_documents(self, resource: str, query: dict, limit: int = 0) -> int:
+        options = {"limit": limit} if limit else {}
+        return await self.db[resource].count_documents(query, **options)
     
     async def insert_one(self, resource: str, document: dict) -> Any:
         return await self.db[resource].insert_one(document)
     
+    async def insert_many(self, resource: str, documents: List[dict], ordered: bool = True) -> Any:
+        return await self.db[resource].insert_many(documents, ordered=ordered)
+    
     async def update_one(self, resource: str, query: dict, update: dict, upsert: bool = False) -> Any:
         # Kiểm tra xem update đã chứa toán tử MongoDB hay chưa
         if not any(key.startswith("$") for key in update.keys()):
             update = {"$set": update}
         return await self.db[resource].update_one(query, update, upsert=upsert)
+    
+    async def find_one_and_update(
+        self,
+        resource: str,
+        query: dict,
+        update: dict | list,
+        projection: dict = None,
+        upsert: bool = False,
+        return_updated: bool = True
+    ) -> Optional[Any]:
+        # Pipeline update (list) giữ nguyên, dict chưa có toán tử thì bọc trong $set
+        if isinstance(update, dict) and not any(key.startswith("$") for key in update.keys()):
+            update = {"$set": update}
+        return await self.db[resource].find_one_and_update(
+            query,
+            update,
+            projection=projection,
+            upsert=upsert,
+            return_document=ReturnDocument.AFTER if return_updated else ReturnDocument.BEFORE
+        )
+    
+    async def bulk_write(self, resource: str, operations: List[dict], ordered: bool = True) -> Any:
+        requests = []
+        for operation in operations:
+            (name, params), = operation.items()
+            requests.append(BULK_OPERATIONS[name](params))
+        return await self.db[resource].bulk_write(requests, ordered=ordered)
         
     async def delete_one(self, resource: str, query: dict) -> Any:
         return await self.db[resource].delete_one(query)
     
     async def delete_many(self, resource: str, query: dict) -> Any:
-        return await self.db[resource].delete_many(query)
\ No newline at end of file
+        return await self.db[resource].delete_many(query)
+    
+    async def ensure_capped(self, resource: str, size_bytes: int) -> None:
+        if await self.db.list_collection_names(filter={"name": resource}):
+            return
+        try:
+            await self.db.create_collection(resource, capped=True, size=size_bytes)
+        except CollectionInvalid:
+            pass # Process khác vừa tạo
+    
+    async def tail(self, resource: str, query: dict) -> AsyncIterator[Any]:
+        cursor = self.db[resource].find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+        while cursor.alive:
+            async for document in cursor:
+                yield document
@@ -0,0 +1,10 @@
+# repositories/translation_repository.py
+# Định nghĩa TranslationRepository: bộ đệm kết quả dịch (collection translation_cache, hết hạn theo expiresAt).
+# Khóa là hash của (text, source, target, engine).
+# Tuân thủ DIP: Chỉ phụ thuộc vào abstraction BaseRepository (qua ExpiringCacheRepository).
+
+from .expiring_cache_repository import ExpiringCacheRepository
+
+class TranslationRepository(ExpiringCacheRepository):
+    collection = "translation_cache"
+    projection = {"translated": 1, "expiresAt": 1}
@@ -0,0 +1,10 @@
+# repositories/tts_audio_repository.py
+# Định nghĩa TTSAudioRepository: chỉ mục các file audio TTS đã upload, khóa theo hash nội dung (text, method, voice, format).
+# TTL index trên createdAt: entry hết hạn trước khi CacheService xóa object khỏi bucket, save_entry làm mới createdAt.
+# Tuân thủ DIP: Chỉ phụ thuộc vào abstraction BaseRepository (qua ExpiringCacheRepository).
+
+from .expiring_cache_repository import ExpiringCacheRepository
+
+class TTSAudioRepository(ExpiringCacheRepository):
+    collection = "tts_audio"
+    projection = {"object_name": 1, "createdAt": 1}
@@ -0,0 +1,21 @@
+# repositories/user_invalidation_repository.py
+# Định nghĩa UserInvalidationRepository: kênh báo hủy bộ đệm user giữa các worker (collection capped user_invalidations).
+# Nhận một instance của BaseRepository thông qua constructor để không phụ thuộc vào implementation cụ thể.
+# Tuân thủ DIP: Chỉ phụ thuộc vào abstraction BaseRepository.
+
+COLLECTION = "user_invalidations"
+
+class UserInvalidationRepository:
+    def __init__(self, repository):
+        self.repository = repository
+
+    async def ensure_channel(self, size_bytes: int):
+        """Tạo collection capped nếu chưa có (sự kiện cũ tự bị ghi đè, không cần dọn)"""
+        await self.repository.ensure_capped(COLLECTION, size_bytes)
+
+    async def publish(self, event: dict):
+        return await self.repository.insert_one(COLLECTION, event)
+
+    def listen(self, after):
+        """Theo dõi (async for) các sự kiện có createdAt >= after"""
+        return self.repository.tail(COLLECTION, {"createdAt": {"$gte": after}})
@@ -18,7 +18,7 @@ class VocabRepository:
             "chat_id": ObjectId(chat_id),
             "user_id": user_id
         }
-        return await self.repository.find_one("vocabs", query)
+        return await self.repository.find_one("vocabs", query, {"_id": 1})
     
     async def find_vocab_by_id_and_chat(self, vocab_id: str, chat_id:str, user_id:str):
         """Tìm từ vựng theo vocab_id, chat_id và user_id"""
@@ -27,14 +27,14 @@ class VocabRepository:
             "chat_id": ObjectId(chat_id),
             "user_id": user_id
         }
-        return await self.repository.find_one("vocabs", query)
+        return await self.repository.find_one("vocabs", query, {"_id": 1})
     
     async def find_vocab_by_chat_id(self, chat_id: str):
         """Tìm tất cả từ vựng theo chat_id"""
         query = {
             "chat_id": ObjectId(chat_id)
         }
-        return await self.repository.find_many("vocabs", query)
+        return await self.repository.find_many("vocabs", query, sort=[("_id", 1)])
     
     async def find_chat_by_id_and_user(self, chat_id: str, user_id:str):
         """Tìm chat theo chat_id và user_id để kiểm tra quyền sở hữu"""
@@ -42,7 +42,7 @@ class VocabRepository:
             "_id": ObjectId(chat_id),
             "user_id": user_id
         }
-        return await self.repository.find_one("chats", query)
+        return await self.repository.find_one("chats", query, {"_id": 1}) # Chỉ cần biết chat có tồn tại
     
     async def add_vocab(self, vocab_data: dict):
         """Thêm từ vựng vào database"""
@@ -0,0 +1,10 @@
+# repositories/word_info_repository.py
+# Định nghĩa WordInfoRepository: bộ đệm kết quả tra từ điển (collection word_info_cache, hết hạn theo expiresAt).
+# Khóa theo (source, word, limit).
+# Tuân thủ DIP: Chỉ phụ thuộc vào abstraction BaseRepository (qua ExpiringCacheRepository).
+
+from .expiring_cache_repository import ExpiringCacheRepository
+
+class WordInfoRepository(ExpiringCacheRepository):
+    collection = "word_info_cache"
+    projection = {"result": 1, "found": 1, "expiresAt": 1}
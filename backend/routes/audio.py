@@ -1,14 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import JSONResponse
-from ..dependencies import get_storage_client
+from ..dependencies import get_storage_client, get_executor_service
 from ..storage.storage_client import StorageClient
+from ..services.executor_service import ExecutorService
 from ..logging_config import logger
 
 router = APIRouter()
 
 # Phát lại audio
 @router.get('/{filename}')
-async def get_audio(filename: str, storage_client: StorageClient = Depends(get_storage_client)):
+async def get_audio(
+    filename: str,
+    storage_client: StorageClient = Depends(get_storage_client),
+    executor_service: ExecutorService = Depends(get_executor_service)
+):
     """
     Trả về URL công khai của file âm thanh trong audio_bucket.
 
@@ -26,10 +31,10 @@ async def get_audio(filename: str, storage_client: StorageClient = Depends(get_s
         audio_bucket = storage_client.audio_bucket
         
         # Kiểm tra xem file có tồn tại trong audio_bucket không
-        storage_client.stat_object(audio_bucket, filename)
+        await executor_service.run("io-storage", storage_client.stat_object, audio_bucket, filename)
         
         # Tạo URL công khai
-        audio_url = storage_client.presigned_get_object(audio_bucket, filename)
+        audio_url = await executor_service.run("io-storage", storage_client.presigned_get_object, audio_bucket, filename)
         logger.info(f"Generated presigned URL for {filename}: {audio_url}")
         
         # Trả về URL trong JSON
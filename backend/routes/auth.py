@@ -9,7 +9,7 @@ from pydantic import BaseModel, EmailStr
 from ..security import UserInDB, get_current_user, oauth2_scheme
 from ..services.auth_service import AuthService
 from ..config.jwt_config import get_jwt_config, JWTConfig
-from ..dependencies import get_auth_repository, get_storage_client
+from ..dependencies import get_auth_repository, get_storage_client, get_executor_service, get_user_cache
 from ..logging_config import logger
 
 router = APIRouter()
@@ -53,9 +53,11 @@ def get_jwt_config_dep():
 async def get_auth_service(
     auth_repository = Depends(get_auth_repository),
     storage_client = Depends(get_storage_client),
-    jwt_config: JWTConfig = Depends(get_jwt_config_dep)
+    jwt_config: JWTConfig = Depends(get_jwt_config_dep),
+    executor_service = Depends(get_executor_service),
+    user_cache = Depends(get_user_cache)
 ):
-    return AuthService(auth_repository, storage_client, jwt_config)
+    return AuthService(auth_repository, storage_client, jwt_config, executor_service, user_cache)
 
 # Dependency để lấy current_user
 async def get_current_user_with_auth_service(
@@ -1,13 +1,13 @@
 #routes/chats.py
 
-from fastapi import APIRouter, Request, HTTPException, Depends
+from fastapi import APIRouter, Request, HTTPException, Depends, Query
 from fastapi.responses import Response
 from pydantic import BaseModel
 from ..security import get_current_user, UserInDB, oauth2_scheme
 from ..services.chat_service import ChatService
 from ..services.auth_service import AuthService
 from .auth import get_auth_service
-from ..dependencies import get_chat_repository
+from ..dependencies import get_chat_repository, get_executor_service, get_tts_prefetch_service, get_translation_service
 from ..logging_config import logger
 
 router = APIRouter()
@@ -18,9 +18,17 @@ class TranslateRequest(BaseModel):
     target_lang: str = "vi"
     index: int
 
+class TranslateAllRequest(BaseModel):
+    target_lang: str = "vi"
+
 #Khởi tạo ChatService với repository
-async def get_chat_service(chat_repository = Depends(get_chat_repository)):
-    return ChatService(chat_repository)
+async def get_chat_service(
+    chat_repository = Depends(get_chat_repository),
+    executor_service = Depends(get_executor_service),
+    tts_prefetch = Depends(get_tts_prefetch_service),
+    translation_service = Depends(get_translation_service)
+):
+    return ChatService(chat_repository, executor_service, tts_prefetch, translation_service)
 
 # Dependency để lấy current_user
 async def get_current_user_with_auth_service(
@@ -54,6 +62,22 @@ async def get_all_chats(
         logger.error(f"Error fetching all chats: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch chats")
 
+# Lấy danh sách chat rút gọn cho sidebar (phân trang theo updatedAt, dùng next_cursor để lấy trang kế tiếp)
+@router.get("/summary")
+async def get_chat_summaries(
+    cursor: str | None = Query(None),
+    limit: int = Query(30, ge=1, le=100),
+    chat_service: ChatService = Depends(get_chat_service),
+    current_user: UserInDB = Depends(get_current_user_with_auth_service)
+):
+    try:
+        return await chat_service.get_chat_summaries(current_user.id, cursor, limit)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Error fetching chat summaries: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch chats")
+
 # Lấy thông tin chi tiết của một chat
 @router.get("/{chat_id}")
 async def get_chat(
@@ -113,14 +137,19 @@ async def update_chat_suggestion(
         raise HTTPException(status_code=500, detail="Failed to update chat suggestion")
 
 # Chỉ trả về phần lịch sử tin nhắn (history) của chat dựa trên chat_id
+# Hỗ trợ phân trang ngược: ?limit=N lấy N tin nhắn mới nhất, ?before=seq lấy các tin nhắn cũ hơn seq
 @router.get("/{chat_id}/history")
 async def get_chat_history(
     chat_id: str, 
+    before: int | None = Query(None, ge=0),
+    limit: int | None = Query(None, ge=1, le=200),
     chat_service: ChatService = Depends(get_chat_service),
     current_user: UserInDB = Depends(get_current_user_with_auth_service)
 ):
     try:
-        return await chat_service.get_chat_history(chat_id, current_user.id)
+        return await chat_service.get_chat_history(chat_id, current_user.id, before, limit)
+    except HTTPException as e:
+        raise e
     except Exception as e:
         logger.error(f"Error fetching history: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch history")
@@ -171,6 +200,22 @@ async def translate_chat_ai(
         logger.error(f"Error translating AI chat: {e}")
         raise HTTPException(status_code=500, detail="Failed to translate AI chat")
 
+# Dịch tất cả đoạn chat AI chưa dịch của chat & cập nhật vào history trong một request
+@router.post("/{chat_id}/translate-all")
+async def translate_chat_all(
+    chat_id: str,
+    request: TranslateAllRequest,
+    chat_service: ChatService = Depends(get_chat_service),
+    current_user: UserInDB = Depends(get_current_user_with_auth_service)
+):
+    try:
+        return await chat_service.translate_chat_all(chat_id, request.target_lang, current_user.id)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Error translating all AI chats: {e}")
+        raise HTTPException(status_code=500, detail="Failed to translate AI chats")
+
 # Lấy danh sách từ vựng của chat
 @router.get("/{chat_id}/vocabs")
 async def get_chat_vocab(
@@ -4,11 +4,13 @@ import os
 from fastapi import APIRouter, Depends, File, UploadFile
 from fastapi.responses import Response
 from pydantic import BaseModel
-from .auth import get_auth_service
+from .auth import get_auth_service, get_admin_user
 from ..security import get_current_user, UserInDB, oauth2_scheme
 from ..services.auth_service import AuthService
 from ..services.config_service import ConfigService, SiteConfig
-from ..dependencies import get_config_repository, get_storage_client
+from ..dependencies import get_config_repository, get_storage_client, get_index_manager, get_executor_service, get_tts_audio_cache, get_word_info_cache, get_single_flight, get_translation_cache, get_user_cache
+from ..database.index_manager import IndexManager
+from ..services.executor_service import ExecutorService
 from ..logging_config import logger
 
 router = APIRouter()
@@ -25,9 +27,10 @@ class SiteConfig(BaseModel):
 # Khởi tạo ConfigService
 def get_config_service(
     config_repository = Depends(get_config_repository),
-    storage_client = Depends(get_storage_client)
+    storage_client = Depends(get_storage_client),
+    executor_service = Depends(get_executor_service)
 ):
-    return ConfigService(config_repository, storage_client)
+    return ConfigService(config_repository, storage_client, executor_service)
 
 # Dependency để lấy current_user
 async def get_current_user_with_auth_service(
@@ -64,3 +67,37 @@ async def update_config(
 async def get_available_models():
     """Trả về danh sách các method được bật."""
     return os.getenv("ENABLED_AI_CLIENTS", "").split(",")
+
+# Thống kê sử dụng index ($indexStats) và báo cáo drift lần khởi động gần nhất (chỉ dành cho admin)
+@router.get("/indexes")
+async def get_index_stats(
+    current_user: UserInDB = Depends(get_admin_user),
+    index_manager: IndexManager = Depends(get_index_manager)
+):
+    return await index_manager.get_index_stats()
+
+# Metrics của các executor pool (số worker, độ sâu hàng đợi, số tác vụ bị từ chối) - chỉ admin
+@router.get("/executors")
+async def get_executor_metrics(
+    current_user: UserInDB = Depends(get_admin_user),
+    executor_service: ExecutorService = Depends(get_executor_service)
+):
+    return executor_service.get_metrics()
+
+# Metrics của các bộ đệm trong process (số entry, hit/miss, tỉ lệ hit) - chỉ admin
+@router.get("/caches")
+async def get_cache_metrics(
+    current_user: UserInDB = Depends(get_admin_user),
+    tts_audio_cache = Depends(get_tts_audio_cache),
+    word_info_cache = Depends(get_word_info_cache),
+    single_flight = Depends(get_single_flight),
+    translation_cache = Depends(get_translation_cache),
+    user_cache = Depends(get_user_cache)
+):
+    return {
+        "tts_audio": tts_audio_cache.get_metrics(),
+        "word_info": word_info_cache.get_metrics(),
+        "translation": translation_cache.get_metrics(),
+        "users": user_cache.get_metrics(),
+        "single_flight": single_flight.get_metrics(),
+    }
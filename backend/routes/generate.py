@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from .auth import get_auth_service
 from ..security import get_current_user, UserInDB, oauth2_scheme
 from ..services.auth_service import AuthService
 from ..services.ai_service import AIService
-from ..dependencies import get_chat_repository, get_openai_client, get_deepseek_client, get_openrouter_client, get_mistral_client, get_gemini_client
+from ..dependencies import get_chat_repository, get_openai_client, get_deepseek_client, get_openrouter_client, get_mistral_client, get_gemini_client, get_tts_prefetch_service, get_single_flight, get_translation_cache
 
 
 router = APIRouter()
@@ -16,10 +16,16 @@ async def get_ai_service(
     deepseek_client = Depends(get_deepseek_client),
     openrouter_client = Depends(get_openrouter_client),
     mistral_client = Depends(get_mistral_client),
-    gemini_client = Depends(get_gemini_client)
+    gemini_client = Depends(get_gemini_client),
+    tts_prefetch = Depends(get_tts_prefetch_service),
+    single_flight = Depends(get_single_flight),
+    translation_cache = Depends(get_translation_cache)
 ):
     
-    return AIService(chat_repository, openai_client, deepseek_client, openrouter_client, mistral_client, gemini_client)
+    return AIService(
+        chat_repository, openai_client, deepseek_client, openrouter_client, mistral_client, gemini_client,
+        tts_prefetch=tts_prefetch, single_flight=single_flight, translation_cache=translation_cache
+    )
 
 # Dependency để lấy current_user
 async def get_current_user_with_auth_service(
@@ -39,7 +45,17 @@ async def generate(
     transcript = data.get('transcript', '')
     chat_id = data.get('chat_id', '') # Lấy chat_id từ request để truy xuất history
     method = request.query_params.get('method', 'gemini')
-    return await ai_service.generate_response(transcript, chat_id, current_user.id, method)
+    tts_method = request.query_params.get('tts_method') # Phương thức TTS để tổng hợp trước audio của câu trả lời
+    
+    # ?stream=1: trả về từng token qua Server-Sent Events thay vì chờ cả câu trả lời
+    if request.query_params.get('stream') in ('1', 'true'):
+        events = await ai_service.stream_response(transcript, chat_id, current_user.id, method, tts_method)
+        return StreamingResponse(
+            events,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # Tắt buffer của nginx để token tới ngay
+        )
+    return await ai_service.generate_response(transcript, chat_id, current_user.id, method, tts_method)
 
 @router.post('/translate')
 async def translate(
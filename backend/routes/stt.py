@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Request, Query, Depends
+from fastapi import APIRouter, Request, Query, Depends, HTTPException, WebSocket, WebSocketDisconnect
 from ..services.stt_service import STTService
-from ..dependencies import get_audio_processor, get_vosk_client, get_assemblyai_client, get_google_stt_client
+from ..logging_config import logger
+from ..dependencies import get_audio_processor, get_vosk_client, get_assemblyai_client, get_google_stt_client, get_executor_service
 
 router = APIRouter()
 
@@ -9,11 +10,50 @@ async def get_stt_service(
     audio_processor = Depends(get_audio_processor),
     vosk_client = Depends(get_vosk_client),
     assemblyai_client = Depends(get_assemblyai_client),
-    google_stt_client = Depends(get_google_stt_client)
+    google_stt_client = Depends(get_google_stt_client),
+    executor_service = Depends(get_executor_service)
 ):
-    return STTService(audio_processor, vosk_client, assemblyai_client, google_stt_client)
+    return STTService(audio_processor, vosk_client, assemblyai_client, google_stt_client, executor_service)
 
 @router.post("")
 async def stt(request: Request, method: str = Query("vosk"), stt_service: STTService = Depends(get_stt_service)):
     audio_blob = await request.body()
-    return await stt_service.transcribe(audio_blob, method)
\ No newline at end of file
+    return await stt_service.transcribe(audio_blob, method)
+
+# Nhận dạng giọng nói theo thời gian thực qua WebSocket
+# Client gửi các frame nhị phân (PCM 16-bit mono theo sample_rate, hoặc các đoạn WebM/Opus của MediaRecorder khi format=webm)
+# ngay khi ghi âm, gửi text "end" khi dừng nói. Server trả về JSON {"type": "partial"|"final", "text"} trong lúc nói
+# và {"type": "done", "transcript"} ở cuối, sau đó đóng kết nối.
+@router.websocket("/stream")
+async def stt_stream(
+    websocket: WebSocket,
+    method: str = Query("vosk"),
+    format: str = Query("pcm"),
+    sample_rate: int = Query(16000, ge=8000, le=48000),
+    stt_service: STTService = Depends(get_stt_service)
+):
+    await websocket.accept()
+    
+    async def audio_chunks():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                yield message["bytes"]
+            elif message.get("text") == "end":
+                return
+    
+    try:
+        async for event in stt_service.stream_transcripts(audio_chunks(), method, format, sample_rate):
+            await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info("STT stream client disconnected")
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "detail": e.detail})
+        await websocket.close(code=1008 if e.status_code < 500 else 1011)
+    except Exception as e:
+        logger.error(f"STT stream error: {e}")
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1011)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from ..services.translation_service import TranslationService
-from ..dependencies import get_google_translation_client
+from ..dependencies import get_translation_service
 
 router = APIRouter()
 
@@ -9,10 +9,7 @@ class TranslateRequest(BaseModel):
     text: str
     target_lang: str = "vi"
 
-# Khởi tạo TranslationService
-async def get_translation_service(translation_client = Depends(get_google_translation_client)):
-    return TranslationService(translation_client)
-
+# TranslationService dùng chung (kèm bộ đệm bản dịch) lấy từ DependencyContainer
 @router.post('')
 async def translate_text(request: TranslateRequest, translation_service: TranslationService = Depends(get_translation_service)):
     return await translation_service.translate(request.text, request.target_lang)
\ No newline at end of file
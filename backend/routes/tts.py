@@ -1,6 +1,13 @@
-from fastapi import APIRouter, Request, Depends
+from fastapi import APIRouter, Request, Depends, HTTPException
+from fastapi.responses import Response
+from bson import ObjectId
+from .auth import get_auth_service
+from .chats import get_chat_service
+from ..security import get_current_user, UserInDB, oauth2_scheme
+from ..services.auth_service import AuthService
+from ..services.chat_service import ChatService
 from ..services.tts_service import TTSService
-from ..dependencies import get_audio_processor, get_storage_client, get_gtts_client, get_piper_client
+from ..dependencies import get_audio_processor, get_storage_client, get_gtts_client, get_piper_client, get_executor_service, get_tts_audio_cache, get_single_flight
 
 router = APIRouter()
 
@@ -9,13 +16,51 @@ async def get_tts_service(
     audio_processor = Depends(get_audio_processor),
     storage_client = Depends(get_storage_client),
     gtts_client = Depends(get_gtts_client),
-    piper_client = Depends(get_piper_client)
+    piper_client = Depends(get_piper_client),
+    executor_service = Depends(get_executor_service),
+    audio_cache = Depends(get_tts_audio_cache),
+    single_flight = Depends(get_single_flight)
 ):
-    return TTSService(audio_processor, storage_client, gtts_client, piper_client)
+    return TTSService(audio_processor, storage_client, gtts_client, piper_client, executor_service, audio_cache, single_flight)
+
+# Dependency để lấy current_user
+async def get_current_user_with_auth_service(
+    token: str = Depends(oauth2_scheme),
+    auth_service: AuthService = Depends(get_auth_service),
+    response: Response = None
+) -> UserInDB:
+    return await get_current_user(token=token, auth_service=auth_service, response=response)
 
 @router.post("")
 async def tts(request: Request, tts_service: TTSService = Depends(get_tts_service)):
     data = await request.json()
     text = data.get('text', '')
     method = request.query_params.get('method', 'gtts')
-    return await tts_service.generate_audio(text, method)
\ No newline at end of file
+    return await tts_service.generate_audio(text, method)
+
+# Phát audio theo luồng (audio/mpeg), URL của file trên MinIO nằm trong header x-audio-url.
+# Truyền chat_id + index để audioUrl của tin nhắn được cập nhật khi upload xong.
+@router.post("/stream")
+async def tts_stream(
+    request: Request,
+    tts_service: TTSService = Depends(get_tts_service),
+    chat_service: ChatService = Depends(get_chat_service),
+    current_user: UserInDB = Depends(get_current_user_with_auth_service)
+):
+    data = await request.json()
+    text = data.get('text', '')
+    method = request.query_params.get('method', 'gtts')
+    chat_id = data.get('chat_id')
+    index = data.get('index')
+    
+    on_audio_ready = None
+    if chat_id is not None:
+        # Kiểm tra trước khi stream: lỗi sau khi đã gửi audio không còn trả về được cho client
+        if not ObjectId.is_valid(chat_id):
+            raise HTTPException(status_code=400, detail="Invalid chat ID")
+        if not isinstance(index, int) or isinstance(index, bool) or index < 0:
+            raise HTTPException(status_code=400, detail="Invalid index: must be a non-negative integer")
+        async def on_audio_ready(audio_url: str):
+            await chat_service.update_chat_history_audio(chat_id, index, audio_url, current_user.id)
+    
+    return await tts_service.stream_audio(text, method, on_audio_ready)
@@ -7,7 +7,7 @@ from ..security import UserInDB
 from ..services.user_service import UserService
 from ..services.auth_service import AuthService
 from ..logging_config import logger
-from ..dependencies import get_auth_repository, get_storage_client
+from ..dependencies import get_auth_repository, get_storage_client, get_executor_service, get_user_cache
 from ..config.jwt_config import JWTConfig, get_jwt_config
 from .auth import get_admin_user
 
@@ -41,9 +41,11 @@ def get_jwt_config_dep():
 async def get_user_service(
     auth_repository=Depends(get_auth_repository),
     storage_client=Depends(get_storage_client),
-    jwt_config: JWTConfig = Depends(get_jwt_config_dep)
+    jwt_config: JWTConfig = Depends(get_jwt_config_dep),
+    executor_service = Depends(get_executor_service),
+    user_cache = Depends(get_user_cache)
 ):
-    return UserService(auth_repository, storage_client)
+    return UserService(auth_repository, storage_client, executor_service, user_cache)
 
 # Tạo user mới (chỉ dành cho admin)
 @router.post("")
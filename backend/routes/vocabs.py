@@ -77,4 +77,16 @@ async def word_info(
     limit = data.get("limit", 2)
     logger.info(f"Fetching word info for word: {word}, source: {source}")
     return await vocab_service.get_word_info(word, source, limit)
-    
\ No newline at end of file
+
+# Tra nhiều từ trong một request (danh sách từ vựng của chat): body {"words": [...], "source": ..., "limit": ...}
+@router.post("/word-info/batch")
+async def word_info_batch(
+    request: Request,
+    vocab_service: VocabService = Depends(get_vocab_service)
+):
+    data = await request.json()
+    words = data.get("words", [])
+    source = data.get("source", "dictionaryapi").strip().lower()
+    limit = data.get("limit", 2)
+    logger.info(f"Fetching word info for {len(words) if isinstance(words, list) else 0} words, source: {source}")
+    return await vocab_service.get_word_info_batch(words, source, limit)
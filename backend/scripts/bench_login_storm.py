@@ -0,0 +1,109 @@
+# scripts/bench_login_storm.py
+# Đo độ trễ của một endpoint không liên quan (mặc định GET /config/models) khi server đang bị dồn nhiều lượt đăng nhập:
+# bcrypt chạy trên event loop sẽ làm p99 của endpoint này tăng vọt, chạy trong pool "crypto" thì gần như không đổi.
+# Chạy với server đang hoạt động và một tài khoản đã kích hoạt:
+#   python backend/scripts/bench_login_storm.py --email user@example.com --password Secret123
+# Thêm --bcrypt-costs để xem thời gian hash theo từng cost (chọn BCRYPT_ROUNDS phù hợp với máy chủ).
+# Chỉ dùng httpx và thư viện chuẩn, không import code của backend.
+
+import time
+import asyncio
+import argparse
+import statistics
+import httpx
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+def summary(name: str, latencies: list, errors: int):
+    print(
+        f"{name:<28} n={len(latencies):<6} errors={errors:<5} "
+        f"p50={percentile(latencies, 50) * 1000:7.1f}ms p95={percentile(latencies, 95) * 1000:7.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:7.1f}ms max={max(latencies, default=0) * 1000:7.1f}ms"
+    )
+
+async def probe(client: httpx.AsyncClient, url: str, interval: float, stop: asyncio.Event, latencies: list, errors: list):
+    """Gọi endpoint cần đo đều đặn cho tới khi stop được set"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            response = await client.get(url)
+            if response.is_error:
+                errors.append(response.status_code)
+            else:
+                latencies.append(time.perf_counter() - started)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        await asyncio.sleep(interval)
+
+async def login_worker(client: httpx.AsyncClient, url: str, form: dict, stop: asyncio.Event, latencies: list, errors: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            response = await client.post(url, data=form)
+            if response.is_error:
+                errors.append(response.status_code)  # 503: hàng đợi của pool crypto đã đầy
+            else:
+                latencies.append(time.perf_counter() - started)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+
+async def run_phase(client: httpx.AsyncClient, args, storm: bool):
+    stop = asyncio.Event()
+    probe_latencies, probe_errors = [], []
+    login_latencies, login_errors = [], []
+    tasks = [asyncio.create_task(probe(client, args.base_url + args.probe_path, args.probe_interval, stop, probe_latencies, probe_errors))]
+    if storm:
+        form = {"username": args.email, "password": args.password}
+        tasks += [
+            asyncio.create_task(login_worker(client, args.base_url + "/auth/login", form, stop, login_latencies, login_errors))
+            for _ in range(args.concurrency)
+        ]
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    label = "during login storm" if storm else "baseline"
+    summary(f"{args.probe_path} ({label})", probe_latencies, len(probe_errors))
+    if storm:
+        summary("/auth/login", login_latencies, len(login_errors))
+        if login_errors:
+            print(f"  login errors by status: { {e: login_errors.count(e) for e in set(login_errors)} }")
+
+def bench_bcrypt_costs(costs: list, samples: int = 3):
+    import bcrypt
+    for cost in costs:
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            bcrypt.hashpw(b"benchmark-password", bcrypt.gensalt(rounds=cost))
+            timings.append(time.perf_counter() - started)
+        print(f"bcrypt cost {cost:>2}: {statistics.median(timings) * 1000:7.1f}ms per hash")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Latency of an unrelated endpoint during a login storm")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", help="Tài khoản dùng để đăng nhập liên tục")
+    parser.add_argument("--password")
+    parser.add_argument("--concurrency", type=int, default=50, help="Số lượt đăng nhập đồng thời")
+    parser.add_argument("--duration", type=float, default=10, help="Thời gian mỗi giai đoạn (giây)")
+    parser.add_argument("--probe-path", default="/config/models")
+    parser.add_argument("--probe-interval", type=float, default=0.02)
+    parser.add_argument("--bcrypt-costs", type=int, nargs="*", help="Chỉ đo thời gian hash cho các cost này (vd: 10 11 12 13)")
+    args = parser.parse_args()
+
+    if args.bcrypt_costs:
+        bench_bcrypt_costs(args.bcrypt_costs)
+        return
+    if not args.email or not args.password:
+        parser.error("--email and --password are required for the login storm")
+
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        await run_phase(client, args, storm=False)
+        await run_phase(client, args, storm=True)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -21,12 +21,13 @@ from .utils import CACHE_DIR, BASE_DIR
 from .dependencies import DependencyContainer
 from .services.user_service import UserService
 from .services.admin_initializer import initialize_admin
+from .services.chat_history_migrator import split_chat_history
 
 app = FastAPI(redirect_slashes=False) # Không tự động chuyển hướng khi có dấu / ở cuối URL, kiểm soát nghiêm ngặt các route tự đặt
 
 # Khởi tạo MinIO client và cache service
 storage_client = MinioClient()
-cache_service = CacheService(storage_client)
+cache_service = CacheService(storage_client, DependencyContainer.get_executor_service())
 
 # Cấu hình Jinja2
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
@@ -44,18 +45,31 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """Lifespan event handler for FastAPI."""
     # Startup logic
     logger.info("Application started")
-    cache_service.clean_cache()  # Dọn cache khi khởi động
+    await cache_service.start()  # Dọn cache ở background (hoặc cài lifecycle rule), không chặn khởi động
+    
+    # Tạo các index còn thiếu theo INDEX_REGISTRY (idempotent) và báo cáo drift
+    index_manager = await DependencyContainer.get_index_manager()
+    await index_manager.apply()
     
     # Khởi tạo UserService và tạo tài khoản admin mặc định
     global user_service
     auth_repository = await DependencyContainer.get_auth_repository()  # Đảm bảo await trước
-    user_service = UserService(auth_repository, storage_client)
+    user_service = UserService(auth_repository, storage_client, DependencyContainer.get_executor_service())
     await initialize_admin(user_service)
     
+    # Kênh báo hủy bộ đệm user giữa các worker (chỉ chạy khi USER_CACHE_INVALIDATION=1)
+    user_cache = await DependencyContainer.get_user_cache()
+    await user_cache.start()
+    
+    # Tách lịch sử chat nhúng (dữ liệu cũ) sang collection messages
+    chat_repository = await DependencyContainer.get_chat_repository()
+    await split_chat_history(chat_repository)
+    
     yield
     # Shutdown logic
     logger.info("Application shutdown")
     scheduler.shutdown()
+    await DependencyContainer.shutdown()  # Đóng connection pool, thread pool và process pool dùng chung
 
 # Gán lifespan handler cho app
 app.router.lifespan_context = lifespan
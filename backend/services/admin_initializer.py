@@ -14,8 +14,7 @@ async def initialize_admin(user_service):
     
     try:
         # Kiểm tra xem tài khoản admin đã tồn tại chưa
-        existing_user = await user_service.auth_repository.find_user_by_email(admin_email)
-        if existing_user:
+        if await user_service.auth_repository.user_exists(admin_email):
             logger.info(f"Admin account with email {admin_email} already exists")
             return
 
@@ -1,14 +1,25 @@
 # services/ai/ai_client.py
 # Định nghĩa interface AIClient để không phụ thuộc trực tiếp vào implementation cụ thể (OpenAI, Mistral, Gemini, v.v.).
+# Các method đều bất đồng bộ để lời gọi tới provider không chặn event loop.
 # Tuân thủ DIP: Các module cấp cao chỉ phụ thuộc vào abstraction này.
 
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
 
 class AIClient(ABC):
     @abstractmethod
-    def generate_response(self, messages: list) -> str:
+    async def generate_response(self, messages: list) -> str:
         pass
     
     @abstractmethod
-    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+    def stream_response(self, messages: list) -> AsyncIterator[str]:
+        """Trả về từng đoạn text của câu trả lời ngay khi mô hình sinh ra"""
+        pass
+    
+    @abstractmethod
+    async def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        pass
+    
+    @abstractmethod
+    async def summarize(self, prompt: str, max_tokens: int) -> str:
         pass
\ No newline at end of file
@@ -0,0 +1,25 @@
+# services/ai/chat_completion_stream.py
+# Đọc luồng Server-Sent Events của các API tương thích OpenAI chat completions (OpenAI, DeepSeek, OpenRouter).
+# Tuân thủ SRP: Chỉ tách nội dung token từ luồng, không gửi request.
+
+import json
+from contextlib import aclosing
+
+async def iter_stream_deltas(lines):
+    """Duyệt các dòng 'data: {...}' của luồng stream=true, trả về từng đoạn text (delta.content).
+    Bỏ qua dòng trống, comment keep-alive (': OPENROUTER PROCESSING') và dừng ở 'data: [DONE]'."""
+    # aclosing: đóng luồng (trả kết nối về pool) ngay cả khi dừng sớm ở [DONE]
+    async with aclosing(lines):
+        async for line in lines:
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            choices = chunk.get("choices") or []
+            if not choices:
+                continue
+            content = (choices[0].get("delta") or {}).get("content")
+            if content:
+                yield content
@@ -0,0 +1,108 @@
+# services/ai/context_builder.py
+# Xây dựng ngữ cảnh (messages) gửi cho mô hình AI trong giới hạn token:
+# giữ nguyên văn các lượt hội thoại gần nhất, các lượt cũ hơn được gộp vào bản tóm tắt (rolling summary) lưu trên chat.
+# Tuân thủ SRP: Chỉ chọn lọc và định dạng ngữ cảnh, không truy vấn database hay gọi mô hình AI.
+
+import os
+
+SYSTEM_PROMPT = "You are a friendly English conversation partner. Help me practice speaking by replying with short, natural, and complete sentences suitable for daily conversation. After each reply, ask a follow-up question to keep the conversation going. Use clear and simple language appropriate for an intermediate learner."
+
+# Số token phụ trội cho mỗi message (role, dấu phân cách) theo định dạng chat của các model
+MESSAGE_OVERHEAD_TOKENS = 4
+
+def estimate_tokens(text: str) -> int:
+    """Ước lượng số token của một đoạn text (~4 ký tự/token với tiếng Anh).
+    Không phụ thuộc tokenizer của từng model, đủ chính xác để giữ prompt trong ngân sách."""
+    if not text:
+        return 0
+    return len(text) // 4 + 1
+
+def message_tokens(message: dict) -> int:
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+def turn_to_messages(turn: dict) -> list:
+    """Chuyển một lượt hội thoại (document trong collection messages) thành các message user/assistant"""
+    messages = [{"role": "user", "content": turn["user"]}]
+    if turn.get("ai"):
+        messages.append({"role": "assistant", "content": turn["ai"]})
+    return messages
+
+class ContextBuilder:
+    def __init__(
+        self,
+        token_budget: int = None,
+        max_turns: int = None,
+        summary_batch_turns: int = None,
+        summary_max_tokens: int = None
+    ):
+        # Ngân sách token cho prompt (mặc định chừa chỗ cho câu trả lời trong n_ctx=4096 của Mistral)
+        self.token_budget = token_budget or int(os.getenv("CONTEXT_TOKEN_BUDGET", "2048"))
+        # Số lượt gần nhất luôn được giữ nguyên văn (nếu vừa ngân sách)
+        self.max_turns = max_turns or int(os.getenv("CONTEXT_MAX_TURNS", "10"))
+        # Chỉ tóm tắt khi đã dồn đủ số lượt cũ, tránh gọi mô hình tóm tắt sau mỗi lượt
+        self.summary_batch_turns = summary_batch_turns or int(os.getenv("CONTEXT_SUMMARY_BATCH_TURNS", "6"))
+        self.summary_max_tokens = summary_max_tokens or int(os.getenv("CONTEXT_SUMMARY_MAX_TOKENS", "200"))
+
+    @property
+    def fetch_limit(self) -> int:
+        """Số lượt gần nhất cần tải từ database để dựng ngữ cảnh"""
+        return self.max_turns + self.summary_batch_turns
+
+    def build(self, turns: list, transcript: str, summary: dict = None) -> tuple:
+        """Dựng danh sách messages cho mô hình.
+        turns: các lượt gần nhất (seq tăng dần), summary: {"text", "upto_seq"} lưu trên chat.
+        Trả về (messages, first_seq) với first_seq là seq của lượt cũ nhất được giữ nguyên văn."""
+        summary_upto = summary["upto_seq"] if summary else 0
+        system_message = {"role": "system", "content": SYSTEM_PROMPT}
+        if summary and summary.get("text"):
+            system_message["content"] += f"\n\nSummary of the earlier conversation: {summary['text']}"
+        transcript_message = {"role": "user", "content": transcript}
+
+        remaining = self.token_budget - message_tokens(system_message) - message_tokens(transcript_message)
+
+        # Chọn các lượt từ mới đến cũ cho tới khi hết ngân sách; các lượt đã nằm trong bản tóm tắt thì bỏ qua
+        kept = []
+        first_seq = turns[-1]["seq"] + 1 if turns else summary_upto
+        for turn in reversed(turns):
+            if turn["seq"] < summary_upto or len(kept) >= self.fetch_limit:
+                break
+            turn_messages = turn_to_messages(turn)
+            cost = sum(message_tokens(m) for m in turn_messages)
+            if cost > remaining:
+                break
+            remaining -= cost
+            kept.append(turn_messages)
+            first_seq = turn["seq"]
+
+        messages = [system_message]
+        for turn_messages in reversed(kept):
+            messages.extend(turn_messages)
+        messages.append(transcript_message)
+        return messages, first_seq
+
+    def summary_target(self, message_count: int, first_seq: int, summary: dict = None):
+        """Trả về seq (không bao gồm) mà bản tóm tắt cần bao phủ tới, hoặc None nếu chưa cần cập nhật.
+        Cập nhật khi có lượt bị loại khỏi ngữ cảnh vì ngân sách, hoặc khi số lượt cũ chưa tóm tắt đủ một batch.
+        Mỗi lần chỉ gộp tối đa fetch_limit lượt để prompt tóm tắt luôn nhỏ; chat dài (dữ liệu cũ) sẽ được bắt kịp dần qua các lượt sau."""
+        summary_upto = summary["upto_seq"] if summary else 0
+        keep_from = max(summary_upto, message_count - self.max_turns)
+        if first_seq > summary_upto or keep_from - summary_upto >= self.summary_batch_turns:
+            return min(max(keep_from, first_seq), summary_upto + self.fetch_limit)
+        return None
+
+    def build_summary_prompt(self, previous_summary: str, turns: list) -> str:
+        """Prompt yêu cầu mô hình gộp các lượt mới vào bản tóm tắt cũ"""
+        lines = []
+        for turn in turns:
+            lines.append(f"Learner: {turn['user']}")
+            if turn.get("ai"):
+                lines.append(f"Partner: {turn['ai']}")
+        conversation = "\n".join(lines)
+        return (
+            "You maintain a running summary of an English practice conversation between a learner and a conversation partner. "
+            f"Update the summary with the new turns below in at most {self.summary_max_tokens // 2} words. "
+            "Keep the topics discussed, facts the learner shared about themselves and any open questions. "
+            "Reply with the summary only.\n\n"
+            f"Current summary: {previous_summary or '(empty)'}\n\n"
+            f"New turns:\n{conversation}"
+        )
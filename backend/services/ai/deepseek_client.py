@@ -2,21 +2,23 @@
 # Triển khai AIClient cho DeepSeek.
 # Tuân thủ SRP: Chỉ xử lý logic liên quan đến DeepSeek.
 
-import requests
 from fastapi import HTTPException
-from ...utils import DEEPSEEK_API_KEY
+from ...utils import DEEPSEEK_API_KEY, AI_HTTP_TIMEOUT
+from ..http.http_client import HTTPClient
 from .ai_client import AIClient
+from .chat_completion_stream import iter_stream_deltas
 from ...logging_config import logger
 
 class DeepSeekClient(AIClient):
-    def __init__(self):
+    def __init__(self, http_client: HTTPClient):
+        self.http_client = http_client
         self.api_url = "https://api.deepseek.com/chat/completions"
         self.headers = {
             "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
             "Content-Type": "application/json"
         }
         
-    def generate_response(self, messages: list) -> str:
+    async def generate_response(self, messages: list) -> str:
         payload = {
             "model": "deepseek-chat",
             "messages": messages,
@@ -24,18 +26,29 @@ class DeepSeekClient(AIClient):
             "temperature": 0.7
         }
         try:
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
-            if response.status_code != 200:
-                logger.error(f"DeepSeek API error: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=503, detail="DeepSeek API unavailable")
-
-            result = response.json()
+            result = await self.http_client.post(self.api_url, json=payload, headers=self.headers, timeout=AI_HTTP_TIMEOUT)
             return result["choices"][0]["message"]["content"].strip()
         except Exception as e:
             logger.error(f"Error calling DeepSeek API: {str(e)}")
             raise HTTPException(status_code=503, detail=f"Failed to generate response from DeepSeek: {str(e)}")
         
-    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+    async def stream_response(self, messages: list):
+        payload = {
+            "model": "deepseek-chat",
+            "messages": messages,
+            "max_tokens": 30,
+            "temperature": 0.7,
+            "stream": True
+        }
+        try:
+            lines = self.http_client.stream_post(self.api_url, json=payload, headers=self.headers, timeout=AI_HTTP_TIMEOUT)
+            async for content in iter_stream_deltas(lines):
+                yield content
+        except Exception as e:
+            logger.error(f"Error streaming from DeepSeek API: {str(e)}")
+            raise HTTPException(status_code=503, detail=f"Failed to stream response from DeepSeek: {str(e)}")
+        
+    async def translate(self, text: str, source_lang: str, target_lang: str) -> str:
         prompt = f"Translate the following text from {source_lang} to {target_lang}in a concise manner: {text}"
         payload = {
             "model": "deepseek-chat",
@@ -44,13 +57,22 @@ class DeepSeekClient(AIClient):
             "temperature": 0.3  # Giảm temperature để dịch chính xác hơn
         }
         try:
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
-            if response.status_code != 200:
-                logger.error(f"DeepSeek API translation error: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=503, detail="DeepSeek API translation unavailable")
-
-            result = response.json()
+            result = await self.http_client.post(self.api_url, json=payload, headers=self.headers, timeout=AI_HTTP_TIMEOUT)
             return result["choices"][0]["message"]["content"].strip()
         except Exception as e:
             logger.error(f"Error calling DeepSeek API for translation: {str(e)}")
-            raise HTTPException(status_code=503, detail=f"Failed to translate with DeepSeek: {str(e)}")
\ No newline at end of file
+            raise HTTPException(status_code=503, detail=f"Failed to translate with DeepSeek: {str(e)}")
+    
+    async def summarize(self, prompt: str, max_tokens: int) -> str:
+        payload = {
+            "model": "deepseek-chat",
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": 0.3
+        }
+        try:
+            result = await self.http_client.post(self.api_url, json=payload, headers=self.headers, timeout=AI_HTTP_TIMEOUT)
+            return result["choices"][0]["message"]["content"].strip()
+        except Exception as e:
+            logger.error(f"Error calling DeepSeek API for summary: {str(e)}")
+            raise HTTPException(status_code=503, detail=f"Failed to summarize with DeepSeek: {str(e)}")
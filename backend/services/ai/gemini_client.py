@@ -19,33 +19,60 @@ class GeminiClient(AIClient):
             )
         )
         
-    def generate_response(self, messages: list) -> str:
+    def _start_chat(self, messages: list):
+        """Chuyển đổi messages sang định dạng parts mà Gemini yêu cầu và mở chat session.
+        Tin nhắn cuối cùng (transcript) không đưa vào history mà được gửi bằng send_message."""
+        chat_history = []
+        for msg in messages[:-1]:
+            # Khi gặp role là "system", thêm vào chat_history với vai trò "user"
+            if msg["role"] == "system":
+                chat_history.append({"role": "user", "parts": [{"text": msg["content"]}]})
+                chat_history.append({"role": "model", "parts": [{"text": "Understood, I'll follow your instructions."}]})
+            elif msg["role"] == "user":
+                chat_history.append({"role": "user", "parts": [{"text": msg["content"]}]})
+            elif msg["role"] == "assistant":
+                chat_history.append({"role": "model", "parts": [{"text": msg["content"]}]})
+        return self.model.start_chat(history=chat_history)
+        
+    async def generate_response(self, messages: list) -> str:
         try:
-            # Chuyển đổi messages sang định dạng parts mà Gemini yêu cầu
-            chat_history = []
-            for msg in messages:
-                # Khi gặp role là "system", thêm vào chat_history với vai trò "user"
-                if msg["role"] == "system":
-                    chat_history.append({"role": "user", "parts": [{"text": msg["content"]}]})
-                    chat_history.append({"role": "model", "parts": [{"text": "Understood, I'll follow your instructions."}]})
-                elif msg["role"] == "user":
-                    chat_history.append({"role": "user", "parts": [{"text": msg["content"]}]})
-                elif msg["role"] == "assistant":
-                    chat_history.append({"role": "model", "parts": [{"text": msg["content"]}]})
-            
-            chat_session = self.model.start_chat(history=chat_history)
+            chat_session = self._start_chat(messages)
             transcript = messages[-1]["content"]  # Tin nhắn cuối cùng là transcript
-            response = chat_session.send_message(transcript)
+            response = await chat_session.send_message_async(transcript)
             return response.text.strip()
         except genai.types.generation_types.BrokenResponseError as e:
             logger.error(f'Gemini API error: {e}')
             raise HTTPException(status_code=400, detail=f"Gemini API error: {str(e)}")
         
-    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+    async def stream_response(self, messages: list):
+        try:
+            chat_session = self._start_chat(messages)
+            transcript = messages[-1]["content"]
+            response = await chat_session.send_message_async(transcript, stream=True)
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+        except genai.types.generation_types.BrokenResponseError as e:
+            logger.error(f'Gemini API stream error: {e}')
+            raise HTTPException(status_code=400, detail=f"Gemini API error: {str(e)}")
+        
+    async def translate(self, text: str, source_lang: str, target_lang: str) -> str:
         try:
             prompt = f"Translate the following {source_lang} text to {target_lang} in a concise manner: {text}"
-            response = self.model.generate_content(prompt)
+            response = await self.model.generate_content_async(prompt)
             return response.text.strip()
         except genai.types.generation_types.BrokenResponseError as e:
             logger.error(f'Gemini API translation error: {e}')
-            raise HTTPException(status_code=400, detail=f"Gemini API translation error: {str(e)}")
\ No newline at end of file
+            raise HTTPException(status_code=400, detail=f"Gemini API translation error: {str(e)}")
+        
+    async def summarize(self, prompt: str, max_tokens: int) -> str:
+        try:
+            # Ghi đè giới hạn token của model (30 token cho hội thoại) để bản tóm tắt không bị cắt
+            response = await self.model.generate_content_async(
+                prompt,
+                generation_config=genai.types.GenerationConfig(max_output_tokens=max_tokens, temperature=0.3)
+            )
+            return response.text.strip()
+        except genai.types.generation_types.BrokenResponseError as e:
+            logger.error(f'Gemini API summary error: {e}')
+            raise HTTPException(status_code=400, detail=f"Gemini API summary error: {str(e)}")
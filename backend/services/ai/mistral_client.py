@@ -1,8 +1,11 @@
 # services/ai/mistral_client.py
 # Triển khai AIClient cho Mistral.
+# Mô hình chạy cục bộ (CPU), các lời gọi llama.cpp được đẩy sang thread để không chặn event loop.
 # Tuân thủ SRP: Chỉ xử lý logic liên quan đến Mistral.
 
+import asyncio
 from llama_cpp import Llama
+from starlette.concurrency import iterate_in_threadpool
 from .ai_client import AIClient
 
 class MistralClient(AIClient):
@@ -14,21 +17,52 @@ class MistralClient(AIClient):
             chat_format="mistral-instruct", # Chỉ định định dạng chat của Mistral
             verbose=True
         )
+        # Một instance Llama không an toàn khi gọi song song từ nhiều thread, các lời gọi được xếp hàng qua lock
+        self._lock = asyncio.Lock()
         
-    def generate_response(self, messages: list) -> str:
-        response = self.llm.create_chat_completion(
-            messages=messages,
-            max_tokens=30,
-            temperature=0.7
-        )
+    async def generate_response(self, messages: list) -> str:
+        async with self._lock:
+            response = await asyncio.to_thread(
+                self.llm.create_chat_completion,
+                messages=messages,
+                max_tokens=30,
+                temperature=0.7
+            )
         return response["choices"][0]["message"]["content"].strip()
     
-    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+    async def stream_response(self, messages: list):
+        async with self._lock:
+            chunks = self.llm.create_chat_completion(
+                messages=messages,
+                max_tokens=30,
+                temperature=0.7,
+                stream=True
+            )
+            # Generator của llama.cpp sinh token đồng bộ, duyệt trong threadpool
+            async for chunk in iterate_in_threadpool(chunks):
+                content = chunk["choices"][0]["delta"].get("content")
+                if content:
+                    yield content
+    
+    async def translate(self, text: str, source_lang: str, target_lang: str) -> str:
         prompt = f"Translate the following text from {source_lang} to {target_lang}in a concise manner: {text}"
         messages = [{"role": "user", "content": prompt}]
-        response = self.llm.create_chat_completion(
-            messages=messages,
-            max_tokens=100,  # Tăng giới hạn token cho dịch
-            temperature=0.3  # Giảm temperature để dịch chính xác hơn
-        )
-        return response["choices"][0]["message"]["content"].strip()
\ No newline at end of file
+        async with self._lock:
+            response = await asyncio.to_thread(
+                self.llm.create_chat_completion,
+                messages=messages,
+                max_tokens=100,  # Tăng giới hạn token cho dịch
+                temperature=0.3  # Giảm temperature để dịch chính xác hơn
+            )
+        return response["choices"][0]["message"]["content"].strip()
+    
+    async def summarize(self, prompt: str, max_tokens: int) -> str:
+        messages = [{"role": "user", "content": prompt}]
+        async with self._lock:
+            response = await asyncio.to_thread(
+                self.llm.create_chat_completion,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=0.3
+            )
+        return response["choices"][0]["message"]["content"].strip()
@@ -2,37 +2,53 @@
 # Triển khai AIClient cho OpenAI.
 # Tuân thủ SRP: Chỉ xử lý logic liên quan đến OpenAI.
 
-import requests
 from fastapi import HTTPException
-from ...utils import OPENAI_API_KEY
+from ...utils import OPENAI_API_KEY, AI_HTTP_TIMEOUT
+from ..http.http_client import HTTPClient
 from .ai_client import AIClient
+from .chat_completion_stream import iter_stream_deltas
 from ...logging_config import logger
 
 class OpenAIClient(AIClient):
-    def __init__(self):
+    def __init__(self, http_client: HTTPClient):
+        self.http_client = http_client
         self.api_url = "https://api.openai.com/v1/chat/completions"
         self.headers = {
             "Authorization": f"Bearer {OPENAI_API_KEY}",
             "Content-Type": "application/json"
         }
         
-    def generate_response(self, messages: list) -> str:
+    async def generate_response(self, messages: list) -> str:
         payload = {
             "model": "gpt-3.5-turbo",
             "messages": messages,
             "max_tokens": 30,
             "temperature": 0.7
         }
-        
-        response = requests.post(self.api_url, headers=self.headers, json=payload)
-        if response.status_code != 200:
-            logger.error(f"OpenAI API error: {response.status_code} - {response.text}")
+        try:
+            result = await self.http_client.post(self.api_url, json=payload, headers=self.headers, timeout=AI_HTTP_TIMEOUT)
+            return result["choices"][0]["message"]["content"].strip()
+        except Exception as e:
+            logger.error(f"Error calling OpenAI API: {str(e)}")
             raise HTTPException(status_code=503, detail="OpenAI API unavailable")
-
-        result = response.json()
-        return result["choices"][0]["message"]["content"].strip()
     
-    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+    async def stream_response(self, messages: list):
+        payload = {
+            "model": "gpt-3.5-turbo",
+            "messages": messages,
+            "max_tokens": 30,
+            "temperature": 0.7,
+            "stream": True
+        }
+        try:
+            lines = self.http_client.stream_post(self.api_url, json=payload, headers=self.headers, timeout=AI_HTTP_TIMEOUT)
+            async for content in iter_stream_deltas(lines):
+                yield content
+        except Exception as e:
+            logger.error(f"Error streaming from OpenAI API: {str(e)}")
+            raise HTTPException(status_code=503, detail="OpenAI API unavailable")
+    
+    async def translate(self, text: str, source_lang: str, target_lang: str) -> str:
         prompt = f"Translate the following text from {source_lang} to {target_lang}in a concise manner: {text}"
         payload = {
             "model": "gpt-3.5-turbo",
@@ -40,10 +56,23 @@ class OpenAIClient(AIClient):
             "max_tokens": 100,  # Tăng giới hạn token cho dịch
             "temperature": 0.3  # Giảm temperature để dịch chính xác hơn
         }
-        response = requests.post(self.api_url, headers=self.headers, json=payload)
-        if response.status_code != 200:
-            logger.error(f"OpenAI API translation error: {response.status_code} - {response.text}")
+        try:
+            result = await self.http_client.post(self.api_url, json=payload, headers=self.headers, timeout=AI_HTTP_TIMEOUT)
+            return result["choices"][0]["message"]["content"].strip()
+        except Exception as e:
+            logger.error(f"Error calling OpenAI API: {str(e)}")
             raise HTTPException(status_code=503, detail="OpenAI API translation unavailable")
-
-        result = response.json()
-        return result["choices"][0]["message"]["content"].strip()
\ No newline at end of file
+    
+    async def summarize(self, prompt: str, max_tokens: int) -> str:
+        payload = {
+            "model": "gpt-3.5-turbo",
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": 0.3
+        }
+        try:
+            result = await self.http_client.post(self.api_url, json=payload, headers=self.headers, timeout=AI_HTTP_TIMEOUT)
+            return result["choices"][0]["message"]["content"].strip()
+        except Exception as e:
+            logger.error(f"Error calling OpenAI API: {str(e)}")
+            raise HTTPException(status_code=503, detail="OpenAI API summary unavailable")
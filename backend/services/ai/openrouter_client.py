@@ -2,15 +2,17 @@
 # Triển khai AIClient cho OpenRouter.
 # Tuân thủ SRP: Chỉ xử lý logic liên quan đến OpenRouter.
 
-import requests
 import os
 from fastapi import HTTPException
-from ...utils import OPENROUTER_API_KEY
+from ...utils import OPENROUTER_API_KEY, AI_HTTP_TIMEOUT
+from ..http.http_client import HTTPClient
 from .ai_client import AIClient
+from .chat_completion_stream import iter_stream_deltas
 from ...logging_config import logger
 
 class OpenRouterClient(AIClient):
-    def __init__(self):
+    def __init__(self, http_client: HTTPClient):
+        self.http_client = http_client
         self.api_url = "https://openrouter.ai/api/v1/chat/completions"
         # Lấy APP_URL từ biến môi trường, mặc định là localhost nếu không có
         app_url = os.getenv("APP_URL", "http://localhost:8000")
@@ -22,7 +24,7 @@ class OpenRouterClient(AIClient):
         }
         self.modelAI = "deepseek/deepseek-chat:free" #lấy các model free tại https://openrouter.ai/models
         
-    def generate_response(self, messages: list) -> str:
+    async def generate_response(self, messages: list) -> str:
         payload = {
             "model": self.modelAI, 
             "messages": messages,
@@ -30,18 +32,29 @@ class OpenRouterClient(AIClient):
             "temperature": 0.7
         }
         try:
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
-            if response.status_code != 200:
-                logger.error(f"OpenRouter API error: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=503, detail="OpenRouter API unavailable")
-
-            result = response.json()
+            result = await self.http_client.post(self.api_url, json=payload, headers=self.headers, timeout=AI_HTTP_TIMEOUT)
             return result["choices"][0]["message"]["content"].strip()
         except Exception as e:
             logger.error(f"Error calling OpenRouter API: {str(e)}")
             raise HTTPException(status_code=503, detail=f"Failed to generate response from OpenRouter: {str(e)}")
         
-    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+    async def stream_response(self, messages: list):
+        payload = {
+            "model": self.modelAI,
+            "messages": messages,
+            "max_tokens": 30,
+            "temperature": 0.7,
+            "stream": True
+        }
+        try:
+            lines = self.http_client.stream_post(self.api_url, json=payload, headers=self.headers, timeout=AI_HTTP_TIMEOUT)
+            async for content in iter_stream_deltas(lines):
+                yield content
+        except Exception as e:
+            logger.error(f"Error streaming from OpenRouter API: {str(e)}")
+            raise HTTPException(status_code=503, detail=f"Failed to stream response from OpenRouter: {str(e)}")
+        
+    async def translate(self, text: str, source_lang: str, target_lang: str) -> str:
         prompt = f"Translate the following text from {source_lang} to {target_lang}in a concise manner: {text}"
         payload = {
             "model": self.modelAI,
@@ -50,13 +63,22 @@ class OpenRouterClient(AIClient):
             "temperature": 0.3  # Giảm temperature để dịch chính xác hơn
         }
         try:
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
-            if response.status_code != 200:
-                logger.error(f"OpenRouter API translation error: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=503, detail="OpenRouter API translation unavailable")
-
-            result = response.json()
+            result = await self.http_client.post(self.api_url, json=payload, headers=self.headers, timeout=AI_HTTP_TIMEOUT)
             return result["choices"][0]["message"]["content"].strip()
         except Exception as e:
             logger.error(f"Error calling OpenRouter API for translation: {str(e)}")
-            raise HTTPException(status_code=503, detail=f"Failed to translate with OpenRouter: {str(e)}")
\ No newline at end of file
+            raise HTTPException(status_code=503, detail=f"Failed to translate with OpenRouter: {str(e)}")
+    
+    async def summarize(self, prompt: str, max_tokens: int) -> str:
+        payload = {
+            "model": self.modelAI,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": 0.3
+        }
+        try:
+            result = await self.http_client.post(self.api_url, json=payload, headers=self.headers, timeout=AI_HTTP_TIMEOUT)
+            return result["choices"][0]["message"]["content"].strip()
+        except Exception as e:
+            logger.error(f"Error calling OpenRouter API for summary: {str(e)}")
+            raise HTTPException(status_code=503, detail=f"Failed to summarize with OpenRouter: {str(e)}")
@@ -2,11 +2,22 @@
 # Xử lý logic nghiệp vụ liên quan đến AI: xử lý lịch sử chat, gọi mô hình AI.
 # Tuân thủ SRP: Chỉ xử lý logic nghiệp vụ, không xử lý API.
 
+import asyncio
+import json
+from datetime import datetime, timezone
 from fastapi import HTTPException
 from ..repositories.chat_repository import ChatRepository
 from .ai.ai_client import AIClient
+from .ai.context_builder import ContextBuilder
+from .tts_prefetch_service import TTSPrefetchService
+from .single_flight import SingleFlight
+from .translation.translation_cache import TranslationCache
 from ..logging_config import logger
 
+# Các tác vụ cập nhật tóm tắt đang chạy theo chat_id (giữ tham chiếu để task không bị thu gom
+# và tránh tóm tắt trùng lặp một chat; AIService được tạo mới mỗi request nên đặt ở cấp module)
+_summary_tasks = {}
+
 class AIService:
     def __init__(
         self, 
@@ -15,7 +26,11 @@ class AIService:
         deepseek_client: AIClient, # yêu cầu nạp tiền
         openrouter_client: AIClient,
         mistral_client: AIClient, # đã chạy ok, nhưng phải tắt khi deploy vì khá nặng
-        gemini_client: AIClient
+        gemini_client: AIClient,
+        context_builder: ContextBuilder = None,
+        tts_prefetch: TTSPrefetchService = None,
+        single_flight: SingleFlight = None,
+        translation_cache: TranslationCache = None
     ):
         self.chat_repository = chat_repository
         self.clients = {}
@@ -30,8 +45,13 @@ class AIService:
             self.clients["mistral"] = mistral_client
         if gemini_client:
             self.clients["gemini"] = gemini_client
+        self.context_builder = context_builder or ContextBuilder()
+        self.tts_prefetch = tts_prefetch
+        self.single_flight = single_flight or SingleFlight()
+        self.translation_cache = translation_cache
         
-    async def generate_response(self, transcript: str, chat_id: str, user_id: str, method: str) -> dict:
+    async def _prepare_messages(self, transcript: str, chat_id: str, user_id: str, method: str) -> list:
+        """Kiểm tra đầu vào, quyền sở hữu chat và dựng danh sách messages gửi cho mô hình"""
         if not transcript:
             raise HTTPException(status_code=400, detail="No transcript provided")
         if not chat_id:
@@ -39,41 +59,123 @@ class AIService:
         if method not in self.clients:
             raise HTTPException(status_code=400, detail=f"Client {method} is disabled or unsupported")
         
-        # Lấy lịch sử chat
-        chat = await self.chat_repository.find_chat_by_id_and_user(chat_id, user_id)
+        # Kiểm tra quyền sở hữu chat, chỉ lấy các trường cần để dựng ngữ cảnh
+        chat = await self.chat_repository.find_chat_by_id_and_user(
+            chat_id, user_id, {"message_count": 1, "context_summary": 1}
+        )
         if not chat:
             raise HTTPException(status_code=404, detail="Chat not found or not owned by user")
         
-        # Chuẩn bị messages
-        history = chat.get('history', [])
-        messages = [
-            {"role": "system", "content": "You are a friendly English conversation partner. Help me practice speaking by replying with short, natural, and complete sentences suitable for daily conversation. After each reply, ask a follow-up question to keep the conversation going. Use clear and simple language appropriate for an intermediate learner."}
-        ]
-        for msg in history:
-            messages.append({"role": "user", "content": msg["user"]})
-            if msg.get("ai"):
-                messages.append({"role": "assistant", "content": msg["ai"]})
-        messages.append({"role": "user", "content": transcript})
+        # Chỉ tải các lượt gần nhất, các lượt cũ hơn đã được gộp vào context_summary
+        summary = chat.get("context_summary")
+        turns = await self.chat_repository.find_messages(chat_id, limit=self.context_builder.fetch_limit)
+        messages, first_seq = self.context_builder.build(turns, transcript, summary)
         logger.info(f'{method.capitalize()} messages: {messages}')
         
+        # Cập nhật bản tóm tắt ở background nếu có lượt cũ chưa được tóm tắt
+        message_count = chat.get("message_count", len(turns))
+        summary_target = self.context_builder.summary_target(message_count, first_seq, summary)
+        if summary_target is not None:
+            self._schedule_summary_update(chat_id, user_id, method, summary, summary_target)
+        return messages
+        
+    def _prefetch_audio(self, text: str, tts_method: str = None):
+        """Tổng hợp trước audio của câu trả lời để /tts (hoặc lúc lưu lịch sử) lấy ngay từ bộ đệm.
+        Chỉ làm ấm bộ đệm, không ghi URL vào chat: tts_method có thể không được gửi (dùng TTS_PREFETCH_METHOD)"""
+        if self.tts_prefetch:
+            self.tts_prefetch.enqueue(text, tts_method)
+        
+    async def generate_response(self, transcript: str, chat_id: str, user_id: str, method: str, tts_method: str = None) -> dict:
+        messages = await self._prepare_messages(transcript, chat_id, user_id, method)
+        
         # Gọi mô hình AI tương ứng
-        generated_text = self.clients[method].generate_response(messages)
+        generated_text = await self.clients[method].generate_response(messages)
         if not generated_text:
             generated_text = "I don't know what to say!"
         logger.info(f'{method.capitalize()} response: {generated_text}')
+        self._prefetch_audio(generated_text, tts_method)
         return {'response': generated_text}
     
+    async def stream_response(self, transcript: str, chat_id: str, user_id: str, method: str, tts_method: str = None):
+        """Trả về async generator các sự kiện SSE cho câu trả lời dạng stream.
+        Kiểm tra đầu vào được thực hiện trước khi trả về để lỗi vẫn là HTTP status thông thường."""
+        messages = await self._prepare_messages(transcript, chat_id, user_id, method)
+        return self._stream_events(method, messages, tts_method)
+    
+    async def _stream_events(self, method: str, messages: list, tts_method: str = None):
+        """Sự kiện 'data: {"token": ...}' cho từng đoạn text, kết thúc bằng 'event: done' kèm câu trả lời đầy đủ
+        (hoặc 'event: error' nếu mô hình lỗi giữa chừng, khi đó HTTP status đã được gửi đi)."""
+        parts = []
+        try:
+            async for token in self.clients[method].stream_response(messages):
+                parts.append(token)
+                yield f"data: {json.dumps({'token': token})}\n\n"
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error(f'{method.capitalize()} stream error: {detail}')
+            yield f"event: error\ndata: {json.dumps({'detail': detail})}\n\n"
+            return
+        
+        generated_text = "".join(parts).strip() or "I don't know what to say!"
+        logger.info(f'{method.capitalize()} streamed response: {generated_text}')
+        self._prefetch_audio(generated_text, tts_method)
+        yield f"event: done\ndata: {json.dumps({'response': generated_text})}\n\n"
+    
+    def _schedule_summary_update(self, chat_id: str, user_id: str, method: str, summary: dict, target_seq: int):
+        """Chạy cập nhật tóm tắt ở background, không làm chậm câu trả lời hiện tại"""
+        if chat_id in _summary_tasks:
+            return
+        task = asyncio.create_task(self._update_context_summary(chat_id, user_id, method, summary, target_seq))
+        _summary_tasks[chat_id] = task
+        task.add_done_callback(lambda _: _summary_tasks.pop(chat_id, None))
+    
+    async def _update_context_summary(self, chat_id: str, user_id: str, method: str, summary: dict, target_seq: int):
+        """Gộp các lượt [upto_seq, target_seq) vào bản tóm tắt và lưu lên chat"""
+        previous_upto = summary["upto_seq"] if summary else 0
+        previous_text = summary.get("text", "") if summary else ""
+        try:
+            turns = await self.chat_repository.find_messages(chat_id, before=target_seq, limit=target_seq - previous_upto)
+            if not turns:
+                return
+            prompt = self.context_builder.build_summary_prompt(previous_text, turns)
+            text = await self.clients[method].summarize(prompt, self.context_builder.summary_max_tokens)
+            if not text:
+                return
+            result = await self.chat_repository.update_context_summary(chat_id, user_id, previous_upto, {
+                "text": text,
+                "upto_seq": target_seq,
+                "updatedAt": datetime.now(timezone.utc),
+            })
+            if result.modified_count:
+                logger.info(f"Updated context summary for chat {chat_id} up to seq {target_seq}")
+        except Exception as e:
+            # Tóm tắt thất bại chỉ khiến ngữ cảnh ngắn hơn, không ảnh hưởng câu trả lời
+            logger.error(f"Failed to update context summary for chat {chat_id}: {str(e)}")
+    
     async def translate(self, text: str, source_lang: str, target_lang: str, method: str) -> dict:
         if not text:
             raise HTTPException(status_code=400, detail="No text provided")
         if method not in self.clients:
             raise HTTPException(status_code=400, detail=f"Client {method} is disabled or unsupported")
         
-        # Gọi phương thức translate của client
-        logger.info(f'{method.capitalize()} translating: {text} from {source_lang} to {target_lang}')
-        translated_text = self.clients[method].translate(text, source_lang, target_lang)
+        translated_text = None
+        if self.translation_cache:
+            # Engine là tên mô hình: mỗi mô hình dịch khác nhau nên lưu riêng
+            translated_text = await self.translation_cache.get(text, source_lang, target_lang, method)
+        if translated_text is None:
+            # Nhiều người cùng dịch một câu (vd: cùng bài hội thoại) cùng lúc: chỉ gọi mô hình một lần
+            key = TranslationCache.make_key(text, source_lang, target_lang, method)
+            translated_text = await self.single_flight.do("ai_translate", key, self._translate_uncached, text, source_lang, target_lang, method)
         if not translated_text:
             translated_text = "Translation failed!"
         
         logger.info(f'{method.capitalize()} translated response: {translated_text}')
-        return {'translated_text': translated_text}
\ No newline at end of file
+        return {'translated_text': translated_text}
+
+    async def _translate_uncached(self, text: str, source_lang: str, target_lang: str, method: str) -> str:
+        # Gọi phương thức translate của client
+        logger.info(f'{method.capitalize()} translating: {text} from {source_lang} to {target_lang}')
+        translated_text = await self.clients[method].translate(text, source_lang, target_lang)
+        if translated_text and self.translation_cache:
+            await self.translation_cache.put(text, source_lang, target_lang, method, translated_text)
+        return translated_text
\ No newline at end of file
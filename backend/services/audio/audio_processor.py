@@ -1,16 +1,39 @@
 # services/audio/audio_processor.py
 # Định nghĩa interface AudioProcessor để không phụ thuộc trực tiếp vào implementation cụ thể (ffmpeg, v.v.).
-# Thêm phương thức convert_to_mp3 để tái sử dụng từ stt.py.
+# Các phương thức làm việc trực tiếp trên bytes trong bộ nhớ, không cần file tạm.
 
+import io
+import wave
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Đóng gói PCM 16-bit mono thành WAV (chỉ thêm header, không chuyển đổi)"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+    return buffer.getvalue()
 
 class AudioProcessor(ABC):
     @abstractmethod
-    def convert_to_wav(self, input_path: str, output_path: str):
-        """Convert audio file to WAV format."""
+    def decode_to_pcm(self, data: bytes, sample_rate: int = 16000) -> bytes:
+        """Giải mã audio (WebM, WAV, MP3, ...) trong bộ nhớ thành PCM 16-bit mono."""
+        pass
+    
+    @abstractmethod
+    def encode_mp3(self, data: bytes) -> bytes:
+        """Mã hóa audio (WAV, ...) trong bộ nhớ thành MP3."""
         pass
     
     @abstractmethod
-    def convert_to_mp3(self, input_path: str, output_path: str):
-        """Convert audio file to MP3 format."""
-        pass
\ No newline at end of file
+    def stream_to_pcm(self, chunks: AsyncIterator[bytes], sample_rate: int = 16000) -> AsyncIterator[bytes]:
+        """Giải mã luồng audio đã nén (WebM/Opus, ...) thành PCM 16-bit mono ngay khi nhận được từng đoạn."""
+        pass
+    
+    @abstractmethod
+    def stream_encode_mp3(self, chunks: AsyncIterator[bytes], sample_rate: int) -> AsyncIterator[bytes]:
+        """Mã hóa luồng PCM 16-bit mono thành MP3, trả về từng đoạn MP3 ngay khi mã hóa xong."""
+        pass
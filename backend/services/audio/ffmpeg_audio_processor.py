@@ -2,28 +2,99 @@
 # Triển khai AudioProcessor bằng ffmpeg.
 # Tuân thủ SRP: Chỉ xử lý logic liên quan đến ffmpeg.
 
+import asyncio
 import ffmpeg
+from contextlib import aclosing
 from fastapi import HTTPException
 from .audio_processor import AudioProcessor
 from ...logging_config import logger
 
 class FFmpegAudioProcessor(AudioProcessor):
-    def convert_to_wav(self, input_path: str, output_path: str):
+    def decode_to_pcm(self, data: bytes, sample_rate: int = 16000) -> bytes:
+        # Đọc từ stdin, ghi PCM ra stdout của ffmpeg: không có file tạm
         try:
-            stream = ffmpeg.input(input_path)
-            stream = ffmpeg.output(stream, output_path, ar=16000, ac=1, format='wav')
-            ffmpeg.run(stream, quiet=True)
-            logger.info("Converted to WAV")
+            pcm, _ = (
+                ffmpeg.input('pipe:0')
+                .output('pipe:1', format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate)
+                .run(input=data, capture_stdout=True, capture_stderr=True)
+            )
+            logger.info(f"Decoded {len(data)} bytes to {len(pcm)} bytes of PCM")
+            return pcm
         except ffmpeg.Error as e:
             logger.error(f"FFmpeg error: {e.stderr.decode()}")
             raise HTTPException(status_code=500, detail="Failed to convert audio")
     
-    def convert_to_mp3(self, input_path: str, output_path: str):
+    def encode_mp3(self, data: bytes) -> bytes:
         try:
-            stream = ffmpeg.input(input_path)
-            stream = ffmpeg.output(stream, output_path, acodec='mp3')
-            ffmpeg.run(stream, quiet=True)
-            logger.info(f"Converted to MP3: {output_path}")
+            mp3, _ = (
+                ffmpeg.input('pipe:0')
+                .output('pipe:1', format='mp3', acodec='mp3')
+                .run(input=data, capture_stdout=True, capture_stderr=True)
+            )
+            logger.info(f"Encoded {len(data)} bytes to {len(mp3)} bytes of MP3")
+            return mp3
         except ffmpeg.Error as e:
             logger.error(f"FFmpeg error: {e.stderr.decode()}")
-            raise HTTPException(status_code=500, detail="Failed to convert audio to MP3")
\ No newline at end of file
+            raise HTTPException(status_code=500, detail="Failed to convert audio to MP3")
+    
+    async def stream_to_pcm(self, chunks, sample_rate: int = 16000):
+        args = (
+            ffmpeg.input('pipe:0')
+            .output('pipe:1', format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate)
+            .global_args('-loglevel', 'error')
+            .compile()
+        )
+        # aclosing: dừng sớm (client ngắt kết nối) thì kill ffmpeg ngay, không chờ GC
+        async with aclosing(self._stream_pipe(args, chunks, "Failed to decode audio stream")) as stream:
+            async for pcm in stream:
+                yield pcm
+    
+    async def stream_encode_mp3(self, chunks, sample_rate: int):
+        args = (
+            ffmpeg.input('pipe:0', format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate)
+            # flush_packets: ghi từng frame MP3 ra stdout ngay khi mã hóa xong, không gom theo buffer của muxer
+            .output('pipe:1', format='mp3', acodec='mp3', flush_packets=1)
+            .global_args('-loglevel', 'error')
+            .compile()
+        )
+        # aclosing: dừng sớm (client ngắt kết nối) thì kill ffmpeg ngay, không chờ GC
+        async with aclosing(self._stream_pipe(args, chunks, "Failed to encode audio stream")) as stream:
+            async for mp3 in stream:
+                yield mp3
+    
+    async def _stream_pipe(self, args: list, chunks, error_detail: str):
+        # Một tiến trình ffmpeg đọc từ stdin và ghi kết quả ra stdout; ghi và đọc chạy song song
+        # để ffmpeg trả dữ liệu ngay khi đủ, không chờ hết luồng
+        process = await asyncio.create_subprocess_exec(
+            *args, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        
+        async def feed():
+            try:
+                async for chunk in chunks:
+                    process.stdin.write(chunk)
+                    await process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                process.stdin.close()
+        
+        feeder = asyncio.create_task(feed())
+        try:
+            while True:
+                data = await process.stdout.read(8192)
+                if not data:
+                    break
+                yield data
+            await feeder
+            stderr = await process.stderr.read()
+            if await process.wait() != 0:
+                logger.error(f"FFmpeg stream error: {stderr.decode(errors='ignore')}")
+                raise HTTPException(status_code=500, detail=error_detail)
+        finally:
+            # Chờ feeder dừng hẳn: chunks (vd: iterator Piper) được đóng đúng cách và lỗi của nó không bị bỏ rơi
+            feeder.cancel()
+            await asyncio.gather(feeder, return_exceptions=True)
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
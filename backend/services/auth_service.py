@@ -12,15 +12,32 @@ import io
 import re
 from jose import JWTError, jwt
 from mailjet_rest import Client
-from ..config.jwt_config import verify_password, get_password_hash
+from ..config.jwt_config import verify_password, verify_and_update_password, get_password_hash, BCRYPT_ROUNDS
+from .executor_service import ExecutorService
+from .user_cache import UserCache
 from ..logging_config import logger
 from ..security import oauth2_scheme, UserInDB
+
+# Các trường cần để dựng UserInDB (không tải token xác nhận/đặt lại mật khẩu)
+CURRENT_USER_PROJECTION = {
+    "email": 1,
+    "hashed_password": 1,
+    "avatarPath": 1,
+    "displayName": 1,
+    "phoneNumber": 1,
+    "gender": 1,
+    "location": 1,
+    "isAdmin": 1,
+    "status": 1,
+}
         
 class AuthService:
-    def __init__(self, auth_repository, storage_client, jwt_config):
+    def __init__(self, auth_repository, storage_client, jwt_config, executor_service: ExecutorService, user_cache: UserCache = None):
         self.auth_repository = auth_repository
         self.storage_client = storage_client
         self.jwt_config = jwt_config
+        self.executor = executor_service
+        self.user_cache = user_cache
         self.avatar_bucket = os.getenv("AVATARS_BUCKET")
         self.minio_endpoint = os.getenv("MINIO_ENDPOINT")
         # Khởi tạo Mailjet client
@@ -39,11 +56,16 @@ class AuthService:
                 detail="Invalid token",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        user = await self.auth_repository.find_user_by_email(email)
+        # Tra bộ đệm trước, chỉ đọc MongoDB khi chưa có hoặc đã hết hạn
+        user = self.user_cache.get(email) if self.user_cache else None
         if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
+            user = await self.auth_repository.find_user_by_email(email, CURRENT_USER_PROJECTION)
+            if user is None:
+                raise HTTPException(status_code=401, detail="User not found")
+            if self.user_cache:
+                self.user_cache.set(email, user)
         
-        # Tạo instance UserInDB
+        # Tạo instance UserInDB (mới cho mỗi request, document trong bộ đệm không bị sửa)
         user_in_db = UserInDB(
             email=user["email"], 
             hashed_password=user["hashed_password"], 
@@ -74,10 +96,14 @@ class AuthService:
         
         return user_in_db
     
+    async def _invalidate_user(self, email: str):
+        """Gọi sau mọi thay đổi các trường của UserInDB"""
+        if self.user_cache:
+            await self.user_cache.invalidate(email)
+    
     async def register(self, user_data: dict):
         """Đăng ký user mới"""
-        existing_user = await self.auth_repository.find_user_by_email(user_data["email"])
-        if existing_user:
+        if await self.auth_repository.user_exists(user_data["email"]):
             raise HTTPException(status_code=400, detail="Email already registered")
         
         # Kiểm tra mật khẩu nghiêm ngặt
@@ -92,7 +118,7 @@ class AuthService:
         confirmation_token = str(uuid.uuid4())
         token_expiry = datetime.utcnow() + timedelta(minutes=30)
         
-        hashed_password = get_password_hash(user_data["password"])
+        hashed_password = await self.executor.run("crypto", get_password_hash, user_data["password"])
         user_dict = {
             "email": user_data["email"],
             "hashed_password": hashed_password,
@@ -121,8 +147,20 @@ class AuthService:
     async def login(self, form_data: OAuth2PasswordRequestForm):
         """Đăng nhập và tạo access token"""
         user = await self.auth_repository.find_user_by_email(form_data.username)
-        if not user or not verify_password(form_data.password, user["hashed_password"]):
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        valid, new_hashed_password = await self.executor.run("crypto", verify_and_update_password, form_data.password, user["hashed_password"])
+        if not valid:
             raise HTTPException(status_code=401, detail="Invalid credentials")
+        if new_hashed_password:
+            # Hash cũ có cost khác BCRYPT_ROUNDS: lưu hash mới theo chính sách hiện tại (chỉ làm được khi biết mật khẩu gốc).
+            # Lỗi ở bước này không chặn đăng nhập, lần sau sẽ thử lại
+            try:
+                await self.auth_repository.update_user(user["email"], {"hashed_password": new_hashed_password})
+                await self._invalidate_user(user["email"])
+                logger.info(f"Rehashed password for {user['email']} with bcrypt cost {BCRYPT_ROUNDS}")
+            except Exception as e:
+                logger.error(f"Failed to rehash password for {user['email']}: {e}")
 
         # Kiểm tra trạng thái tài khoản
         if user.get("status") != "active":
@@ -137,7 +175,7 @@ class AuthService:
     
     async def get_user_info(self, current_user: UserInDB):
         """Lấy thông tin user hiện tại"""
-        user = await self.auth_repository.find_user_by_email(current_user.email)
+        user = await self.auth_repository.find_user_by_email(current_user.email, {"createdAt": 1, "methods": 1})
         return {
             "email": current_user.email,
             "avatarPath": current_user.avatarPath,
@@ -180,7 +218,9 @@ class AuthService:
                 # Chuyển content thành file-like object
                 file_like = io.BytesIO(content)
                 # Upload file lên MinIO
-                self.storage_client.put_object(
+                await self.executor.run(
+                    "io-storage",
+                    self.storage_client.put_object,
                     bucket_name=self.avatar_bucket,
                     object_name=file_name,
                     data=file_like,
@@ -190,7 +230,7 @@ class AuthService:
                 # Tạo URL cho avatar
                 # avatar_url = f"{self.minio_endpoint}/{self.avatar_bucket}/{file_name}"
                 # Sử dụng presigned_get_object để tạo URL
-                avatar_url = self.storage_client.presigned_get_object(self.avatar_bucket, file_name)
+                avatar_url = await self.executor.run("io-storage", self.storage_client.presigned_get_object, self.avatar_bucket, file_name)
                 update_data["avatarPath"] = avatar_url
             except Exception as e:
                 logger.error(f"Error uploading to MinIO: {e}")
@@ -203,7 +243,7 @@ class AuthService:
                 try:
                     # Trích xuất tên file từ URL
                     old_file_name = old_avatar_path.split("/")[-1]
-                    self.storage_client.remove_object(self.avatar_bucket, old_file_name)
+                    await self.executor.run("io-storage", self.storage_client.remove_object, self.avatar_bucket, old_file_name)
                     logger.info(f"Deleted old avatar: {old_file_name}")
                 except Exception as e:
                     logger.error(f"Error deleting old avatar: {e}")
@@ -212,10 +252,13 @@ class AuthService:
         # Cập nhật thông tin user trong MongoDB
         # Loại bỏ các trường None khỏi update_data
         update_data = {k: v for k, v in update_data.items() if v is not None}
-        await self.auth_repository.update_user(current_user.email, update_data)
-
-        # Lấy thông tin user đã cập nhật
-        updated_user = await self.auth_repository.find_user_by_email(current_user.email)
+        # Cập nhật và lấy lại thông tin user đã cập nhật trong cùng một lần gọi
+        updated_user = await self.auth_repository.update_user_and_return(
+            current_user.email,
+            update_data,
+            {"hashed_password": 0, "confirmation_token": 0, "reset_token": 0}
+        )
+        await self._invalidate_user(current_user.email)
         return {
             "email": updated_user["email"],
             "displayName": updated_user["displayName"],
@@ -231,7 +274,7 @@ class AuthService:
     async def change_password(self, old_password: str, new_password: str, current_user: UserInDB):
         """Đổi mật khẩu"""
         # Kiểm tra mật khẩu cũ
-        if not verify_password(old_password, current_user.hashed_password):
+        if not await self.executor.run("crypto", verify_password, old_password, current_user.hashed_password):
             raise HTTPException(status_code=400, detail="Old password is incorrect")
         
         # Kiểm tra mật khẩu mới
@@ -243,13 +286,14 @@ class AuthService:
             )
         
         # Hash mật khẩu mới
-        new_hashed_password = get_password_hash(new_password)
+        new_hashed_password = await self.executor.run("crypto", get_password_hash, new_password)
         
         # Cập nhật mật khẩu trong database
         await self.auth_repository.update_user(
             current_user.email,
             {"hashed_password": new_hashed_password}
         )
+        await self._invalidate_user(current_user.email)
         
         return {"message": "Password updated successfully"}
     
@@ -277,6 +321,7 @@ class AuthService:
             "confirmation_token": None, # Xóa token sau khi xác nhận
             "confirmation_token_expiry": None # Xóa thời gian hết hạn token
         })
+        await self._invalidate_user(email)
         
         return {"message": "Account activated successfully"}
     
@@ -311,7 +356,7 @@ class AuthService:
             ]
         }
         try:
-            result = self.mailjet_client.send.create(data=data)
+            result = await self.executor.run("io-provider", self.mailjet_client.send.create, data=data)
             if result.status_code != 200:
                 logger.error(f"Failed to send confirmation email: {result.status_code} - {result.json()}")
                 raise HTTPException(status_code=500, detail="Failed to send confirmation email")
@@ -372,7 +417,7 @@ class AuthService:
             ]
         }
         try:
-            result = self.mailjet_client.send.create(data=data)
+            result = await self.executor.run("io-provider", self.mailjet_client.send.create, data=data)
             if result.status_code != 200:
                 logger.error(f"Failed to send reset password email: {result.status_code} - {result.json()}")
                 raise HTTPException(status_code=500, detail="Failed to send reset password email")
@@ -405,7 +450,7 @@ class AuthService:
             )
         
         # Hash mật khẩu mới
-        new_hashed_password = get_password_hash(new_password)
+        new_hashed_password = await self.executor.run("crypto", get_password_hash, new_password)
         
         # Cập nhật mật khẩu và xóa token trong DB
         await self.auth_repository.update_user(email, {
@@ -413,18 +458,18 @@ class AuthService:
             "reset_token": None,
             "reset_token_expiry": None,
         })
+        await self._invalidate_user(email)
         
         return {"message": "Password reset successfully"}
     
     async def update_user_methods(self, methods: dict, current_user: UserInDB):
         """Cập nhật các method được chọn của người dùng"""
-        # Lấy thông tin người dùng hiện tại
-        user = await self.auth_repository.find_user_by_email(current_user.email)
-        if not user:
+        # Hợp nhất ngay trong câu update (ghi đè từng key methods.<name>), ưu tiên method mới,
+        # không cần đọc methods hiện tại trước
+        update_data = {f"methods.{name}": value for name, value in methods.items()}
+        if not update_data:
+            return
+        updated_user = await self.auth_repository.update_user_and_return(current_user.email, update_data, {"methods": 1})
+        if not updated_user:
             raise HTTPException(status_code=404, detail="User not found")
-        
-        # Cập nhật các method
-        current_methods = user.get("methods", {})
-        updated_methods = {**current_methods, **methods}  # Hợp nhất, ưu tiên method mới
-        await self.auth_repository.update_user(current_user.email, {"methods": updated_methods})
-        logger.info(f"Updated methods for {current_user.email}: {updated_methods}")
\ No newline at end of file
+        logger.info(f"Updated methods for {current_user.email}: {updated_user.get('methods', {})}")
\ No newline at end of file
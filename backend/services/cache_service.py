@@ -1,29 +1,63 @@
 # services/cache_service.py
 # Xử lý logic dọn cache cho MinIO bucket.
+# Hai chế độ: tự quét và xóa theo lô (mặc định), hoặc cài lifecycle rule để MinIO tự xóa object hết hạn (AUDIO_CACHE_LIFECYCLE=1).
 # Tuân thủ SRP: Chỉ xử lý logic dọn cache.
 
-import time
+import asyncio
 import os
+from datetime import datetime, timedelta, timezone
+from .executor_service import ExecutorService
+from ..utils import AUDIO_CACHE_MAX_AGE_DAYS
 from ..logging_config import logger
 
+DELETE_BATCH_SIZE = 1000 # Giới hạn số object trong một request DeleteObjects của S3/MinIO
+
 class CacheService:
-    def __init__(self, storage_client):
+    def __init__(self, storage_client, executor_service: ExecutorService):
         self.storage_client = storage_client
+        self.executor = executor_service
         self.audio_bucket = os.getenv("AUDIO_BUCKET")
+        self.max_age_days = AUDIO_CACHE_MAX_AGE_DAYS
+        self.use_lifecycle = os.getenv("AUDIO_CACHE_LIFECYCLE", "0") in ("1", "true")
+        self._startup_task = None
+        
+    async def start(self):
+        """Gọi khi app khởi động: cài lifecycle rule, hoặc chạy một lượt dọn ở background (không chặn quá trình khởi động)"""
+        if self.use_lifecycle:
+            try:
+                await self.executor.run("io-storage", self.storage_client.set_bucket_expiration, self.audio_bucket, self.max_age_days)
+            except Exception as e:
+                # Không cài được thì quay về tự quét để cache vẫn được dọn
+                logger.error(f"Failed to set lifecycle rule on {self.audio_bucket}, falling back to sweeping: {e}")
+                self.use_lifecycle = False
+        if not self.use_lifecycle:
+            self._startup_task = asyncio.create_task(self.executor.run("io-storage", self.clean_cache))
         
     def clean_cache(self):
+        """Xóa object cũ hơn max_age_days. Blocking: chạy trong thread của scheduler hoặc pool io-storage."""
+        if self.use_lifecycle:
+            return  # MinIO tự xóa theo lifecycle rule
         try:
-            now = time.time()
-            # Liệt kê tất cả object trong bucket
+            cutoff = datetime.now(timezone.utc) - timedelta(days=self.max_age_days)
+            # last_modified có sẵn trong kết quả liệt kê, không cần stat từng object
             objects = self.storage_client.list_objects(self.audio_bucket, recursive=True)
             
+            batch = []
+            deleted = 0
             for obj in objects:
-                # Lấy metadata hoặc stat của object
-                stat = self.storage_client.stat_object(self.audio_bucket, obj.object_name)
-                last_modified = stat.last_modified.timestamp()
-                
-                if now - last_modified > 604800:  # 7 ngày = 604,800 giây
-                    self.storage_client.remove_object(self.audio_bucket, obj.object_name)
-                    logger.info(f'Deleted expired cache: {obj.object_name} (last modified: {stat.last_modified})')
+                if obj.last_modified is not None and obj.last_modified < cutoff:
+                    batch.append(obj.object_name)
+                if len(batch) >= DELETE_BATCH_SIZE:
+                    deleted += self._remove_batch(batch)
+                    batch = []
+            if batch:
+                deleted += self._remove_batch(batch)
+            logger.info(f'Cache cleanup removed {deleted} expired objects from {self.audio_bucket}')
         except Exception as e:
-            logger.error(f"Error cleaning cache: {e}")
\ No newline at end of file
+            logger.error(f"Error cleaning cache: {e}")
+            
+    def _remove_batch(self, object_names: list) -> int:
+        errors = self.storage_client.remove_objects(self.audio_bucket, object_names)
+        for error in errors:
+            logger.error(f'Failed to delete expired cache {error.name}: {error.message}')
+        return len(object_names) - len(errors)
@@ -0,0 +1,70 @@
+#services/chat_history_migrator.py
+#Tách mảng history nhúng trong document chat (dữ liệu cũ) sang collection messages.
+#Chạy khi ứng dụng khởi động, an toàn khi chạy lại nhiều lần (idempotent).
+
+from datetime import datetime, timezone
+from bson import ObjectId
+from .chat_service import build_last_message
+from ..logging_config import logger
+
+async def split_chat_history(chat_repository):
+    try:
+        migrated = 0
+        migrated_at = datetime.now(timezone.utc)
+        async for chat in chat_repository.iter_chats_with_embedded_history():
+            chat_id = str(chat["_id"])
+            history = chat.get("history") or []
+            messages = []
+            for seq, entry in enumerate(history):
+                message = {
+                    "chat_id": chat_id,
+                    "user_id": chat.get("user_id"),
+                    "seq": seq,
+                    "user": entry.get("user", ""),
+                    "ai": entry.get("ai", ""),
+                    "audioUrl": entry.get("audioUrl", ""),
+                    "createdAt": migrated_at,
+                }
+                if entry.get("translateAi"):
+                    message["translateAi"] = entry["translateAi"]
+                messages.append(message)
+            await chat_repository.upsert_messages(messages)
+            
+            # Chỉ xóa history nhúng khi chắc chắn toàn bộ tin nhắn đã nằm trong collection messages
+            stored = await chat_repository.count_messages(chat_id)
+            if stored < len(history):
+                logger.error(f"Chat {chat_id}: only {stored}/{len(history)} messages stored, keeping embedded history")
+                continue
+            
+            # Giữ bộ đếm lớn nhất nếu chat đã được migrate dở dang trước đó
+            message_count = max(len(history), chat.get("message_count", 0))
+            summary = {
+                "updatedAt": chat.get("updatedAt") or chat["_id"].generation_time,
+                "last_message": build_last_message(history[-1]) if history else None,
+            }
+            await chat_repository.finalize_history_split(chat_id, message_count, summary)
+            logger.info(f"Migrated {len(history)} messages for chat {chat_id}")
+            migrated += 1
+        
+        if migrated:
+            logger.info(f"Chat history migration completed for {migrated} chats")
+        else:
+            logger.info("No embedded chat history to migrate")
+        
+        await backfill_chat_summary(chat_repository)
+    except Exception as e:
+        logger.error(f"Failed to migrate chat history: {str(e)}")
+
+async def backfill_chat_summary(chat_repository):
+    """Bổ sung updatedAt/last_message cho các chat đã tách history nhưng chưa có trường tóm tắt"""
+    backfilled = 0
+    async for chat in chat_repository.iter_chats_missing_summary():
+        chat_id = str(chat["_id"])
+        last = await chat_repository.find_messages(chat_id, limit=1)
+        await chat_repository.update_chat_summary(chat_id, {
+            "updatedAt": ObjectId(chat_id).generation_time,
+            "last_message": build_last_message(last[0]) if last else None,
+        })
+        backfilled += 1
+    if backfilled:
+        logger.info(f"Backfilled summary fields for {backfilled} chats")
@@ -5,21 +5,55 @@
 
 from fastapi import HTTPException
 from bson import ObjectId
-from deep_translator import GoogleTranslator
+from datetime import datetime, timezone
+from .executor_service import ExecutorService
+from .tts_prefetch_service import TTSPrefetchService
+from .translation_service import TranslationService
+from .translation.google_translation_client import GoogleTranslationClient
 from ..logging_config import logger
 
+PREVIEW_LENGTH = 80 # Số ký tự tối đa của phần xem trước tin nhắn cuối trong sidebar
+
+def build_last_message(message: dict) -> dict:
+    """Tạo bản xem trước (rút gọn) của tin nhắn cuối để lưu trên document chat"""
+    def truncate(text: str) -> str:
+        text = (text or "").strip()
+        return text if len(text) <= PREVIEW_LENGTH else text[:PREVIEW_LENGTH].rstrip() + "…"
+    return {"user": truncate(message.get("user")), "ai": truncate(message.get("ai"))}
+
 class ChatService:
-    def __init__(self, chat_repository):
+    def __init__(self, chat_repository, executor_service: ExecutorService, tts_prefetch: TTSPrefetchService = None, translation_service: TranslationService = None):
         self.chat_repository = chat_repository
+        self.executor = executor_service
+        self.tts_prefetch = tts_prefetch
+        self.translation_service = translation_service or TranslationService(GoogleTranslationClient(), executor_service)
+        
+    def _encode_cursor(self, chat: dict) -> str:
+        """Cursor phân trang danh sách chat: '<updatedAt tính bằng ms>_<chat_id>'"""
+        updated_at = chat["updatedAt"]
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        return f"{int(updated_at.timestamp() * 1000)}_{chat['_id']}"
+    
+    def _decode_cursor(self, cursor: str) -> tuple:
+        try:
+            millis, chat_id = cursor.split("_", 1)
+            updated_at = datetime.fromtimestamp(int(millis) / 1000, tz=timezone.utc)
+            return updated_at, ObjectId(chat_id)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
         
     async def create_chat(self, user_id: str):
         """Tạo một chat mới"""
+        now = datetime.now(timezone.utc)
         chat_data = {
             "title": "",
-            "history" : [],
+            "message_count": 0, # Tin nhắn lưu ở collection messages, chat chỉ giữ bộ đếm
+            "last_message": None,
             "vocab_ids": [],
-            "user_id": user_id
-            
+            "user_id": user_id,
+            "createdAt": now,
+            "updatedAt": now,
         }
         result = await self.chat_repository.create_chat(chat_data)
         return {
@@ -32,17 +66,36 @@ class ChatService:
         if not user_id:
             raise HTTPException(status_code=400, detail="Invalid user ID")
         
-        chats = await self.chat_repository.find_chats_by_user(user_id)
+        # Không trả về vocab_ids (danh sách có thể dài, sidebar không dùng)
+        chats = await self.chat_repository.find_chats_by_user(user_id, {"vocab_ids": 0, "context_summary": 0})
         for chat in chats:
             chat["_id"] = str(chat["_id"])
         return chats
         
+    async def get_chat_summaries(self, user_id: str, cursor: str = None, limit: int = 30):
+        """Lấy danh sách chat rút gọn (title, updatedAt, message_count, last_message) cho sidebar.
+        Phân trang theo updatedAt giảm dần, next_cursor = None khi đã hết."""
+        if not user_id:
+            raise HTTPException(status_code=400, detail="Invalid user ID")
+        
+        before = self._decode_cursor(cursor) if cursor else None
+        # Lấy dư 1 phần tử để biết còn trang kế tiếp hay không
+        chats = await self.chat_repository.find_chat_summaries(user_id, before, limit + 1)
+        next_cursor = None
+        if len(chats) > limit:
+            chats = chats[:limit]
+            next_cursor = self._encode_cursor(chats[-1])
+        for chat in chats:
+            chat["_id"] = str(chat["_id"])
+        return {"chats": chats, "next_cursor": next_cursor}
+        
     async def get_chat(self, chat_id: str, user_id: str):
         """Lấy thông tin chi tiết của một chat"""
         if not ObjectId.is_valid(chat_id):
             raise HTTPException(status_code=400, detail="Invalid chat ID")
         
-        chat = await self.chat_repository.find_chat_by_id_and_user(chat_id, user_id)
+        # context_summary chỉ dùng nội bộ để dựng ngữ cảnh cho AI
+        chat = await self.chat_repository.find_chat_by_id_and_user(chat_id, user_id, {"context_summary": 0})
         if not chat:
             raise HTTPException(status_code=404, detail="Chat not found or not owned by user")
         
@@ -58,6 +111,7 @@ class ChatService:
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Chat not found or not owned by user")
         
+        await self.chat_repository.delete_messages_by_chat(chat_id, user_id)
         await self.chat_repository.delete_vocab_by_chat(chat_id, user_id)
         return {"message": "Chat deleted successfully"}
     
@@ -68,16 +122,8 @@ class ChatService:
         if not new_title or not isinstance(new_title, str):
             raise HTTPException(status_code=400, detail="Invalid title: must be a non-empty string")
         
-        chat = await self.chat_repository.find_chat_by_id_and_user(chat_id, user_id)
+        chat = await self.chat_repository.update_chat_title(chat_id, user_id, new_title, datetime.now(timezone.utc))
         if not chat:
-            raise HTTPException(status_code=404, detail="Chat not found or not owned by user")
-        
-        result = await self.chat_repository.update_chat(
-            chat_id,
-            user_id,
-            {"$set": {"title": new_title}},
-        )
-        if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Chat not found, not owned by user, or title unchanged")
         return {"message": "Chat title updated successfully"}
     
@@ -86,10 +132,6 @@ class ChatService:
         if not ObjectId.is_valid(chat_id):
             raise HTTPException(status_code=400, detail="Invalid chat ID")
         
-        chat = await self.chat_repository.find_chat_by_id_and_user(chat_id, user_id)
-        if not chat:
-            raise HTTPException(status_code=404, detail="Chat not found or not owned by user")
-        
         update_data = {}
         latest_suggestion = data.get("latest_suggestion")
         if latest_suggestion is not None:
@@ -112,52 +154,107 @@ class ChatService:
         if not update_data:
             raise HTTPException(status_code=400, detail="No valid fields to update")
         
+        # Điều kiện user_id trong câu update đã kiểm tra quyền sở hữu, không cần đọc chat trước
         result = await self.chat_repository.update_chat(
             chat_id,
             user_id,
             {"$set": update_data},
         )
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Chat not found or not owned by user")
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Chat not found or no changes made")
+        
+        # Gợi ý mới chưa có audio: tổng hợp trước ở background.
+        # Chỉ ghi URL vào chat khi client gửi tts_method (giọng người dùng đã chọn); nếu không chỉ làm ấm bộ đệm TTS,
+        # tránh lưu audio giọng mặc định khiến frontend không tạo lại bằng giọng đã chọn
+        if self.tts_prefetch and latest_suggestion and not suggestion_audio_url:
+            tts_method = data.get("tts_method")
+            on_audio_ready = None
+            if tts_method:
+                async def on_audio_ready(audio_url: str):
+                    await self.chat_repository.set_suggestion_audio_if_current(chat_id, user_id, latest_suggestion, audio_url)
+            self.tts_prefetch.enqueue(latest_suggestion, tts_method, on_audio_ready)
         return {"message": "Chat suggestion updated successfully"}
     
-    async def get_chat_history(self, chat_id: str, user_id: str):
-        """Lấy lịch sử tin nhắn của chat"""
+    async def get_chat_history(self, chat_id: str, user_id: str, before: int = None, limit: int = None):
+        """Lấy lịch sử tin nhắn của chat.
+        Không truyền limit: trả về toàn bộ lịch sử. Có limit: trả về tối đa limit tin nhắn mới nhất
+        có seq < before, kèm next_before để lấy trang cũ hơn (None nếu đã hết)."""
         if not ObjectId.is_valid(chat_id):
             raise HTTPException(status_code=400, detail="Invalid chat ID")
+        if before is not None and before < 0:
+            raise HTTPException(status_code=400, detail="Invalid before: must be a non-negative integer")
+        if limit is not None and limit <= 0:
+            raise HTTPException(status_code=400, detail="Invalid limit: must be a positive integer")
         
-        chat = await self.chat_repository.find_chat_by_id_and_user(chat_id, user_id)
+        chat = await self.chat_repository.find_chat_by_id_and_user(chat_id, user_id, {"_id": 1})
         if not chat:
             raise HTTPException(status_code=404, detail="Chat not found or not owned by user")
-        return {"history": chat.get("history", [])}
+        
+        history = await self.chat_repository.find_messages(chat_id, before, limit or 0)
+        next_before = None
+        if limit and len(history) == limit and history[0]["seq"] > 0:
+            next_before = history[0]["seq"]
+        return {"history": history, "next_before": next_before}
     
     async def add_chat_history(self, chat_id: str, data: dict, user_id: str):
         """Thêm tin nhắn vào lịch sử chat"""
         if not ObjectId.is_valid(chat_id):
             raise HTTPException(status_code=400, detail="Invalid chat ID")
         
-        chat = await self.chat_repository.find_chat_by_id_and_user(chat_id, user_id)
-        if not chat:
-            raise HTTPException(status_code=404, detail="Chat not found or not owned by user")
-        
+        now = datetime.now(timezone.utc)
         message = {
+            "chat_id": chat_id,
+            "user_id": user_id,
             "user": data.get("user", ""),
             "ai": data.get("ai", ""),
-            "audioUrl": data.get("audioUrl", "")
+            "audioUrl": data.get("audioUrl", ""),
+            "createdAt": now,
         }
         
-        title_update = None
-        if not chat["history"] and not chat["title"]:
-            title_update = {"title": message["user"]}
-            
-        result = await self.chat_repository.update_chat_history(
+        # Một thao tác nguyên tử trên chat: kiểm tra quyền sở hữu, cấp seq (tăng bộ đếm),
+        # đặt title từ tin nhắn đầu tiên nếu chưa có và cập nhật các trường tóm tắt cho sidebar
+        chat = await self.chat_repository.allocate_message_seq(
             chat_id,
-            message,
-            title_update
+            user_id,
+            message["user"],
+            {"updatedAt": now, "last_message": build_last_message(message)}
         )
-        if result.modified_count == 0:
-            raise HTTPException(status_code=404, detail="Chat not found, not owned by user, or no update")
-        return {"message": "History updated"}
+        if not chat:
+            raise HTTPException(status_code=404, detail="Chat not found or not owned by user")
+        message["seq"] = chat["message_count"] - 1
+        try:
+            await self.chat_repository.insert_message(message)
+        except Exception as e:
+            logger.error(f"Failed to insert message {message['seq']} of chat {chat_id}: {e}")
+            await self._release_message_seq(chat_id, message["seq"])
+            raise HTTPException(status_code=500, detail="Failed to add message to history")
+        
+        # Câu trả lời AI chưa có audio: tổng hợp ở background (thường đã có sẵn trong bộ đệm nhờ AIService tổng hợp trước).
+        # Như update_chat_suggestion: chỉ ghi audioUrl khi client gửi tts_method
+        if self.tts_prefetch and message["ai"] and not message["audioUrl"]:
+            tts_method = data.get("tts_method")
+            on_audio_ready = None
+            if tts_method:
+                seq = message["seq"]
+                async def on_audio_ready(audio_url: str):
+                    await self.chat_repository.set_message_audio_if_missing(chat_id, user_id, seq, message["ai"], audio_url)
+            self.tts_prefetch.enqueue(message["ai"], tts_method, on_audio_ready)
+        return {"message": "History updated", "seq": message["seq"]}
+    
+    async def _release_message_seq(self, chat_id: str, seq: int):
+        """Không lưu được tin nhắn: trả lại seq để không để lại khoảng trống (frontend đánh địa chỉ tin nhắn theo vị trí),
+        khôi phục last_message theo tin nhắn trước đó"""
+        try:
+            previous = await self.chat_repository.find_messages(chat_id, seq, 1)
+            last_message = build_last_message(previous[0]) if previous else None
+            result = await self.chat_repository.release_message_seq(chat_id, seq, {"last_message": last_message})
+            if result.modified_count == 0:
+                # Đã có tin nhắn khác được cấp seq sau đó: không thể trả lại
+                logger.warning(f"Could not release seq {seq} of chat {chat_id}, history now has a gap")
+        except Exception as e:
+            logger.error(f"Failed to release seq {seq} of chat {chat_id}: {e}")
     
     async def update_chat_history_audio(self, chat_id: str, index: int, audio_url: str, user_id: str):
         """Cập nhật audioUrl trong lịch sử chat"""
@@ -168,17 +265,15 @@ class ChatService:
         if not audio_url or not isinstance(audio_url, str):
             raise HTTPException(status_code=400, detail="Invalid audioUrl: must be a non-empty string")
         
-        chat = await self.chat_repository.find_chat_by_id_and_user(chat_id, user_id)
-        if not chat:
-            raise HTTPException(status_code=404, detail="Chat not found or not owned by user")
-        if index >= len(chat["history"]):
-            raise HTTPException(status_code=400, detail="Index out of range")
-        
+        # Tin nhắn chỉ khớp khi thuộc user và seq tồn tại: quyền sở hữu + phạm vi index nằm trong một câu update
         result = await self.chat_repository.update_chat_history_audio(
             chat_id,
+            user_id,
             index,
             audio_url
         )
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Chat not found, not owned by user, or index out of range")
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Chat not found, not owned by user, or no update")
         return {"message": "History audio URL updated"}
@@ -188,15 +283,10 @@ class ChatService:
         if not ObjectId.is_valid(chat_id):
             raise HTTPException(status_code=400, detail="Invalid chat ID")
         
-        chat = await self.chat_repository.find_chat_by_id_and_user(chat_id, user_id)
-        if not chat or "history" not in chat:
-            raise HTTPException(status_code=404, detail="Chat not found or not owned by user")
+        chat_entry = await self.chat_repository.find_message(chat_id, user_id, index, {"ai": 1, "translateAi": 1})
+        if not chat_entry:
+            raise HTTPException(status_code=404, detail="Chat not found, not owned by user, or index out of range")
         
-        chat_history = chat["history"]
-        if not isinstance(chat_history, list) or index >= len(chat_history):
-            raise HTTPException(status_code=400, detail="Index out of range or history format invalid")
-        
-        chat_entry = chat_history[index]
         if "ai" not in chat_entry:
             raise HTTPException(status_code=400, detail="Chat entry missing 'ai' field")
         
@@ -205,11 +295,12 @@ class ChatService:
             return {"translatedTextAi": chat_entry["translateAi"], "message": "AI chat already translated"}
         
         logger.info("Translating AI chat...")
-        translator = GoogleTranslator(source='auto', target=target_lang)
-        translated_text = translator.translate(chat_entry["ai"])
+        # Dùng chung bộ đệm bản dịch với /translate: câu trả lời AI lặp lại giữa các người dùng không phải dịch lại
+        translated_text = (await self.translation_service.translate(chat_entry["ai"], target_lang))["translatedText"]
         
         result = await self.chat_repository.update_chat_history_translation(
             chat_id,
+            user_id,
             index,
             translated_text,
             chat_entry["ai"]
@@ -218,6 +309,37 @@ class ChatService:
             raise HTTPException(status_code=404, detail="Chat not found, not owned by user, or text mismatch")
         return {"translatedTextAi": translated_text, "message": "AI chat translated and updated"}
     
+    async def translate_chat_all(self, chat_id: str, target_lang: str, user_id: str):
+        """Dịch tất cả tin nhắn AI chưa có bản dịch của chat trong một request (chế độ song ngữ)"""
+        if not ObjectId.is_valid(chat_id):
+            raise HTTPException(status_code=400, detail="Invalid chat ID")
+        
+        chat = await self.chat_repository.find_chat_by_id_and_user(chat_id, user_id, {"_id": 1})
+        if not chat:
+            raise HTTPException(status_code=404, detail="Chat not found or not owned by user")
+        
+        messages = await self.chat_repository.find_untranslated_messages(chat_id, user_id)
+        if not messages:
+            return {"translations": [], "failed": [], "message": "All AI chats already translated"}
+        
+        logger.info(f"Translating {len(messages)} AI chats of chat {chat_id}...")
+        translated_texts = await self.translation_service.translate_many([message["ai"] for message in messages], target_lang)
+        translations = [
+            (message["seq"], message["ai"], translated_text)
+            for message, translated_text in zip(messages, translated_texts)
+            if translated_text
+        ]
+        # Lỗi một phần: vẫn lưu các bản dịch thành công, trả về seq của các tin nhắn chưa dịch được để client thử lại
+        failed = [message["seq"] for message, translated_text in zip(messages, translated_texts) if not translated_text]
+        if not translations:
+            raise HTTPException(status_code=500, detail="Translation error: no AI chats could be translated")
+        await self.chat_repository.update_chat_history_translations(chat_id, user_id, translations)
+        return {
+            "translations": [{"index": seq, "translatedTextAi": translated_text} for seq, _, translated_text in translations],
+            "failed": failed,
+            "message": f"Translated {len(translations)} AI chats" + (f", {len(failed)} failed" if failed else "")
+        }
+    
     async def get_chat_vocab(self, chat_id: str, user_id: str):
         """Lấy danh sách từ vựng của chat"""
         if not ObjectId.is_valid(chat_id):
@@ -9,6 +9,7 @@ import os
 import io
 from ..repositories.config_repository import ConfigRepository
 from ..storage.storage_client import StorageClient
+from .executor_service import ExecutorService
 from ..security import UserInDB
 from ..logging_config import logger
 
@@ -23,9 +24,10 @@ class SiteConfig:
         self.updatedAt = updatedAt
         
 class ConfigService:
-    def __init__(self, config_repository: ConfigRepository, storage_client: StorageClient):
+    def __init__(self, config_repository: ConfigRepository, storage_client: StorageClient, executor_service: ExecutorService):
         self.config_repository = config_repository
         self.storage_client = storage_client
+        self.executor = executor_service
         self.image_bucket = os.getenv("IMAGE_BUCKET")
         # self.minio_endpoint = os.getenv("MINIO_ENDPOINT")
         self.default_config = {
@@ -98,7 +100,9 @@ class ConfigService:
                 file_name = f"{field}-{uuid.uuid4()}{file_extension}"
                 try:
                     file_like = io.BytesIO(content)
-                    self.storage_client.put_object(
+                    await self.executor.run(
+                        "io-storage",
+                        self.storage_client.put_object,
                         bucket_name=self.image_bucket,
                         object_name=file_name,
                         data=file_like,
@@ -107,7 +111,7 @@ class ConfigService:
                     )
                     # Sử dụng presigned_get_object để tạo URL
                     # url = f"{self.minio_endpoint}/{self.image_bucket}/{file_name}"
-                    url = self.storage_client.presigned_get_object(self.image_bucket, file_name)
+                    url = await self.executor.run("io-storage", self.storage_client.presigned_get_object, self.image_bucket, file_name)
                     update_data[field] = url
                     logger.info(f"Uploaded {field} to MinIO: {url}")
                 except Exception as e:
@@ -121,7 +125,7 @@ class ConfigService:
                 if old_url:
                     try:
                         old_file_name = old_url.split("/")[-1].split("?")[0]
-                        self.storage_client.remove_object(self.image_bucket, old_file_name)
+                        await self.executor.run("io-storage", self.storage_client.remove_object, self.image_bucket, old_file_name)
                         logger.info(f"Deleted old file for {field}: {old_file_name}")
                     except Exception as e:
                         logger.warning(f"Failed to delete old file for {field}: {str(e)}")
@@ -129,10 +133,7 @@ class ConfigService:
         # Cập nhật updatedAt
         update_data["updatedAt"] = datetime.now().isoformat()
 
-        # Cập nhật config trong database
-        await self.config_repository.update_config(update_data)
+        # Cập nhật config trong database và lấy lại config đã cập nhật trong cùng một lần gọi
+        updated_config = await self.config_repository.update_config_and_return(update_data)
         logger.info("Updated site config successfully")
-
-        # Lấy config đã cập nhật
-        updated_config = await self.config_repository.get_config()
         return updated_config
\ No newline at end of file
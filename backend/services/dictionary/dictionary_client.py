@@ -7,5 +7,6 @@ from abc import ABC, abstractmethod
 class DictionaryClient(ABC):
     @abstractmethod
     async def get_word_info(self, word: str, limit: int) -> dict:
-        """Lấy thông tin từ từ điển cho một từ cụ thể."""
+        """Lấy thông tin từ từ điển cho một từ cụ thể.
+        Kết quả có "cacheable": False khi một phần dữ liệu bị thiếu do lỗi tạm thời (không được lưu vào bộ đệm)."""
         pass
\ No newline at end of file
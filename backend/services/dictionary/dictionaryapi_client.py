@@ -2,7 +2,7 @@
 # Triển khai DictionaryClient cho Dictionary API.
 # Tuân thủ SRP: Chỉ xử lý logic liên quan đến Dictionary API.
 
-from ..http.http_client import HTTPClient
+from ..http.http_client import HTTPClient, HTTPStatusError
 from .dictionary_client import DictionaryClient
 from ...logging_config import logger
 from fastapi import HTTPException
@@ -24,7 +24,13 @@ class DictionaryAPIClient(DictionaryClient):
         }
         
         try:
-            response = await self.http_client.get(f"{self.base_url}/{word}")
+            try:
+                response = await self.http_client.get(f"{self.base_url}/{word}")
+            except HTTPStatusError as e:
+                # Dictionary API trả 404 kèm {"title": "No Definitions Found"} khi không có từ
+                if e.status_code != 404:
+                    raise
+                response = {"title": "No Definitions Found"}
 
             if isinstance(response, dict) and "title" in response and response["title"] == "No Definitions Found":
                 logger.warning(f"No definitions found for word: {word}")
@@ -0,0 +1,47 @@
+# services/dictionary/word_info_cache.py
+# Bộ đệm hai tầng cho kết quả tra từ điển: LRU trong process, sau đó collection word_info_cache trong MongoDB (có TTL).
+# Khóa theo (source, word, limit). Từ không có trong từ điển cũng được lưu (negative cache) với thời hạn ngắn hơn,
+# để từ gõ sai / tên riêng không gọi lại API mỗi lần.
+# Tuân thủ SRP: Chỉ quản lý bộ đệm, việc gọi API từ điển do VocabService và các DictionaryClient đảm nhiệm.
+
+import os
+import copy
+from datetime import datetime, timedelta
+from ..two_tier_cache import TwoTierCache
+from ...repositories.word_info_repository import WordInfoRepository
+
+class WordInfoCache(TwoTierCache):
+    def __init__(self, word_info_repository: WordInfoRepository, max_entries: int = None):
+        super().__init__(word_info_repository, max_entries or int(os.getenv("WORD_INFO_CACHE_MAX_ENTRIES", "5000")))
+        self.ttl_seconds = int(os.getenv("WORD_INFO_CACHE_TTL", str(30 * 24 * 3600)))
+        self.negative_ttl_seconds = int(os.getenv("WORD_INFO_NEGATIVE_TTL", str(24 * 3600)))
+        self.negative_hits = 0
+
+    @staticmethod
+    def make_key(source: str, word: str, limit: int) -> str:
+        return f"{source}:{limit}:{word}"
+
+    async def get(self, source: str, word: str, limit: int):
+        """Trả về bản sao kết quả đã lưu, hoặc None nếu chưa có"""
+        entry = await self._get_entry(self.make_key(source, word, limit))
+        return self._result(entry) if entry else None
+
+    async def get_many(self, source: str, words: list, limit: int) -> dict:
+        """Tra nhiều từ cùng lúc. Trả về {word: kết quả} chỉ cho các từ đã có trong bộ đệm."""
+        keys = {self.make_key(source, word, limit): word for word in words}
+        entries = await self._get_entries(list(keys))
+        return {keys[key]: self._result(entry) for key, entry in entries.items()}
+
+    def _result(self, entry: dict) -> dict:
+        """Bản sao kết quả đã lưu (để phía gọi sửa thoải mái)"""
+        if not entry["found"]:
+            self.negative_hits += 1
+        return copy.deepcopy(entry["result"])
+
+    async def put(self, source: str, word: str, limit: int, result: dict, found: bool):
+        ttl = self.ttl_seconds if found else self.negative_ttl_seconds
+        entry = {"result": copy.deepcopy(result), "found": found, "expiresAt": datetime.utcnow() + timedelta(seconds=ttl)}
+        await self._put_entry(self.make_key(source, word, limit), entry, ttl)
+
+    def get_metrics(self) -> dict:
+        return {**super().get_metrics(), "negative_hits": self.negative_hits}
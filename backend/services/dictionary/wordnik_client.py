@@ -3,7 +3,7 @@
 # Tuân thủ SRP: Chỉ xử lý logic liên quan đến Wordnik API.
 
 from fastapi import HTTPException
-from ..http.http_client import HTTPClient
+from ..http.http_client import HTTPClient, HTTPStatusError
 from .dictionary_client import DictionaryClient
 from ...utils import WORDNIK_API_KEY
 from ...logging_config import logger
@@ -39,6 +39,11 @@ class WordnikClient(DictionaryClient):
             ]
             
             responses = await asyncio.gather(*tasks, return_exceptions=True)
+            for response in responses:
+                if isinstance(response, Exception) and not (isinstance(response, HTTPStatusError) and response.status_code == 404):
+                    # Lỗi tạm thời (429, 5xx, timeout): vẫn trả phần có được nhưng không lưu vào bộ đệm
+                    logger.warning(f"Wordnik request failed for word {word}: {response}")
+                    result["cacheable"] = False
             
             # Xử lý definitions
             definitions_data = responses[0]
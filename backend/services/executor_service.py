@@ -0,0 +1,107 @@
+# services/executor_service.py
+# Quản lý các thread pool có giới hạn cho công việc blocking (ffmpeg, Vosk, gTTS, MinIO, deep_translator, bcrypt, Mailjet, ...)
+# để event loop không bị chặn. Mỗi loại công việc có pool riêng, cấu hình được số worker và độ dài hàng đợi.
+# Tuân thủ SRP: Chỉ điều phối việc chạy hàm blocking, không chứa logic nghiệp vụ.
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from ..logging_config import logger
+
+# Các pool theo loại công việc: (số worker mặc định, số tác vụ chờ tối đa mặc định)
+# cpu-audio: chuyển đổi/giải mã âm thanh (ffmpeg, Vosk, Piper) - nặng CPU, giữ pool nhỏ
+# io-storage: MinIO (put/stat/remove/presign)
+# io-provider: gọi API bên ngoài bằng SDK đồng bộ (gTTS, deep_translator, AssemblyAI, Google STT, Mailjet)
+# crypto: bcrypt hash/verify - tốn CPU có chủ đích, giới hạn để không chiếm hết CPU khi bị dò mật khẩu
+POOL_DEFAULTS = {
+    "cpu-audio": (max(2, (os.cpu_count() or 2) // 2), 32),
+    "io-storage": (16, 128),
+    "io-provider": (16, 128),
+    "crypto": (max(2, (os.cpu_count() or 2) // 2), 64),
+}
+
+class BoundedPool:
+    """ThreadPoolExecutor kèm giới hạn số tác vụ đang chờ và bộ đếm metrics"""
+    def __init__(self, name: str, workers: int, queue_limit: int):
+        self.name = name
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"pool-{name}")
+        self._lock = threading.Lock()
+        self.pending = 0  # Đã nhận, chưa xong (đang chạy + đang chờ)
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+
+    def _run(self, func):
+        with self._lock:
+            self.active += 1
+        try:
+            return func()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    async def submit(self, func, *args, **kwargs):
+        with self._lock:
+            if self.pending >= self.workers + self.queue_limit:
+                self.rejected += 1
+                raise HTTPException(status_code=503, detail=f"Server busy ({self.name}), please try again")
+            self.pending += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.pending - self.workers)
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, self._run, functools.partial(func, *args, **kwargs))
+            with self._lock:
+                self.completed += 1
+            return result
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "active": self.active,
+                "queue_depth": max(0, self.pending - self.active),
+                "max_queue_depth": self.max_queue_depth,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+class ExecutorService:
+    def __init__(self, pool_config: dict = None):
+        self.pools = {}
+        for name, (workers, queue_limit) in (pool_config or POOL_DEFAULTS).items():
+            # Biến môi trường: EXECUTOR_CPU_AUDIO_WORKERS, EXECUTOR_CPU_AUDIO_QUEUE, ...
+            env_prefix = "EXECUTOR_" + name.upper().replace("-", "_")
+            workers = int(os.getenv(f"{env_prefix}_WORKERS", workers))
+            queue_limit = int(os.getenv(f"{env_prefix}_QUEUE", queue_limit))
+            self.pools[name] = BoundedPool(name, workers, queue_limit)
+            logger.info(f"Executor pool {name}: {workers} workers, queue limit {queue_limit}")
+
+    async def run(self, pool: str, func, *args, **kwargs):
+        """Chạy hàm blocking trong pool tương ứng và chờ kết quả.
+        Ném HTTPException 503 khi hàng đợi của pool đã đầy (từ chối sớm thay vì để request treo)."""
+        if pool not in self.pools:
+            raise ValueError(f"Unknown executor pool: {pool}")
+        return await self.pools[pool].submit(func, *args, **kwargs)
+
+    def get_metrics(self) -> dict:
+        return {name: pool.metrics() for name, pool in self.pools.items()}
+
+    def shutdown(self):
+        for pool in self.pools.values():
+            pool.executor.shutdown(wait=False, cancel_futures=True)
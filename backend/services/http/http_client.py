@@ -3,9 +3,32 @@
 # Tuân thủ DIP: Các module cấp cao chỉ phụ thuộc vào abstraction này.
 
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+class HTTPStatusError(Exception):
+    """Phản hồi có status code không phải 2xx, giữ lại status để phía gọi phân biệt (vd: 404 là không có dữ liệu)"""
+    def __init__(self, status_code: int, message: str = ""):
+        super().__init__(f"HTTP {status_code}: {message}")
+        self.status_code = status_code
 
 class HTTPClient(ABC):
     @abstractmethod
     async def get(self, url: str, headers: dict = None) -> dict:
-        """Gửi yêu cầu GET đến URL và trả về phản hồi."""
-        pass
\ No newline at end of file
+        """Gửi yêu cầu GET đến URL và trả về phản hồi JSON. Ném HTTPStatusError nếu status code không phải 2xx."""
+        pass
+    
+    @abstractmethod
+    async def post(self, url: str, json: dict = None, headers: dict = None, timeout: float = None) -> dict:
+        """Gửi yêu cầu POST (body JSON) và trả về phản hồi JSON. Ném HTTPStatusError nếu status code không phải 2xx."""
+        pass
+    
+    @abstractmethod
+    def stream_post(self, url: str, json: dict = None, headers: dict = None, timeout: float = None) -> AsyncIterator[str]:
+        """Gửi yêu cầu POST và trả về từng dòng của phản hồi ngay khi nhận được (dùng cho Server-Sent Events).
+        Ném HTTPStatusError (trước dòng đầu tiên) nếu status code không phải 2xx."""
+        pass
+    
+    @abstractmethod
+    async def aclose(self):
+        """Đóng các kết nối đang giữ trong pool."""
+        pass
@@ -1,16 +1,126 @@
 # services/http/httpx_client.py
 # Triển khai HTTPClient bằng httpx.
+# Dùng chung một httpx.AsyncClient (connection pool, keep-alive) cho mọi request thay vì mở kết nối mới mỗi lần.
+# Có timeout theo host, HTTP/2 tùy chọn và tự thử lại (backoff có jitter) khi gặp 429/5xx hoặc lỗi kết nối.
 # Tuân thủ SRP: Chỉ xử lý logic liên quan đến httpx.
 
+import os
+import random
+import asyncio
+from urllib.parse import urlsplit
 import httpx
-from .http_client import HTTPClient
+from .http_client import HTTPClient, HTTPStatusError
 from ...logging_config import logger
 
+# Status được thử lại: GET là idempotent nên thử lại cả lỗi 5xx;
+# POST chỉ thử lại khi server chắc chắn chưa xử lý (429 quá tải, 503 tạm ngưng) để không gửi trùng
+RETRY_STATUSES = {
+    "GET": {429, 500, 502, 503, 504},
+    "POST": {429, 503},
+}
+
+def parse_host_timeouts(value: str) -> dict:
+    """'api.wordnik.com=10,api.dictionaryapi.dev=5' -> {'api.wordnik.com': 10.0, 'api.dictionaryapi.dev': 5.0}"""
+    timeouts = {}
+    for item in (value or "").split(","):
+        host, _, seconds = item.partition("=")
+        if host.strip() and seconds.strip():
+            timeouts[host.strip().lower()] = float(seconds)
+    return timeouts
+
 class HttpxClient(HTTPClient):
+    def __init__(self):
+        # Timeout và kích thước pool cấu hình qua biến môi trường
+        self.timeout = httpx.Timeout(
+            float(os.getenv("HTTP_TIMEOUT", "30")),
+            connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+        )
+        self.host_timeouts = parse_host_timeouts(os.getenv("HTTP_HOST_TIMEOUTS", ""))
+        self.limits = httpx.Limits(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+        )
+        self.retries = int(os.getenv("HTTP_RETRIES", "2"))
+        self.retry_backoff = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+        self.retry_max_delay = float(os.getenv("HTTP_RETRY_MAX_DELAY", "8"))
+        self.http2 = os.getenv("HTTP2_ENABLED", "0") in ("1", "true")
+        if self.http2:
+            try:
+                import h2  # noqa: F401 - httpx cần gói h2 để bật HTTP/2
+            except ImportError:
+                logger.warning("HTTP2_ENABLED is set but the h2 package is not installed, using HTTP/1.1")
+                self.http2 = False
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Tạo lazily trong event loop đang chạy
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, http2=self.http2)
+        return self._client
+
+    def _request_timeout(self, url: str, timeout: float = None):
+        """Ưu tiên: timeout truyền vào > timeout theo host (HTTP_HOST_TIMEOUTS) > HTTP_TIMEOUT"""
+        timeout = timeout or self.host_timeouts.get((urlsplit(url).hostname or "").lower())
+        return httpx.Timeout(timeout, connect=self.timeout.connect) if timeout else self.timeout
+
+    def _retry_delay(self, attempt: int, response: httpx.Response = None) -> float:
+        """Full jitter: ngẫu nhiên trong [0, backoff * 2^attempt], tôn trọng Retry-After (dạng số giây) nếu server gửi"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.retry_max_delay)
+        return random.uniform(0, min(self.retry_max_delay, self.retry_backoff * (2 ** attempt)))
+
+    async def _send(self, method: str, url: str, stream: bool = False, timeout: float = None, **kwargs) -> httpx.Response:
+        """Gửi request, thử lại tối đa HTTP_RETRIES lần với status trong RETRY_STATUSES hoặc lỗi kết nối"""
+        request = self.client.build_request(method, url, timeout=self._request_timeout(url, timeout), **kwargs)
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                # POST chỉ thử lại khi chưa kết nối được (request chắc chắn chưa tới server)
+                if attempt == self.retries or (method != "GET" and not isinstance(e, httpx.ConnectError)):
+                    raise
+                delay = self._retry_delay(attempt)
+                logger.warning(f"{method} {url} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            if response.status_code not in RETRY_STATUSES.get(method, ()) or attempt == self.retries:
+                return response
+            delay = self._retry_delay(attempt, response)
+            logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay:.2f}s")
+            await response.aclose()
+            await asyncio.sleep(delay)
+
     async def get(self, url: str, headers: dict = None) -> dict:
-        async with httpx.AsyncClient() as client:
-            logger.info(f"Making request to: {url}")
-            response = await client.get(url, headers=headers or {})
-            logger.info(f"Response: {response.status_code}, {response.text}")
-            response.raise_for_status()  # Ném lỗi nếu status code không phải 2xx
-            return response.json()
\ No newline at end of file
+        response = await self._send("GET", url, headers=headers or {})
+        logger.debug(f"GET {url}: {response.status_code}")
+        if response.is_error:
+            raise HTTPStatusError(response.status_code, response.text[:500])
+        return response.json()
+
+    async def post(self, url: str, json: dict = None, headers: dict = None, timeout: float = None) -> dict:
+        response = await self._send("POST", url, json=json, headers=headers or {}, timeout=timeout)
+        if response.is_error:
+            logger.error(f"POST {url} failed: {response.status_code} - {response.text[:500]}")
+            raise HTTPStatusError(response.status_code, response.text[:500])
+        return response.json()
+
+    async def stream_post(self, url: str, json: dict = None, headers: dict = None, timeout: float = None):
+        # Chỉ thử lại trước khi nhận được byte đầu tiên của phản hồi
+        response = await self._send("POST", url, stream=True, json=json, headers=headers or {}, timeout=timeout)
+        try:
+            if response.is_error:
+                await response.aread()
+                logger.error(f"POST {url} (stream) failed: {response.status_code} - {response.text[:500]}")
+                raise HTTPStatusError(response.status_code, response.text[:500])
+            async for line in response.aiter_lines():
+                yield line
+        finally:
+            await response.aclose()
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
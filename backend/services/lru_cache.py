@@ -0,0 +1,51 @@
+# services/lru_cache.py
+# Bộ nhớ đệm LRU trong process, có thời hạn (TTL) cho từng entry và bộ đếm hit/miss.
+# Dùng làm tầng nhanh phía trước các bộ đệm lưu trong MongoDB.
+# Tuân thủ SRP: Chỉ quản lý entry trong bộ nhớ, không biết dữ liệu được lưu là gì.
+
+import time
+from collections import OrderedDict
+
+class LRUCache:
+    def __init__(self, max_entries: int, ttl_seconds: float = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None or (entry[1] is not None and entry[1] <= time.monotonic()):
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value, ttl_seconds: float = None):
+        """Lưu value; ttl_seconds ghi đè TTL mặc định cho riêng entry này"""
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        self._entries[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def metrics(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
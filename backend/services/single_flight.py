@@ -0,0 +1,43 @@
+# services/single_flight.py
+# Gộp các lời gọi giống hệt nhau đang chạy đồng thời (single-flight): lời gọi đầu tiên thực sự gọi nhà cung cấp,
+# các lời gọi trùng khóa đến trong lúc đó chờ chung một kết quả thay vì gửi thêm request lên upstream.
+# Khóa gồm namespace (tts, word_info, translate, ...) và các tham số đã chuẩn hóa; có bộ đếm số lời gọi được gộp.
+# Tuân thủ SRP: Chỉ điều phối lời gọi, không biết gì về nội dung kết quả.
+
+import asyncio
+from ..logging_config import logger
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}  # (namespace, key) -> asyncio.Task
+        self._metrics = {}  # namespace -> {"calls", "coalesced"}
+
+    async def do(self, namespace: str, key, func, *args, **kwargs):
+        """Chạy func(*args, **kwargs) một lần cho mỗi (namespace, key) đang chạy, mọi phía gọi nhận cùng kết quả/exception.
+        Kết quả được dùng chung: phía gọi không được sửa trực tiếp object trả về.
+        Lời gọi chạy trong task riêng nên một phía gọi bị hủy (client ngắt kết nối) không làm hỏng các phía còn lại."""
+        metrics = self._metrics.setdefault(namespace, {"calls": 0, "coalesced": 0})
+        metrics["calls"] += 1
+        flight_key = (namespace, key)
+        task = self._inflight.get(flight_key)
+        if task is not None:
+            metrics["coalesced"] += 1
+            logger.debug(f"Coalesced {namespace} call: {key}")
+        else:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._inflight[flight_key] = task
+            task.add_done_callback(lambda t: self._finish(flight_key, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, flight_key, task: asyncio.Task):
+        if self._inflight.get(flight_key) is task:
+            del self._inflight[flight_key]
+        # Mọi phía gọi đều đã bị hủy: đánh dấu đã đọc exception để asyncio không cảnh báo
+        if not task.cancelled():
+            task.exception()
+
+    def get_metrics(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            **{namespace: dict(metrics) for namespace, metrics in self._metrics.items()},
+        }
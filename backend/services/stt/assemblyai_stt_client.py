@@ -2,7 +2,9 @@
 # Triển khai STTClient cho AssemblyAI.
 # Tuân thủ SRP: Chỉ xử lý logic liên quan đến AssemblyAI.
 
+import io
 import assemblyai as aai
+from ..audio.audio_processor import pcm_to_wav
 from ...utils import ASSEMBLYAI_API_KEY
 from .stt_client import STTClient
 from ...logging_config import logger
@@ -12,9 +14,10 @@ class AssemblyAISTTClient(STTClient):
         aai.settings.api_key = ASSEMBLYAI_API_KEY
         self.transcriber = aai.Transcriber()
         
-    def transcribe(self, wav_path : str) -> str:
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
         logger.info('Starting AssemblyAI transcription...')
-        transcript_obj = self.transcriber.transcribe(wav_path)
+        # AssemblyAI cần file audio có header, đóng gói PCM thành WAV trong bộ nhớ rồi upload
+        transcript_obj = self.transcriber.transcribe(io.BytesIO(pcm_to_wav(pcm, sample_rate)))
         if transcript_obj.status == aai.TranscriptStatus.completed:
             transcript = transcript_obj.text or "No speech detected"
             logger.info(f"AssemblyAI transcript: {transcript}")
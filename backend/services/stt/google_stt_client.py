@@ -2,7 +2,6 @@
 # Triển khai STTClient cho Google Speech-to-Text.
 # Tuân thủ SRP: Chỉ xử lý logic liên quan đến Google Speech-to-Text.
 
-import os
 from google.cloud import speech_v1 as speech
 from .stt_client import STTClient
 from ...logging_config import logger
@@ -13,22 +12,14 @@ class GoogleSTTClient(STTClient):
         # Credentials sẽ được tự động load từ biến môi trường GOOGLE_APPLICATION_CREDENTIALS
         self.client = speech.SpeechClient.from_service_account_file('backend/google-credentials.json')
         
-    def transcribe(self, wav_path: str) -> str:
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
         logger.info('Starting Google STT transcription...')
         
-        # Đọc file WAV
-        try:
-            with open(wav_path, "rb") as audio_file:
-                content = audio_file.read()
-        except Exception as e:
-            logger.error(f"Error reading WAV file: {str(e)}")
-            raise RuntimeError(f"Failed to read WAV file: {str(e)}")
-        
-        # Cấu hình audio và recognition
-        audio = speech.RecognitionAudio(content=content)
+        # Cấu hình audio và recognition (LINEAR16 nhận trực tiếp PCM 16-bit)
+        audio = speech.RecognitionAudio(content=pcm)
         config = speech.RecognitionConfig(
             encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-            sample_rate_hertz=16000,  # Điều chỉnh nếu file WAV có sample rate khác
+            sample_rate_hertz=sample_rate,
             language_code="en-US",
         )
         
@@ -6,6 +6,15 @@ from abc import ABC, abstractmethod
 
 class STTClient(ABC):
     @abstractmethod
-    def transcribe(self, wav_path: str) -> str:
-        """Trả về văn bản đã chuyển đổi từ file WAV."""
-        pass
\ No newline at end of file
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        """Trả về văn bản đã chuyển đổi từ audio PCM 16-bit mono."""
+        pass
+    
+    def submit_transcribe(self, pcm: bytes, sample_rate: int):
+        """Giao việc nhận dạng cho nơi khác (vd: process pool) và trả về concurrent.futures.Future, không chặn.
+        Mặc định None: phía gọi chạy transcribe() trong pool thread."""
+        return None
+
+    def create_stream(self, sample_rate: int):
+        """Mở phiên nhận dạng theo luồng (PCM 16-bit mono). Mặc định không hỗ trợ."""
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming")
@@ -1,35 +1,174 @@
 # services/stt/vosk_stt_client.py
 # Triển khai STTClient cho Vosk.
+# Model chỉ load một lần và dùng chung; mỗi request có KaldiRecognizer riêng (lấy từ pool, trả lại sau khi dùng)
+# vì recognizer giữ trạng thái giải mã, dùng chung giữa các request sẽ làm sai kết quả của nhau.
+# Chế độ process pool (VOSK_PROCESS_WORKERS > 0): N process giải mã, mỗi process load model một lần, để tận dụng nhiều core.
 # Tuân thủ SRP: Chỉ xử lý logic liên quan đến Vosk.
 
-import wave
+import os
 import json
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
 from vosk import Model, KaldiRecognizer
 from ...utils import VOSK_MODEL_DIR
 from .stt_client import STTClient
 from ...logging_config import logger
 
+MODEL_PATH = f"backend/models/{VOSK_MODEL_DIR}"
+FRAMES_PER_CHUNK = 4000
+
+def decode_pcm(recognizer: KaldiRecognizer, pcm: bytes, bytes_per_chunk: int) -> str:
+    """Đưa toàn bộ PCM vào recognizer, ghép text của mọi đoạn (utterance) đã nhận dạng được"""
+    segments = []
+    for start in range(0, len(pcm), bytes_per_chunk):
+        if recognizer.AcceptWaveform(pcm[start:start + bytes_per_chunk]):
+            result = json.loads(recognizer.Result())
+            logger.info(f"Partial result: {result}")
+            segments.append(result.get("text", ""))
+    result = json.loads(recognizer.FinalResult())
+    logger.info(f"Final result: {result}")
+    segments.append(result.get("text", ""))
+    return " ".join(text for text in segments if text)
+
+# Trạng thái của process worker (chế độ process pool): model load một lần trong initializer
+_worker_model = None
+
+def _init_worker(model_path: str):
+    global _worker_model
+    _worker_model = Model(model_path)
+
+def _transcribe_in_worker(pcm: bytes, sample_rate: int, bytes_per_chunk: int) -> str:
+    recognizer = KaldiRecognizer(_worker_model, sample_rate)
+    return decode_pcm(recognizer, pcm, bytes_per_chunk)
+
+class RecognizerPool:
+    """Pool KaldiRecognizer theo sample rate, dùng chung một Model.
+    Recognizer được Reset() trước khi trả về pool; giữ tối đa max_idle recognizer rảnh cho mỗi sample rate."""
+    def __init__(self, model: Model, max_idle: int):
+        self.model = model
+        self.max_idle = max_idle
+        self._idle = {}
+
+    def acquire(self, sample_rate: int) -> KaldiRecognizer:
+        try:
+            return self._idle.setdefault(sample_rate, queue.Queue(self.max_idle)).get_nowait()
+        except queue.Empty:
+            return KaldiRecognizer(self.model, sample_rate)
+
+    def release(self, sample_rate: int, recognizer: KaldiRecognizer):
+        recognizer.Reset()
+        try:
+            self._idle[sample_rate].put_nowait(recognizer)
+        except queue.Full:
+            pass
+
+class VoskStream:
+    """Phiên nhận dạng theo luồng: giữ một recognizer riêng cho tới khi close()"""
+    def __init__(self, pool: RecognizerPool, sample_rate: int):
+        self.pool = pool
+        self.sample_rate = sample_rate
+        self.recognizer = pool.acquire(sample_rate)
+        self.segments = []
+        self.last_partial = ""
+
+    def accept(self, pcm: bytes):
+        """Đưa một đoạn PCM vào recognizer. Trả về {"type": "final"|"partial", "text"} khi có kết quả mới, ngược lại None."""
+        if self.recognizer.AcceptWaveform(pcm):
+            text = json.loads(self.recognizer.Result()).get("text", "")
+            self.last_partial = ""
+            if text:
+                self.segments.append(text)
+                return {"type": "final", "text": text}
+            return None
+        partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        if partial and partial != self.last_partial:
+            self.last_partial = partial
+            return {"type": "partial", "text": partial}
+        return None
+
+    def finish(self) -> str:
+        """Kết thúc luồng, trả về toàn bộ transcript"""
+        text = json.loads(self.recognizer.FinalResult()).get("text", "")
+        if text:
+            self.segments.append(text)
+        return " ".join(self.segments)
+
+    def close(self):
+        if self.recognizer is not None:
+            self.pool.release(self.sample_rate, self.recognizer)
+            self.recognizer = None
+
 class VoskSTTClient(STTClient):
     def __init__(self):
-        # Load Vosk model
-        self.model = Model(f"backend/models/{VOSK_MODEL_DIR}")
-        self.rec = KaldiRecognizer(self.model, 16000)
-
-    def transcribe(self, wav_path: str) -> str:
-        """Trả về văn bản đã chuyển đổi từ file WAV."""
-        transcript = ''
-        with wave.open(wav_path, 'rb') as wf:
-            while True:
-                data = wf.readframes(4000)
-                if len(data) == 0:
-                    break
-                if self.rec.AcceptWaveform(data):
-                    result = json.loads(self.rec.Result())
-                    logger.info(f"Partial result: {result}")
-                    transcript = result.get('text', '')
-                    break
-            if not transcript:
-                result = json.loads(self.rec.FinalResult())
-                logger.info(f"Final result: {result}")
-                transcript = result.get('text', '')
-        return transcript
\ No newline at end of file
+        workers = int(os.getenv("VOSK_PROCESS_WORKERS", "0"))
+        self.model = None
+        self.recognizers = None
+        self.process_pool = None
+        self._model_lock = threading.Lock()
+        # Chế độ process pool: giới hạn số audio chờ giải mã, quá giới hạn thì từ chối (503) như ExecutorService
+        self.process_limit = workers + int(os.getenv("VOSK_PROCESS_QUEUE", "32"))
+        self.process_pending = 0
+        self._pending_lock = threading.Lock()
+        if workers > 0:
+            # Dùng spawn thay vì fork: process cha đã có event loop và các thread pool
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(MODEL_PATH,)
+            )
+            logger.info(f"Vosk running in process pool mode with {workers} workers")
+        else:
+            # Load Vosk model
+            self.model = Model(MODEL_PATH)
+            self.recognizers = RecognizerPool(self.model, max_idle=int(os.getenv("VOSK_MAX_IDLE_RECOGNIZERS", "4")))
+
+    def submit_transcribe(self, pcm: bytes, sample_rate: int):
+        """Chế độ process pool: gửi audio cho process worker, phía gọi await Future này trực tiếp
+        nên không giữ thread nào của pool cpu-audio (để dành cho ffmpeg) trong lúc process khác giải mã."""
+        if not self.process_pool:
+            return None
+        with self._pending_lock:
+            if self.process_pending >= self.process_limit:
+                raise HTTPException(status_code=503, detail="Server busy (vosk), please try again")
+            self.process_pending += 1
+        try:
+            future = self.process_pool.submit(_transcribe_in_worker, pcm, sample_rate, FRAMES_PER_CHUNK * 2)
+        except BaseException:
+            self._release_pending(None)  # Pool đã đóng/hỏng
+            raise
+        future.add_done_callback(self._release_pending)
+        return future
+
+    def _release_pending(self, _future):
+        with self._pending_lock:
+            self.process_pending -= 1
+
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        """Nhận dạng PCM 16-bit mono bằng recognizer trong process hiện tại.
+        Blocking: được gọi trong pool cpu-audio của ExecutorService."""
+        if self.process_pool:
+            return self.submit_transcribe(pcm, sample_rate).result()
+        bytes_per_chunk = FRAMES_PER_CHUNK * 2
+        recognizer = self.recognizers.acquire(sample_rate)
+        try:
+            return decode_pcm(recognizer, pcm, bytes_per_chunk)
+        finally:
+            self.recognizers.release(sample_rate, recognizer)
+
+    def create_stream(self, sample_rate: int) -> VoskStream:
+        """Phiên nhận dạng theo luồng luôn chạy trong process hiện tại (recognizer phải giữ trạng thái giữa các đoạn),
+        ở chế độ process pool model sẽ được load thêm một lần khi có phiên stream đầu tiên."""
+        with self._model_lock:
+            if self.recognizers is None:
+                logger.info("Loading Vosk model in the main process for streaming recognition")
+                self.model = Model(MODEL_PATH)
+                self.recognizers = RecognizerPool(self.model, max_idle=int(os.getenv("VOSK_MAX_IDLE_RECOGNIZERS", "4")))
+        return VoskStream(self.recognizers, sample_rate)
+
+    def close(self):
+        if self.process_pool:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
@@ -3,20 +3,37 @@
 # Tuân thủ SRP: Chỉ xử lý logic nghiệp vụ, không xử lý API.
 
 import os
-import time
+import asyncio
+from contextlib import aclosing
+from typing import AsyncIterator
 from fastapi import HTTPException
 from .stt.stt_client import STTClient
 from .audio.audio_processor import AudioProcessor
+from .executor_service import ExecutorService
 from ..logging_config import logger
 
+# Sample rate của PCM gửi cho các STT client
+SAMPLE_RATE = 16000
+# Định dạng audio nhận qua luồng: PCM 16-bit mono thô, hoặc các đoạn WebM/Opus từ MediaRecorder (giải mã bằng ffmpeg)
+STREAM_FORMATS = {"pcm", "webm"}
+# Giới hạn độ dài một phiên stream (giây audio), tránh giữ recognizer vô thời hạn
+STREAM_MAX_SECONDS = int(os.getenv("STT_STREAM_MAX_SECONDS", "120"))
+
 class STTService:
-    def __init__(self, audio_processor: AudioProcessor, vosk_client: STTClient, assemblyai_client: STTClient, google_stt_client: STTClient):
+    def __init__(self, audio_processor: AudioProcessor, vosk_client: STTClient, assemblyai_client: STTClient, google_stt_client: STTClient, executor_service: ExecutorService):
         self.audio_processor = audio_processor
+        self.executor = executor_service
         self.clients = {
             "vosk": vosk_client,
             "assemblyai": assemblyai_client,
             "google": google_stt_client
         }
+        # Vosk giải mã cục bộ (CPU), các method còn lại gọi API bên ngoài
+        self.pools = {
+            "vosk": "cpu-audio",
+            "assemblyai": "io-provider",
+            "google": "io-provider"
+        }
         
     async def transcribe(self, audio_blob: bytes, method: str) -> dict:
         if not audio_blob:
@@ -25,34 +42,55 @@ class STTService:
         if method not in self.clients:
             raise HTTPException(status_code=400, detail=f"Unsupported STT method: {method}")
         
-        # Tạo tên file duy nhất với timestamp
-        timestamp = int(time.time() * 1000)
-        webm_path = f"backend/input_{timestamp}.webm"
-        wav_path = f"backend/input_{timestamp}.wav"
-        
         try:
-            # Lưu file WebM
-            with open(webm_path, 'wb') as f:
-                f.write(audio_blob)
             logger.info(f"Received audio size: {len(audio_blob)} bytes")
+            # Giải mã WebM sang PCM ngay trong bộ nhớ (ffmpeg qua pipe, không ghi file tạm)
+            pcm = await self.executor.run("cpu-audio", self.audio_processor.decode_to_pcm, audio_blob, SAMPLE_RATE)
 
-            # Chuyển đổi sang WAV
-            self.audio_processor.convert_to_wav(webm_path, wav_path)
-
-            # Gọi STT client tương ứng
-            transcript = self.clients[method].transcribe(wav_path)
+            # Gọi STT client tương ứng: client tự giao việc cho process pool thì chờ trực tiếp, không chiếm thread của pool
+            client = self.clients[method]
+            future = client.submit_transcribe(pcm, SAMPLE_RATE)
+            if future is not None:
+                transcript = await asyncio.wrap_future(future)
+            else:
+                transcript = await self.executor.run(self.pools[method], client.transcribe, pcm, SAMPLE_RATE)
             return {"transcript": transcript}
         except HTTPException as e:
             raise e
         except Exception as e:
             logger.error(f"Error: {e}")
             raise HTTPException(status_code=500, detail=str(e))
+    
+    async def stream_transcripts(self, audio_chunks: AsyncIterator[bytes], method: str, audio_format: str, sample_rate: int):
+        """Nhận dạng theo luồng: trả về các sự kiện {"type": "partial"|"final", "text"} ngay khi có kết quả,
+        kết thúc bằng {"type": "done", "transcript"} khi luồng audio kết thúc."""
+        if method not in self.clients or self.clients[method] is None:
+            raise HTTPException(status_code=400, detail=f"Unsupported STT method: {method}")
+        if audio_format not in STREAM_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported stream format: {audio_format}")
+        
+        client = self.clients[method]
+        try:
+            # Tạo recognizer có thể phải load model (lần đầu) nên cũng chạy trong pool
+            stream = await self.executor.run("cpu-audio", client.create_stream, sample_rate)
+        except NotImplementedError:
+            raise HTTPException(status_code=400, detail=f"STT method {method} does not support streaming")
+        
+        pcm_chunks = audio_chunks if audio_format == "pcm" else self.audio_processor.stream_to_pcm(audio_chunks, sample_rate)
+        max_bytes = STREAM_MAX_SECONDS * sample_rate * 2
+        received = 0
+        try:
+            async with aclosing(pcm_chunks):
+                async for pcm in pcm_chunks:
+                    received += len(pcm)
+                    if received > max_bytes:
+                        logger.warning(f"STT stream exceeded {STREAM_MAX_SECONDS}s, finishing early")
+                        break
+                    event = await self.executor.run("cpu-audio", stream.accept, pcm)
+                    if event:
+                        yield event
+            transcript = await self.executor.run("cpu-audio", stream.finish)
+            logger.info(f"Streamed transcript: {transcript}")
+            yield {"type": "done", "transcript": transcript}
         finally:
-            # Xóa file âm thanh
-            for file_path in [webm_path, wav_path]:
-                if os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                        logger.info(f"Deleted {file_path}")
-                    except OSError as e:
-                        logger.warning(f"Warning: Could not delete files {file_path} - {e}")
\ No newline at end of file
+            stream.close()
@@ -0,0 +1,49 @@
+# services/translation/translation_cache.py
+# Bộ đệm hai tầng cho kết quả dịch: LRU trong process, sau đó collection translation_cache trong MongoDB (có TTL).
+# Khóa theo (text đã chuẩn hóa khoảng trắng, source, target, engine): câu gợi ý và câu trả lời AI lặp lại nhiều giữa các người dùng
+# nên đa số lượt dịch không cần gọi mạng.
+# Tuân thủ SRP: Chỉ quản lý bộ đệm, việc gọi engine dịch do TranslationService / AIService đảm nhiệm.
+
+import os
+import json
+import hashlib
+from datetime import datetime, timedelta
+from ..two_tier_cache import TwoTierCache
+from ...repositories.translation_repository import TranslationRepository
+
+def normalize_text(text: str) -> str:
+    """Bỏ khoảng trắng thừa để các câu chỉ khác nhau về khoảng trắng dùng chung bản dịch"""
+    return " ".join(text.split())
+
+class TranslationCache(TwoTierCache):
+    def __init__(self, translation_repository: TranslationRepository, max_entries: int = None):
+        super().__init__(translation_repository, max_entries or int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "5000")))
+        self.ttl_seconds = int(os.getenv("TRANSLATION_CACHE_TTL", str(90 * 24 * 3600)))
+
+    @staticmethod
+    def make_key(text: str, source: str, target: str, engine: str) -> str:
+        """Hash SHA-256 (text có thể dài); json.dumps để các trường không thể ghép nhầm vào nhau"""
+        payload = json.dumps([normalize_text(text), source, target, engine], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, text: str, source: str, target: str, engine: str):
+        """Trả về bản dịch đã lưu, hoặc None nếu chưa có"""
+        entry = await self._get_entry(self.make_key(text, source, target, engine))
+        return entry["translated"] if entry else None
+
+    async def get_many(self, texts: list, source: str, target: str, engine: str) -> dict:
+        """Tra nhiều câu cùng lúc. Trả về {text: bản dịch} chỉ cho các câu đã có trong bộ đệm."""
+        keys = {text: self.make_key(text, source, target, engine) for text in texts}
+        entries = await self._get_entries(list(keys.values()))
+        return {text: entries[key]["translated"] for text, key in keys.items() if key in entries}
+
+    async def put(self, text: str, source: str, target: str, engine: str, translated: str):
+        """Lưu bản dịch (phía gọi không lưu kết quả rỗng/lỗi)"""
+        await self._put_entry(self.make_key(text, source, target, engine), {
+            "text": normalize_text(text),
+            "source": source,
+            "target": target,
+            "engine": engine,
+            "translated": translated,
+            "expiresAt": datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+        }, self.ttl_seconds)
@@ -1,18 +1,102 @@
 # services/translation_service.py
 # Xử lý logic nghiệp vụ liên quan đến dịch văn bản.
 # Gọi TranslationClient để thực hiện dịch.
+# Dịch theo lô: gộp nhiều câu vào một lần gọi (ngăn cách bằng dấu phân tách không xuất hiện trong các câu),
+# tách lại sau khi dịch; số đoạn không khớp thì dịch riêng từng câu của lô đó.
 # Tuân thủ SRP: Chỉ xử lý logic nghiệp vụ, không xử lý API.
 
+import os
+import re
+import asyncio
 from fastapi import HTTPException
 from .translation.translation_client import TranslationClient
+from .translation.translation_cache import TranslationCache
+from .executor_service import ExecutorService
+from .single_flight import SingleFlight
+from ..logging_config import logger
+
+TRANSLATION_ENGINE = "google"
+# Dấu phân tách giữa các câu trong một lô, chọn dấu đầu tiên không xuất hiện trong lô
+BATCH_SEPARATORS = ["|||", "@@@", "~~~", "^^^"]
 
 class TranslationService:
-    def __init__(self, translation_client: TranslationClient):
+    def __init__(self, translation_client: TranslationClient, executor_service: ExecutorService, translation_cache: TranslationCache = None, single_flight: SingleFlight = None):
         self.translation_client = translation_client
+        self.executor = executor_service
+        self.translation_cache = translation_cache
+        self.single_flight = single_flight or SingleFlight()
+        # GoogleTranslator giới hạn 5000 ký tự mỗi lần gọi
+        self.batch_max_chars = int(os.getenv("TRANSLATION_BATCH_MAX_CHARS", "4500"))
 
     async def translate(self, text: str, target_lang: str) -> dict:
         try:
-            translated = self.translation_client.translate(text, source="auto", target=target_lang)
+            if self.translation_cache:
+                translated = await self.translation_cache.get(text, "auto", target_lang, TRANSLATION_ENGINE)
+                if translated is not None:
+                    return {"translatedText": translated}
+            # Cùng câu, cùng ngôn ngữ đích đang được dịch: chờ chung kết quả
+            key = TranslationCache.make_key(text, "auto", target_lang, TRANSLATION_ENGINE)
+            translated = await self.single_flight.do("translate", key, self._translate_uncached, text, target_lang)
             return {"translatedText": translated}
+        except HTTPException:
+            raise
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Translation error: {str(e)}")
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=f"Translation error: {str(e)}")
+
+    async def _translate_uncached(self, text: str, target_lang: str) -> str:
+        translated = await self.executor.run("io-provider", self.translation_client.translate, text, source="auto", target=target_lang)
+        if translated and self.translation_cache:
+            await self.translation_cache.put(text, "auto", target_lang, TRANSLATION_ENGINE, translated)
+        return translated
+
+    async def translate_many(self, texts: list, target_lang: str) -> list:
+        """Dịch nhiều câu, trả về danh sách bản dịch cùng thứ tự (None cho câu dịch lỗi, phía gọi vẫn dùng được các câu còn lại).
+        Câu đã có trong bộ đệm không gọi mạng; các câu còn lại được gộp thành ít lần gọi nhất có thể."""
+        cached = await self.translation_cache.get_many(texts, "auto", target_lang, TRANSLATION_ENGINE) if self.translation_cache else {}
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+        if missing:
+            logger.info(f"Translating {len(missing)} texts in batches ({len(cached)} cached)")
+            batches = await asyncio.gather(*(self._translate_batch(batch, target_lang) for batch in self._pack(missing)), return_exceptions=True)
+            for batch in batches:
+                if isinstance(batch, Exception):
+                    logger.error(f"Batch translation failed: {getattr(batch, 'detail', batch)}")
+                else:
+                    cached.update(batch)
+        return [cached.get(text) for text in texts]
+
+    def _pack(self, texts: list) -> list:
+        """Chia các câu thành các lô có tổng độ dài không quá batch_max_chars"""
+        batches, current, size = [], [], 0
+        for text in texts:
+            if current and size + len(text) + 2 * len(BATCH_SEPARATORS[0]) > self.batch_max_chars:
+                batches.append(current)
+                current, size = [], 0
+            current.append(text)
+            size += len(text) + 2 * len(BATCH_SEPARATORS[0])
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _translate_batch(self, texts: list, target_lang: str) -> dict:
+        """Dịch một lô trong một lần gọi, trả về {text: bản dịch} (bỏ qua câu dịch lỗi khi phải dịch riêng từng câu)"""
+        separator = next((sep for sep in BATCH_SEPARATORS if not any(sep in text for text in texts)), None)
+        if len(texts) > 1 and separator:
+            packed = f"\n{separator}\n".join(texts)
+            translated = await self.executor.run("io-provider", self.translation_client.translate, packed, source="auto", target=target_lang)
+            # Engine có thể thêm/bớt khoảng trắng quanh dấu phân tách
+            parts = [part.strip() for part in re.split(rf"\s*{re.escape(separator)}\s*", translated or "")]
+            if len(parts) == len(texts) and all(parts):
+                if self.translation_cache:
+                    for text, part in zip(texts, parts):
+                        await self.translation_cache.put(text, "auto", target_lang, TRANSLATION_ENGINE, part)
+                return dict(zip(texts, parts))
+            logger.warning(f"Batch translation returned {len(parts)} parts for {len(texts)} texts, translating one by one")
+        # Lô một câu, không tìm được dấu phân tách, hoặc bản dịch bị lệch: dịch riêng từng câu (vẫn qua bộ đệm và single-flight)
+        results = await asyncio.gather(*(self.translate(text, target_lang) for text in texts), return_exceptions=True)
+        translated = {}
+        for text, result in zip(texts, results):
+            if isinstance(result, Exception):
+                logger.error(f"Translation failed for '{text[:50]}': {getattr(result, 'detail', result)}")
+            else:
+                translated[text] = result["translatedText"]
+        return translated
@@ -2,13 +2,22 @@
 # Triển khai TTSClient cho gTTS.
 # Tuân thủ SRP: Chỉ xử lý logic liên quan đến gTTS.
 
+import io
 from gtts import gTTS
 from .tts_client import TTSClient
 from ...logging_config import logger
 
 class GTTSClient(TTSClient):
-    def generate_audio(self, text: str, output_path: str) -> str:
-        tts = gTTS(text=text, lang='en')
-        tts.save(output_path)
-        logger.info(f'Generated audio with gTTS: {output_path}')
-        return output_path
\ No newline at end of file
+    audio_format = "mp3"
+    voice = "en"
+    
+    def generate_audio(self, text: str) -> bytes:
+        tts = gTTS(text=text, lang=self.voice)
+        buffer = io.BytesIO()
+        tts.write_to_fp(buffer)
+        logger.info(f'Generated audio with gTTS: {buffer.tell()} bytes')
+        return buffer.getvalue()
+    
+    def stream_audio(self, text: str):
+        # gTTS chia text dài thành nhiều phần, mỗi phần là một request tới Google và một đoạn MP3 hoàn chỉnh
+        yield from gTTS(text=text, lang=self.voice).stream()
@@ -1,27 +1,60 @@
 # services/tts/piper_client.py
 # Triển khai TTSClient cho Piper.
+# Mặc định dùng pool worker Piper chạy lâu dài (PIPER_WORKERS, cần piper-tts); PIPER_WORKERS=0 hoặc worker không load được
+# giọng đọc thì quay về chạy piper.exe cho mỗi request.
 # Tuân thủ SRP: Chỉ xử lý logic liên quan đến Piper.
 
 import os
+import json
 import subprocess
 from fastapi import HTTPException
 from ...utils import BASE_DIR
+from ..audio.audio_processor import pcm_to_wav
 from .tts_client import TTSClient
+from .piper_worker_pool import PiperWorkerPool, PiperWorkerError, PiperWorkerUnavailable
 from ...logging_config import logger
 
 class PiperClient(TTSClient):
+    audio_format = "wav"
+    stream_format = "pcm"
+    
     def __init__(self):
         self.piper_exe = os.path.join(BASE_DIR, "models/piper", "piper.exe")
-        self.model_path = os.path.join(BASE_DIR, "models/piper", os.getenv("PIPER_VOICE"))
+        self.voice = os.getenv("PIPER_VOICE")
+        self.model_path = os.path.join(BASE_DIR, "models/piper", self.voice)
+        # Sample rate của giọng đọc nằm trong file cấu hình <voice>.onnx.json đi kèm model
+        with open(f"{self.model_path}.json", encoding="utf-8") as f:
+            self.sample_rate = json.load(f)["audio"]["sample_rate"]
+        workers = int(os.getenv("PIPER_WORKERS", "2"))
+        self.worker_pool = PiperWorkerPool(self.model_path, workers) if workers > 0 else None
 
-    def generate_audio(self, text: str, output_path: str) -> str:
-        cmd = [self.piper_exe, "--model", self.model_path, "--output_file", output_path]
-        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        process.stdin.write(text)
-        process.stdin.close()
-        stdout, stderr = process.communicate()
+    def generate_audio(self, text: str) -> bytes:
+        pcm = b"".join(self.stream_audio(text))
+        logger.info(f'Generated audio with Piper: {len(pcm)} bytes of PCM')
+        return pcm_to_wav(pcm, self.sample_rate)
+
+    def stream_audio(self, text: str):
+        # Worker gửi PCM theo từng câu; chạy piper.exe cho mỗi request thì chỉ có một đoạn khi tiến trình kết thúc
+        if self.worker_pool and not self.worker_pool.unavailable:
+            try:
+                yield from self.worker_pool.synthesize(text)
+                return
+            except PiperWorkerUnavailable as e:
+                logger.warning(f'Piper worker pool unavailable, falling back to one process per request: {e}')
+            except PiperWorkerError as e:
+                logger.error(f'Piper worker error: {e}')
+                raise HTTPException(status_code=500, detail="Failed to generate audio with Piper")
+        yield self._synthesize_with_process(text)
+
+    def _synthesize_with_process(self, text: str) -> bytes:
+        # --output-raw: ghi PCM 16-bit mono ra stdout thay vì ra file
+        cmd = [self.piper_exe, "--model", self.model_path, "--output-raw"]
+        process = subprocess.run(cmd, input=text.encode("utf-8"), capture_output=True)
         if process.returncode != 0:
-            logger.error(f'Piper error: {stderr}')
+            logger.error(f'Piper error: {process.stderr.decode(errors="ignore")}')
             raise HTTPException(status_code=500, detail="Failed to generate audio with Piper")
-        logger.info(f'Generated audio with Piper: {output_path}')
-        return output_path
\ No newline at end of file
+        return process.stdout
+
+    def close(self):
+        if self.worker_pool:
+            self.worker_pool.close()
@@ -0,0 +1,67 @@
+# services/tts/piper_worker.py
+# Process worker Piper chạy lâu dài: load giọng đọc (ONNX) một lần, sau đó nhận lệnh qua stdin và trả PCM qua stdout.
+# Được PiperWorkerPool khởi chạy bằng: python piper_worker.py <model_path>. Cần thư viện piper-tts.
+# Giao thức:
+# - stdin: mỗi dòng một JSON, {"text": "..."} để tổng hợp hoặc {"ping": true} để kiểm tra sức khỏe
+# - stdout: các frame [độ dài int32 big-endian][dữ liệu]. Độ dài > 0: một đoạn PCM 16-bit mono,
+#   0: kết thúc phản hồi (sau lần load model, sau mỗi câu lệnh), < 0: thông báo lỗi UTF-8 dài -n byte (kết thúc phản hồi)
+# Tuân thủ SRP: Chỉ chạy mô hình Piper, không biết gì về pool hay HTTP.
+
+import os
+import sys
+import json
+import struct
+
+def write_frame(out, payload: bytes):
+    out.write(struct.pack(">i", len(payload)))
+    out.write(payload)
+
+def write_error(out, message: str):
+    data = message.encode("utf-8")
+    out.write(struct.pack(">i", -len(data)))
+    out.write(data)
+    out.flush()
+
+def write_end(out):
+    out.write(struct.pack(">i", 0))
+    out.flush()
+
+def iter_pcm(voice, text: str):
+    """piper-tts < 1.3 có synthesize_stream_raw (bytes), từ 1.3 synthesize trả về các AudioChunk"""
+    if hasattr(voice, "synthesize_stream_raw"):
+        yield from voice.synthesize_stream_raw(text)
+    else:
+        for chunk in voice.synthesize(text):
+            yield chunk.audio_int16_bytes
+
+def main():
+    # Giữ fd 1 gốc riêng cho giao thức, chuyển fd 1 sang stderr trước khi import piper/onnxruntime/espeak:
+    # mọi thứ lỡ in ra stdout sẽ không làm lệch các frame
+    sys.stdout.flush()
+    out = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    try:
+        from piper.voice import PiperVoice
+        voice = PiperVoice.load(sys.argv[1])
+    except Exception as e:
+        write_error(out, f"Failed to load Piper voice: {e}")
+        return 1
+    write_end(out)  # Báo sẵn sàng
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            command = json.loads(line)
+            if not command.get("ping"):
+                for pcm in iter_pcm(voice, command["text"]):
+                    if pcm:
+                        write_frame(out, pcm)
+                        out.flush()  # Gửi từng đoạn ngay khi có để phía gọi có thể phát trước
+            write_end(out)
+        except Exception as e:
+            write_error(out, str(e))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+# services/tts/piper_worker_pool.py
+# Pool các process Piper chạy lâu dài (xem piper_worker.py): giọng đọc chỉ load một lần cho mỗi worker,
+# nên độ trễ của mỗi câu chỉ còn là thời gian tổng hợp.
+# Có kiểm tra sức khỏe định kỳ (ping worker rảnh), tự khởi động lại worker bị crash hoặc bị treo.
+# Tuân thủ SRP: Chỉ quản lý vòng đời các worker và giao thức với chúng, không xử lý định dạng audio.
+
+import os
+import sys
+import json
+import queue
+import struct
+import threading
+import subprocess
+from fastapi import HTTPException
+from ...logging_config import logger
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "piper_worker.py")
+
+class PiperWorkerError(Exception):
+    """Worker chết hoặc bị treo giữa chừng, cần khởi động lại"""
+
+class PiperCommandError(PiperWorkerError):
+    """Worker vẫn sống nhưng báo lỗi cho câu lệnh (vd: text không tổng hợp được)"""
+
+class PiperWorkerTimeout(PiperWorkerError):
+    """Worker không phản hồi trong thời gian cho phép và đã bị kill"""
+
+class PiperWorkerUnavailable(PiperWorkerError):
+    """Worker không load được giọng đọc (vd: chưa cài piper-tts), khởi động lại cũng không giúp được"""
+
+class PiperWorker:
+    def __init__(self, worker_id: int, model_path: str):
+        self.worker_id = worker_id
+        self.model_path = model_path
+        self.process = None
+        self.ready = False
+        self.timed_out = False
+
+    def start(self):
+        self.process = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT, self.model_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+        self.ready = False
+        self.timed_out = False
+        logger.info(f"Started Piper worker {self.worker_id} (pid {self.process.pid})")
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def kill(self):
+        if self.is_alive():
+            self.process.kill()
+
+    def _on_timeout(self):
+        self.timed_out = True
+        self.kill()
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()  # Worker thoát khi stdin đóng
+            self.process.wait(timeout=2)
+        except Exception:
+            self.process.kill()
+
+    def restart(self):
+        self.kill()
+        self.stop()
+        self.start()
+
+    def _read_exact(self, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            chunk = self.process.stdout.read(size - len(data))
+            if not chunk:
+                if self.timed_out:
+                    raise PiperWorkerTimeout(f"Piper worker {self.worker_id} timed out")
+                raise PiperWorkerError(f"Piper worker {self.worker_id} exited (code {self.process.poll()})")
+            data += chunk
+        return data
+
+    def _read_response(self, timeout: float):
+        """Đọc các frame của một phản hồi, trả về từng đoạn PCM cho tới frame kết thúc.
+        Quá timeout thì worker bị kill (đọc stdout sẽ gặp EOF) để không treo thread gọi."""
+        watchdog = threading.Timer(timeout, self._on_timeout)
+        watchdog.daemon = True
+        watchdog.start()
+        finished = False
+        try:
+            while True:
+                (size,) = struct.unpack(">i", self._read_exact(4))
+                if size == 0:
+                    finished = True
+                    return
+                if size < 0:
+                    finished = True
+                    raise PiperCommandError(self._read_exact(-size).decode("utf-8", errors="ignore"))
+                yield self._read_exact(size)
+        finally:
+            # Phía gọi dừng sớm: đọc bỏ phần còn lại để phản hồi sau không bị lẫn dữ liệu cũ
+            while not finished and self.is_alive():
+                try:
+                    (size,) = struct.unpack(">i", self._read_exact(4))
+                    self._read_exact(abs(size))
+                    finished = size <= 0
+                except PiperWorkerError:
+                    break
+            watchdog.cancel()
+
+    def _send(self, command: dict):
+        try:
+            self.process.stdin.write((json.dumps(command) + "\n").encode("utf-8"))
+            self.process.stdin.flush()
+        except OSError as e:
+            raise PiperWorkerError(f"Piper worker {self.worker_id} is not accepting input: {e}")
+
+    def wait_ready(self, timeout: float):
+        """Chờ worker load xong giọng đọc"""
+        if self.ready:
+            return
+        try:
+            for _ in self._read_response(timeout):
+                pass
+        except PiperCommandError as e:
+            raise PiperWorkerUnavailable(str(e))
+        self.ready = True
+
+    def ping(self, timeout: float):
+        self._send({"ping": True})
+        for _ in self._read_response(timeout):
+            pass
+
+    def synthesize(self, text: str, timeout: float):
+        self._send({"text": text})
+        yield from self._read_response(timeout)
+
+class PiperWorkerPool:
+    def __init__(self, model_path: str, size: int = None):
+        self.size = size or int(os.getenv("PIPER_WORKERS", "2"))
+        self.load_timeout = float(os.getenv("PIPER_LOAD_TIMEOUT", "60"))
+        self.synthesis_timeout = float(os.getenv("PIPER_SYNTHESIS_TIMEOUT", "30"))
+        self.acquire_timeout = float(os.getenv("PIPER_ACQUIRE_TIMEOUT", "30"))
+        self.health_interval = float(os.getenv("PIPER_HEALTH_INTERVAL", "30"))
+        self.restarts = 0
+        self.unavailable = None  # Lý do không dùng được pool (vd: thiếu piper-tts), khi đó PiperClient chạy piper theo từng request
+        self._idle = queue.Queue()
+        self._closed = threading.Event()
+        for worker_id in range(self.size):
+            worker = PiperWorker(worker_id, model_path)
+            worker.start()
+            self._idle.put(worker)
+        self._health_thread = threading.Thread(target=self._health_loop, name="piper-health", daemon=True)
+        self._health_thread.start()
+        logger.info(f"Piper worker pool started with {self.size} workers")
+
+    def _restart(self, worker: PiperWorker, reason: str):
+        logger.warning(f"Restarting Piper worker {worker.worker_id}: {reason}")
+        self.restarts += 1
+        worker.restart()
+
+    def _ensure_ready(self, worker: PiperWorker):
+        if not worker.is_alive():
+            self._restart(worker, f"process exited (code {worker.process.poll()})")
+        try:
+            worker.wait_ready(self.load_timeout)
+        except PiperWorkerUnavailable as e:
+            self.unavailable = str(e)
+            raise
+
+    def _acquire(self) -> PiperWorker:
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise HTTPException(status_code=503, detail="All Piper workers are busy, please try again")
+
+    def synthesize(self, text: str):
+        """Tổng hợp text, trả về từng đoạn PCM 16-bit mono ngay khi worker gửi về.
+        Blocking: gọi trong thread của pool cpu-audio. Worker chết trước khi gửi được đoạn nào thì thử lại một lần trên worker mới."""
+        worker = self._acquire()
+        try:
+            for attempt in range(2):
+                self._ensure_ready(worker)
+                produced = False
+                try:
+                    for pcm in worker.synthesize(text, self.synthesis_timeout):
+                        produced = True
+                        yield pcm
+                    return
+                except PiperCommandError:
+                    raise  # Lỗi của câu lệnh, thử lại cũng vậy
+                except PiperWorkerError as e:
+                    self._restart(worker, str(e))
+                    # Không thử lại khi đã gửi audio cho phía gọi, hoặc khi bị treo (câu này nhiều khả năng lại treo)
+                    if produced or attempt == 1 or isinstance(e, PiperWorkerTimeout):
+                        raise
+        finally:
+            self._idle.put(worker)
+
+    def _health_loop(self):
+        while not self._closed.wait(self.health_interval):
+            if self.unavailable:
+                return
+            # Chỉ kiểm tra các worker đang rảnh, worker đang bận đã có timeout của request
+            for _ in range(self._idle.qsize()):
+                try:
+                    worker = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    if worker.ready:
+                        worker.ping(self.synthesis_timeout)
+                    elif not worker.is_alive():
+                        raise PiperWorkerError(f"process exited (code {worker.process.poll()})")
+                except PiperWorkerError as e:
+                    self._restart(worker, f"health check failed: {e}")
+                    try:
+                        self._ensure_ready(worker)  # Load sẵn giọng đọc để request sau không phải chờ
+                    except PiperWorkerError as e:
+                        logger.error(f"Piper worker {worker.worker_id} failed to start: {e}")
+                finally:
+                    self._idle.put(worker)
+
+    def get_metrics(self) -> dict:
+        return {"workers": self.size, "idle": self._idle.qsize(), "restarts": self.restarts, "unavailable": self.unavailable}
+
+    def close(self):
+        self._closed.set()
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
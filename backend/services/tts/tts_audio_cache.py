@@ -0,0 +1,46 @@
+# services/tts/tts_audio_cache.py
+# Bộ đệm audio TTS theo nội dung (content-addressed): cùng (text, method, voice, format) luôn ra cùng một object trong bucket,
+# nên mỗi câu chỉ cần tổng hợp và upload một lần.
+# Tra cứu hai tầng: LRU trong process, sau đó chỉ mục tts_audio trong MongoDB (dùng chung giữa các worker).
+# Tuân thủ SRP: Chỉ quản lý khóa và chỉ mục audio, việc tổng hợp/upload do TTSService đảm nhiệm.
+
+import os
+import json
+import hashlib
+from datetime import datetime
+from ..two_tier_cache import TwoTierCache
+from ...database.index_registry import TTS_AUDIO_TTL_SECONDS
+from ...repositories.tts_audio_repository import TTSAudioRepository
+
+class TTSAudioCache(TwoTierCache):
+    def __init__(self, tts_audio_repository: TTSAudioRepository, max_entries: int = None):
+        super().__init__(tts_audio_repository, max_entries or int(os.getenv("TTS_CACHE_MAX_ENTRIES", "2048")))
+
+    @staticmethod
+    def make_key(text: str, method: str, voice: str, audio_format: str) -> str:
+        """Hash SHA-256 của nội dung audio; json.dumps để các trường không thể ghép nhầm vào nhau"""
+        payload = json.dumps([text, method, voice, audio_format], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def object_name(key: str, audio_format: str) -> str:
+        return f"tts_{key}.{audio_format}"
+
+    def _remaining_ttl(self, entry: dict) -> float:
+        # TTL index của tts_audio tính theo createdAt (khớp với thời hạn object trong bucket)
+        return TTS_AUDIO_TTL_SECONDS - (datetime.utcnow() - entry["createdAt"]).total_seconds()
+
+    async def get(self, key: str):
+        """Trả về tên object đã upload, hoặc None nếu chưa có (hoặc sắp bị dọn khỏi bucket)"""
+        entry = await self._get_entry(key)
+        return entry["object_name"] if entry else None
+
+    async def put(self, key: str, object_name: str, text: str, method: str, voice: str):
+        """Ghi nhận object vừa upload. Lỗi ghi chỉ mục không làm hỏng request: lần sau sẽ tổng hợp lại."""
+        await self._put_entry(key, {
+            "object_name": object_name,
+            "text": text,
+            "method": method,
+            "voice": voice,
+            "createdAt": datetime.utcnow(),
+        }, TTS_AUDIO_TTL_SECONDS)
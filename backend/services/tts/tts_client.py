@@ -3,8 +3,22 @@
 # Tuân thủ DIP: Các module cấp cao chỉ phụ thuộc vào abstraction này.
 
 from abc import ABC, abstractmethod
+from typing import Iterator
 
 class TTSClient(ABC):
+    # Định dạng của audio trả về từ generate_audio ("mp3", "wav"), TTSService chuyển sang MP3 nếu cần
+    audio_format = "mp3"
+    # Giọng đọc đang dùng, là một phần của khóa bộ đệm audio (đổi giọng thì không dùng lại audio cũ)
+    voice = ""
+    # Định dạng các đoạn audio từ stream_audio: "mp3" hoặc "pcm" (16-bit mono, theo sample_rate của client)
+    stream_format = "mp3"
+    
     @abstractmethod
-    def generate_audio(self, text: str, output_path: str) -> str:
-        pass
\ No newline at end of file
+    def generate_audio(self, text: str) -> bytes:
+        """Tổng hợp giọng nói, trả về audio trong bộ nhớ theo audio_format."""
+        pass
+    
+    def stream_audio(self, text: str) -> Iterator[bytes]:
+        """Tổng hợp giọng nói theo luồng, trả về từng đoạn audio theo stream_format ngay khi có.
+        Mặc định trả toàn bộ audio trong một đoạn."""
+        yield self.generate_audio(text)
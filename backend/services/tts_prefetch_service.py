@@ -0,0 +1,89 @@
+# services/tts_prefetch_service.py
+# Tổng hợp trước (pre-synthesis) audio cho câu trả lời AI và câu gợi ý ngay khi có text, chạy nền,
+# để audio thường đã sẵn sàng (nằm trong bộ đệm TTS) trước khi người dùng bấm phát.
+# Hàng đợi có khử trùng lặp: cùng (text, method) chỉ tổng hợp một lần, các yêu cầu trùng gộp chung kết quả.
+# Tuân thủ SRP: Chỉ điều phối hàng đợi, việc tổng hợp/upload do TTSService đảm nhiệm.
+
+import os
+import asyncio
+from .tts_service import TTSService
+from ..logging_config import logger
+
+class TTSPrefetchService:
+    def __init__(self, tts_service: TTSService, workers: int = None, queue_size: int = None):
+        self.tts_service = tts_service
+        self.workers = workers if workers is not None else int(os.getenv("TTS_PREFETCH_WORKERS", "2"))
+        self.queue_size = queue_size or int(os.getenv("TTS_PREFETCH_QUEUE", "256"))
+        self.default_method = os.getenv("TTS_PREFETCH_METHOD", "gtts")
+        self._queue = None
+        self._tasks = []
+        # (text, method) -> các callback chờ URL audio; có mặt trong dict nghĩa là job đang chờ hoặc đang chạy
+        self._pending = {}
+        self.metrics = {"enqueued": 0, "deduplicated": 0, "dropped": 0, "completed": 0, "failed": 0}
+
+    def _start(self):
+        # Khởi động worker khi có job đầu tiên (cần event loop đang chạy)
+        self._queue = asyncio.Queue(self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"TTS prefetch started with {self.workers} workers")
+
+    def enqueue(self, text: str, method: str = None, on_audio_ready=None):
+        """Thêm job tổng hợp (không chờ). on_audio_ready(audio_url): coroutine ghi URL vào nơi cần (tin nhắn, suggestion).
+        Chỉ truyền on_audio_ready khi method là giọng người dùng đã chọn: không có method thì dùng TTS_PREFETCH_METHOD,
+        kết quả chỉ nên nằm trong bộ đệm TTS. Hàng đợi đầy thì bỏ qua: frontend vẫn tự gọi /tts khi phát."""
+        if not text or self.workers <= 0:
+            return
+        method = method or self.default_method
+        key = (text, method)
+        callbacks = self._pending.get(key)
+        if callbacks is not None:
+            if on_audio_ready:
+                callbacks.append(on_audio_ready)
+            self.metrics["deduplicated"] += 1
+            return
+        if self._queue is None:
+            self._start()
+        try:
+            self._queue.put_nowait(key)
+        except asyncio.QueueFull:
+            self.metrics["dropped"] += 1
+            logger.warning(f"TTS prefetch queue full, dropped: {text[:50]}")
+            return
+        self._pending[key] = [on_audio_ready] if on_audio_ready else []
+        self.metrics["enqueued"] += 1
+
+    async def _worker(self):
+        while True:
+            key = await self._queue.get()
+            text, method = key
+            try:
+                audio_url = await self.tts_service.ensure_audio(text, method)
+                self.metrics["completed"] += 1
+            except Exception as e:
+                detail = getattr(e, "detail", str(e))
+                logger.error(f"TTS prefetch failed for {method}: {detail}")
+                self.metrics["failed"] += 1
+                audio_url = None
+            # Lấy danh sách callback sau khi tổng hợp xong: các yêu cầu trùng đến trong lúc chạy cũng nhận được URL
+            callbacks = self._pending.pop(key, [])
+            if audio_url:
+                for callback in callbacks:
+                    try:
+                        await callback(audio_url)
+                    except Exception as e:
+                        logger.error(f"Failed to record prefetched audio URL: {getattr(e, 'detail', e)}")
+            self._queue.task_done()
+
+    def get_metrics(self) -> dict:
+        return {
+            **self.metrics,
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "pending": len(self._pending),
+        }
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -1,84 +1,99 @@
 # services/tts/tts_service.py
 # Xử lý logic nghiệp vụ liên quan đến TTS: xử lý file âm thanh, gọi dịch vụ TTS, upload lên MinIO.
+# Audio được lưu theo hash nội dung, kiểm tra bộ đệm trước khi tổng hợp.
+# Chế độ stream: gửi audio cho client ngay khi mã hóa xong từng đoạn, đồng thời giữ lại để upload nền lên MinIO.
 # Tuân thủ SRP: Chỉ xử lý logic nghiệp vụ, không xử lý API.
 
+import io
 import os
-import time
-import re
+import asyncio
+import functools
+from contextlib import aclosing
 from fastapi import HTTPException, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
 from .tts.tts_client import TTSClient
+from .tts.tts_audio_cache import TTSAudioCache
 from .audio.audio_processor import AudioProcessor
+from .executor_service import ExecutorService
+from .single_flight import SingleFlight
 from ..storage.storage_client import StorageClient
-from ..utils import CACHE_DIR
 from ..logging_config import logger
 
+# Object audio theo nội dung không bao giờ thay đổi: trình duyệt/proxy được phép cache vĩnh viễn
+AUDIO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+AUDIO_FORMAT = "mp3"
+
+# Giữ tham chiếu tới các task upload nền để không bị garbage collect giữa chừng
+_upload_tasks = set()
+
 class TTSService:
-    def __init__(self, audio_processor: AudioProcessor, storage_client: StorageClient, gtts_client: TTSClient, piper_client: TTSClient):
+    def __init__(self, audio_processor: AudioProcessor, storage_client: StorageClient, gtts_client: TTSClient, piper_client: TTSClient, executor_service: ExecutorService, audio_cache: TTSAudioCache, single_flight: SingleFlight = None):
         self.audio_processor = audio_processor
         self.storage_client = storage_client
+        self.executor = executor_service
+        self.audio_cache = audio_cache
+        self.single_flight = single_flight or SingleFlight()
         self.clients = {
             "gtts": gtts_client,
             "piper": piper_client
         }
         self.audio_bucket = os.getenv("AUDIO_BUCKET")
-
-    def santize_filename(self, filename: str) -> str:
-        """
-        Loại bỏ hoặc thay thế các ký tự không hợp lệ trong tên file.
-        """
-        # Thay thế các ký tự không hợp lệ bằng '_'
-        sanitized = re.sub(r'[^\w\s.-]', '_', filename)
-        # Loại bỏ khoảng trắng thừa và thay bằng '_'
-        sanitized = sanitized.strip().replace(' ', '_')
-        return sanitized
     
-    async def generate_audio(self, text: str, method: str) -> Response:
+    def _get_client(self, text: str, method: str) -> TTSClient:
         if not text:
             raise HTTPException(status_code=400, detail="No text provided")
 
-        if method not in self.clients:
+        if method not in self.clients or self.clients[method] is None:
             raise HTTPException(status_code=400, detail=f"Unsupported TTS method: {method}")
+        return self.clients[method]
 
-        # Phân biệt từ đơn và đoạn chat
-        is_single_word = ' ' not in text
-        timestamp = int(time.time() * 1000)
-        # Làm sạch tên file nếu là từ đơn
-        sanitized_text = self.santize_filename(text) if is_single_word else f"output_{timestamp}"
-        audio_filename = f"{sanitized_text}.mp3"
-        temp_path = f"temp_{timestamp}.mp3"
-        wav_path = os.path.join(CACHE_DIR, f"output_{timestamp}.wav") if method == "piper" else None
+    def _synthesis_pool(self, method: str) -> str:
+        # gTTS gọi API Google, Piper chạy model cục bộ
+        return "io-provider" if method == "gtts" else "cpu-audio"
 
+    async def _upload(self, cache_key: str, audio_filename: str, audio: bytes, text: str, method: str, voice: str):
+        """Upload audio lên MinIO trực tiếp từ bộ nhớ và ghi vào bộ đệm"""
+        await self.executor.run(
+            "io-storage",
+            self.storage_client.put_object,
+            bucket_name=self.audio_bucket,
+            object_name=audio_filename,
+            data=io.BytesIO(audio),
+            length=len(audio),
+            content_type='audio/mpeg',
+            cache_control=AUDIO_CACHE_CONTROL
+        )
+        logger.info(f'Uploaded to MinIO: {audio_filename}')
+        await self.audio_cache.put(cache_key, audio_filename, text, method, voice)
+    
+    async def ensure_audio(self, text: str, method: str) -> str:
+        """Trả về URL audio của text, chỉ tổng hợp và upload khi chưa có trong bộ đệm"""
+        client = self._get_client(text, method)
+        # Tên object theo hash nội dung: câu lặp lại dùng lại audio cũ, từ đơn của gTTS và Piper không còn ghi đè nhau
+        cache_key = self.audio_cache.make_key(text, method, client.voice, AUDIO_FORMAT)
+        audio_filename = await self.audio_cache.get(cache_key)
+        if audio_filename:
+            logger.info(f'TTS cache hit: {audio_filename}')
+        else:
+            # Nhiều người cùng phát một câu (hoặc prefetch trùng lúc với /tts): chỉ tổng hợp một lần
+            audio_filename = await self.single_flight.do("tts", cache_key, self._synthesize, client, cache_key, text, method)
+
+        # Tạo URL từ MinIO
+        return await self.executor.run("io-storage", self.storage_client.presigned_get_object, self.audio_bucket, audio_filename)
+    
+    async def _synthesize(self, client: TTSClient, cache_key: str, text: str, method: str) -> str:
+        """Tổng hợp, mã hóa mp3 và upload; trả về tên object"""
+        audio_filename = self.audio_cache.object_name(cache_key, AUDIO_FORMAT)
+        # Audio được giữ trong bộ nhớ, không ghi file tạm
+        audio = await self.executor.run(self._synthesis_pool(method), client.generate_audio, text)
+        if client.audio_format != AUDIO_FORMAT:
+            audio = await self.executor.run("cpu-audio", self.audio_processor.encode_mp3, audio)
+        await self._upload(cache_key, audio_filename, audio, text, method, client.voice)
+        return audio_filename
+
+    async def generate_audio(self, text: str, method: str) -> Response:
         try:
-            if method == "gtts":
-                # gTTS tạo trực tiếp file MP3
-                self.clients[method].generate_audio(text, temp_path)
-            else:
-                # Piper tạo file WAV, sau đó chuyển đổi sang MP3
-                self.clients[method].generate_audio(text, wav_path)
-                self.audio_processor.convert_to_mp3(wav_path, temp_path)
-                if os.path.exists(wav_path):
-                    os.remove(wav_path)
-
-            # Kiểm tra file tồn tại trước khi upload
-            if not os.path.exists(temp_path):
-                raise HTTPException(status_code=500, detail=f"Audio file {temp_path} not found")
-            
-            # Tính độ dài file
-            file_size = os.path.getsize(temp_path)
-            
-            # Upload file lên MinIO
-            with open(temp_path, 'rb') as file_data:
-                self.storage_client.put_object(
-                    bucket_name=self.audio_bucket,
-                    object_name=audio_filename,
-                    data=file_data,
-                    length=file_size,
-                    content_type='audio/mpeg'
-                )
-            logger.info(f'Uploaded to MinIO: {audio_filename}')
-
-            # Tạo URL từ MinIO
-            audio_url = self.storage_client.presigned_get_object(self.audio_bucket, audio_filename)
+            audio_url = await self.ensure_audio(text, method)
             logger.info(f'Returning audio URL: {audio_url}')
 
             # Trả về URL trong header
@@ -92,11 +107,93 @@ class TTSService:
         except Exception as e:
             logger.error(f"Error: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to generate audio: {str(e)}")
+
+    async def stream_audio(self, text: str, method: str, on_audio_ready=None) -> Response:
+        """Trả về audio/mpeg theo luồng: client phát được ngay khi có frame đầu tiên.
+        URL của object (đã biết trước nhờ tên theo hash) nằm trong header x-audio-url; audio đã có trong bộ đệm thì redirect tới URL đó.
+        on_audio_ready(audio_url): coroutine được gọi khi audio đã nằm trên MinIO (vd: cập nhật audioUrl trong lịch sử chat)."""
+        client = self._get_client(text, method)
+        cache_key = self.audio_cache.make_key(text, method, client.voice, AUDIO_FORMAT)
+        cached_filename = await self.audio_cache.get(cache_key)
+        audio_filename = cached_filename or self.audio_cache.object_name(cache_key, AUDIO_FORMAT)
+        audio_url = await self.executor.run("io-storage", self.storage_client.presigned_get_object, self.audio_bucket, audio_filename)
+
+        if cached_filename:
+            logger.info(f'TTS cache hit: {audio_filename}')
+            await self._notify_audio_ready(on_audio_ready, audio_url)
+            # 303: trình duyệt tải object bằng GET, được cache lâu dài nhờ Cache-Control immutable
+            return RedirectResponse(audio_url, status_code=303, headers={"x-audio-url": audio_url})
+
+        chunks = self._iterate_in_pool(self._synthesis_pool(method), client.stream_audio(text))
+        if client.stream_format == "pcm":
+            chunks = self.audio_processor.stream_encode_mp3(chunks, client.sample_rate)
+        # Chờ đoạn đầu tiên trước khi trả response: lỗi xảy ra trước khi có audio (Piper, pool đầy, gTTS, ffmpeg)
+        # vẫn trả về đúng HTTP status thay vì 200 với body rỗng
+        try:
+            first_chunk = await anext(chunks)
+        except StopAsyncIteration:
+            raise HTTPException(status_code=500, detail="Failed to generate audio: empty stream")
+        except HTTPException:
+            await chunks.aclose()
+            raise
+        except Exception as e:
+            await chunks.aclose()
+            logger.error(f"Error: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to generate audio: {str(e)}")
+        upload = functools.partial(self._upload_streamed, cache_key, audio_filename, audio_url, text, method, client.voice, on_audio_ready)
+        return StreamingResponse(
+            self._tee(first_chunk, chunks, upload),
+            media_type="audio/mpeg",
+            headers={"x-audio-url": audio_url}
+        )
+
+    async def _iterate_in_pool(self, pool: str, iterator):
+        """Duyệt một iterator blocking (stream_audio của TTSClient), mỗi lần next() chạy trong pool của ExecutorService"""
+        done = object()
+        finished = False
+        pending = None
+        try:
+            while True:
+                # shield: bị hủy (client ngắt kết nối) thì next() vẫn chạy tiếp trong thread, phải chờ nó xong mới close được
+                pending = asyncio.ensure_future(self.executor.run(pool, next, iterator, done))
+                chunk = await asyncio.shield(pending)
+                if chunk is done:
+                    finished = True
+                    return
+                yield chunk
         finally:
-            # Xóa file tạm
-            for file_path in [temp_path, wav_path]:
-                if file_path and os.path.exists(file_path):
-                    try:
-                        os.remove(file_path)
-                    except OSError as e:
-                        logger.warning(f"Warning: Could not delete file {file_path} - {e}")
\ No newline at end of file
+            if not finished:
+                # Dừng sớm: đóng iterator để trả tài nguyên (vd: worker Piper) về pool.
+                # close() khi next() còn chạy sẽ lỗi "generator already executing"
+                if pending is not None and not pending.done():
+                    await asyncio.gather(asyncio.shield(pending), return_exceptions=True)
+                await self.executor.run(pool, iterator.close)
+
+    async def _tee(self, first_chunk: bytes, chunks, upload):
+        """Gửi từng đoạn MP3 cho client (bắt đầu bằng first_chunk đã đọc trước), đồng thời gom lại;
+        phát hết mới upload để không lưu audio dở dang khi client ngắt giữa chừng"""
+        audio = bytearray(first_chunk)
+        async with aclosing(chunks):
+            yield first_chunk
+            async for chunk in chunks:
+                audio.extend(chunk)
+                yield chunk
+        task = asyncio.create_task(upload(bytes(audio)))
+        _upload_tasks.add(task)
+        task.add_done_callback(_upload_tasks.discard)
+
+    async def _upload_streamed(self, cache_key: str, audio_filename: str, audio_url: str, text: str, method: str, voice: str, on_audio_ready, audio: bytes):
+        try:
+            await self._upload(cache_key, audio_filename, audio, text, method, voice)
+        except Exception as e:
+            logger.error(f"Failed to upload streamed audio {audio_filename}: {e}")
+            return
+        await self._notify_audio_ready(on_audio_ready, audio_url)
+
+    async def _notify_audio_ready(self, on_audio_ready, audio_url: str):
+        if on_audio_ready is None:
+            return
+        try:
+            await on_audio_ready(audio_url)
+        except Exception as e:
+            logger.error(f"Failed to record audio URL {audio_url}: {e}")
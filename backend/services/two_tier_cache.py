@@ -0,0 +1,78 @@
+# services/two_tier_cache.py
+# Bộ đệm hai tầng dùng chung: LRU trong process, sau đó một collection MongoDB có TTL index (dùng chung giữa các worker).
+# Lớp con quy định khóa và nội dung entry (document lưu ở cả hai tầng); lớp này lo việc tra cứu, hạn dùng, lỗi MongoDB và metrics.
+# Tuân thủ SRP: Chỉ quản lý hai tầng lưu trữ, không biết dữ liệu được lưu là gì.
+
+from datetime import datetime
+from .lru_cache import LRUCache
+from ..repositories.expiring_cache_repository import ExpiringCacheRepository
+from ..logging_config import logger
+
+class TwoTierCache:
+    def __init__(self, repository: ExpiringCacheRepository, max_entries: int):
+        self.repository = repository
+        self.entries = LRUCache(max_entries)
+        self.db_hits = 0
+
+    def _remaining_ttl(self, entry: dict) -> float:
+        """Số giây còn lại của entry, mặc định theo expiresAt"""
+        return (entry["expiresAt"] - datetime.utcnow()).total_seconds()
+
+    def _remember(self, key: str, entry) -> bool:
+        """Đưa entry đọc từ MongoDB vào LRU; False nếu không có hoặc đã hết hạn.
+        TTL monitor của MongoDB chạy theo chu kỳ nên entry quá hạn có thể vẫn còn: tự kiểm tra lại hạn"""
+        remaining = self._remaining_ttl(entry) if entry else 0
+        if remaining <= 0:
+            return False
+        self.db_hits += 1
+        self.entries.set(key, entry, ttl_seconds=remaining)
+        return True
+
+    async def _get_entry(self, key: str):
+        """Trả về entry còn hạn, hoặc None. Lỗi đọc MongoDB coi như chưa có"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            return entry
+        try:
+            entry = await self.repository.find_entry(key)
+        except Exception as e:
+            logger.error(f"Failed to read {self.repository.collection} for {key}: {e}")
+            return None
+        return entry if self._remember(key, entry) else None
+
+    async def _get_entries(self, keys: list) -> dict:
+        """Tra nhiều khóa: LRU trước, các khóa còn lại gom vào một truy vấn MongoDB. Trả về {key: entry} cho các khóa đã có"""
+        found, missing = {}, []
+        for key in dict.fromkeys(keys):
+            entry = self.entries.get(key)
+            if entry is None:
+                missing.append(key)
+            else:
+                found[key] = entry
+        if missing:
+            try:
+                entries = await self.repository.find_entries(missing)
+            except Exception as e:
+                logger.error(f"Failed to read {self.repository.collection} for {len(missing)} keys: {e}")
+                entries = []
+            for entry in entries:
+                if self._remember(entry["_id"], entry):
+                    found[entry["_id"]] = entry
+        return found
+
+    async def _put_entry(self, key: str, entry: dict, ttl_seconds: float):
+        """Lưu entry ở cả hai tầng. Lỗi ghi MongoDB không làm hỏng request: worker khác sẽ tự tính lại"""
+        self.entries.set(key, entry, ttl_seconds=ttl_seconds)
+        try:
+            await self.repository.save_entry(key, entry)
+        except Exception as e:
+            logger.error(f"Failed to save {self.repository.collection} for {key}: {e}")
+
+    def get_metrics(self) -> dict:
+        memory = self.entries.metrics()
+        lookups = memory["hits"] + memory["misses"]
+        return {
+            **memory,
+            "db_hits": self.db_hits,
+            "hit_rate": round((memory["hits"] + self.db_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,84 @@
+# services/user_cache.py
+# Bộ đệm user đã xác thực trong process: route cần đăng nhập không phải tra MongoDB ở mỗi request.
+# Khóa theo email (subject của JWT), có TTL ngắn để giới hạn thời gian dữ liệu cũ khi không có kênh báo hủy.
+# Khi bật USER_CACHE_INVALIDATION, mỗi lần hủy được ghi vào collection capped để các worker khác cùng hủy.
+# Tuân thủ SRP: Chỉ quản lý bộ đệm và kênh báo hủy, việc xác thực do AuthService đảm nhiệm.
+
+import os
+import uuid
+import asyncio
+from datetime import datetime
+from .lru_cache import LRUCache
+from ..repositories.user_invalidation_repository import UserInvalidationRepository
+from ..logging_config import logger
+
+class UserCache:
+    def __init__(self, invalidation_repository: UserInvalidationRepository = None, max_entries: int = None, ttl_seconds: float = None):
+        self.entries = LRUCache(
+            max_entries or int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000")),
+            ttl_seconds if ttl_seconds is not None else float(os.getenv("USER_CACHE_TTL", "60"))
+        )
+        # Kênh báo hủy giữa các worker chỉ dùng khi chạy nhiều process
+        self.invalidation_repository = invalidation_repository if os.getenv("USER_CACHE_INVALIDATION", "0") in ("1", "true") else None
+        self.channel_size = int(os.getenv("USER_CACHE_CHANNEL_SIZE", str(1024 * 1024)))
+        self.origin = uuid.uuid4().hex  # Bỏ qua sự kiện do chính process này ghi
+        self.invalidations = 0
+        self._listener = None
+
+    def get(self, email: str):
+        """Trả về document user đã lưu, hoặc None"""
+        return self.entries.get(email)
+
+    def set(self, email: str, user: dict):
+        self.entries.set(email, user)
+
+    async def invalidate(self, email: str):
+        """Xóa user khỏi bộ đệm (gọi sau mọi thay đổi ảnh hưởng tới UserInDB) và báo cho các worker khác"""
+        self.entries.delete(email)
+        self.invalidations += 1
+        if self.invalidation_repository:
+            try:
+                await self.invalidation_repository.publish({"email": email, "origin": self.origin, "createdAt": datetime.utcnow()})
+            except Exception as e:
+                logger.error(f"Failed to publish user cache invalidation for {email}: {e}")
+
+    async def start(self):
+        """Tạo kênh báo hủy và bắt đầu lắng nghe (không làm gì nếu kênh không được bật)"""
+        if not self.invalidation_repository or self._listener:
+            return
+        await self.invalidation_repository.ensure_channel(self.channel_size)
+        self._listener = asyncio.create_task(self._listen(datetime.utcnow()))
+        logger.info("User cache invalidation channel started")
+
+    async def _listen(self, after: datetime):
+        seen = set()  # _id của các sự kiện có createdAt == after (truy vấn dùng $gte nên sẽ gặp lại)
+        while True:
+            try:
+                async for event in self.invalidation_repository.listen(after):
+                    if event["_id"] in seen:
+                        continue
+                    if event["createdAt"] > after:
+                        after, seen = event["createdAt"], set()
+                    seen.add(event["_id"])
+                    if event.get("origin") != self.origin:
+                        self.entries.delete(event["email"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"User cache invalidation listener failed: {e}")
+            # Cursor bị đóng (collection rỗng, mất kết nối): mở lại sau một lúc.
+            # Trong lúc đó TTL vẫn giới hạn thời gian dữ liệu cũ
+            await asyncio.sleep(1)
+
+    def get_metrics(self) -> dict:
+        return {
+            **self.entries.metrics(),
+            "invalidations": self.invalidations,
+            "channel": self.invalidation_repository is not None,
+        }
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
@@ -7,21 +7,36 @@ from fastapi import HTTPException
 from ..security import UserInDB
 from ..logging_config import logger
 from ..config.jwt_config import get_password_hash
+from .executor_service import ExecutorService
+from .user_cache import UserCache
 from datetime import datetime
 import os
 import re
 
+# Các trường trả về cho trang quản lý user (không tải hashed_password, token, ...)
+USER_LIST_PROJECTION = {
+    "email": 1,
+    "displayName": 1,
+    "phoneNumber": 1,
+    "gender": 1,
+    "location": 1,
+    "isAdmin": 1,
+    "status": 1,
+    "createdAt": 1,
+}
+
 class UserService:
-    def __init__(self, auth_repository, storage_client):
+    def __init__(self, auth_repository, storage_client, executor_service: ExecutorService, user_cache: UserCache = None):
         self.auth_repository = auth_repository
         self.storage_client = storage_client
+        self.executor = executor_service
+        self.user_cache = user_cache
         self.avatar_bucket = os.getenv("AVATARS_BUCKET")
 
     async def create_user_by_admin(self, user_data: dict):
         """Tạo user mới (dành cho admin - ko cần xác thực email)"""
         # Kiểm tra xem email đã tồn tại chưa
-        existing_user = await self.auth_repository.find_user_by_email(user_data["email"])
-        if existing_user:
+        if await self.auth_repository.user_exists(user_data["email"]):
             raise HTTPException(status_code=400, detail="Email already exists")
         
         # Kiểm tra mật khẩu nghiêm ngặt
@@ -33,7 +48,7 @@ class UserService:
             )
             
         # Hash mật khẩu
-        hashed_password = get_password_hash(user_data["password"])
+        hashed_password = await self.executor.run("crypto", get_password_hash, user_data["password"])
         
         user_dict = {
             "email": user_data["email"],
@@ -47,10 +62,10 @@ class UserService:
             "status": "active",  # User được tạo bởi admin sẽ tự động active
             "createdAt": datetime.utcnow(),
         }
-        await self.auth_repository.create_user(user_dict)
+        result = await self.auth_repository.create_user(user_dict)
         
-        # Lấy thông tin user vừa tạo để trả về
-        created_user = await self.auth_repository.find_user_by_email(user_data["email"])
+        # Dùng lại dữ liệu vừa ghi để trả về, không cần đọc lại từ database
+        created_user = {**user_dict, "_id": result.inserted_id}
         return {
             "id": str(created_user["_id"]),
             "email": created_user["email"],
@@ -67,7 +82,7 @@ class UserService:
         """Lấy danh sách tất cả user"""
         
         try:
-            users = await self.auth_repository.get_all_users()
+            users = await self.auth_repository.get_all_users(USER_LIST_PROJECTION)
             return [
                 {
                     "id": str(user["_id"]),
@@ -88,18 +103,28 @@ class UserService:
         
     async def update_user_by_admin(self, user_id: str, update_data: dict):
         """Cập nhật thông tin user (dành cho admin)"""
-        user = await self.auth_repository.find_user_by_id(user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
         # Loại bỏ các trường None khỏi update_data
         update_data = {k: v for k, v in update_data.items() if v is not None}
         
-        # Cập nhật thông tin user trong DB
-        await self.auth_repository.update_user_by_id(user_id, update_data)
-        
-        # Lấy thông tin user đã cập nhật
-        updated_user = await self.auth_repository.find_user_by_id(user_id)
+        # Admin đổi email: bộ đệm đang giữ user theo email cũ, phải đọc email cũ trước khi cập nhật để hủy
+        previous_user = None
+        if "email" in update_data and self.user_cache:
+            previous_user = await self.auth_repository.find_user_by_id(user_id, {"email": 1})
+            if not previous_user:
+                raise HTTPException(status_code=404, detail="User not found")
+
+        # Cập nhật và lấy lại thông tin user đã cập nhật trong cùng một lần gọi
+        if update_data:
+            updated_user = await self.auth_repository.update_user_by_id_and_return(user_id, update_data, USER_LIST_PROJECTION)
+        else:
+            updated_user = await self.auth_repository.find_user_by_id(user_id, USER_LIST_PROJECTION)
+        if not updated_user:
+            raise HTTPException(status_code=404, detail="User not found")
+        if update_data and self.user_cache:
+            # Quyền admin, trạng thái... thay đổi phải có hiệu lực ngay ở request tiếp theo của user
+            await self.user_cache.invalidate(updated_user["email"])
+            if previous_user and previous_user["email"] != updated_user["email"]:
+                await self.user_cache.invalidate(previous_user["email"])
         return {
             "id": str(updated_user["_id"]),
             "email": updated_user["email"],
@@ -114,7 +139,7 @@ class UserService:
         
     async def delete_user(self, user_id: str, current_user: UserInDB):
         """Xóa user (dành cho admin)"""
-        user = await self.auth_repository.find_user_by_id(user_id)
+        user = await self.auth_repository.find_user_by_id(user_id, {"email": 1, "avatarPath": 1})
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -127,11 +152,13 @@ class UserService:
         if avatar_path:
             try:
                 old_file_name = avatar_path.split("/")[-1]
-                self.storage_client.remove_object(self.avatar_bucket, old_file_name)
+                await self.executor.run("io-storage", self.storage_client.remove_object, self.avatar_bucket, old_file_name)
             except Exception as e:
                 logger.error(f"Error deleting avatar for user {user_id}: {e}")
                 # Không ném lỗi, chỉ log vì xóa user là mục tiêu chính
         
         # Xóa user trong DB
         await self.auth_repository.delete_user(user_id)
+        if self.user_cache:
+            await self.user_cache.invalidate(user["email"])
         return {"message": "User deleted successfully"}
\ No newline at end of file
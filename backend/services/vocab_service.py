@@ -3,19 +3,39 @@
 # Gọi VocabRepository để thực hiện truy vấn dữ liệu.
 # Tuân thủ SRP: Chỉ xử lý logic nghiệp vụ, không xử lý API hay truy vấn trực tiếp.
 
+import os
+import asyncio
 from fastapi import HTTPException
 from bson import ObjectId
 from datetime import datetime, timezone
 from .dictionary.dictionary_client import DictionaryClient
+from .dictionary.word_info_cache import WordInfoCache
+from .single_flight import SingleFlight
 from ..logging_config import logger
 
 class VocabService:
-    def __init__(self, vocab_repository, dictionaryapi_client: DictionaryClient, wordnik_client: DictionaryClient):
+    def __init__(self, vocab_repository, dictionaryapi_client: DictionaryClient, wordnik_client: DictionaryClient, word_info_cache: WordInfoCache, single_flight: SingleFlight = None):
         self.vocab_repository = vocab_repository
+        self.word_info_cache = word_info_cache
+        self.single_flight = single_flight or SingleFlight()
         self.clients = {
             "dictionaryapi": dictionaryapi_client,
             "wordnik": wordnik_client
         }
+        # Giới hạn số lượt tra đồng thời cho mỗi nguồn (dùng chung cho mọi request), tránh bị rate limit khi tra theo lô.
+        # Wordnik gọi 3 API cho mỗi từ nên mặc định thấp hơn
+        self.semaphores = {
+            source: asyncio.Semaphore(int(os.getenv(f"{source.upper()}_CONCURRENCY", default)))
+            for source, default in (("dictionaryapi", "8"), ("wordnik", "3"))
+        }
+        self.batch_max_words = int(os.getenv("WORD_INFO_BATCH_MAX", "100"))
+
+    def _validate_source(self, source: str) -> str:
+        source = source.strip().lower()
+        if source not in self.clients:
+            logger.error(f"Unsupported dictionary source: {source}")
+            raise HTTPException(status_code=400, detail=f"Unsupported dictionary source: {source}")
+        return source
         
     async def get_word_info(self, word: str, source: str, limit: int) -> dict:
         """
@@ -28,14 +48,65 @@ class VocabService:
         if not word:
             logger.error("No word provided in request")
             raise HTTPException(status_code=400, detail="No word provided")
-        if source not in self.clients:
-            logger.error(f"Unsupported dictionary source: {source}")
-            raise HTTPException(status_code=400, detail=f"Unsupported dictionary source: {source}")
+        source = self._validate_source(source)
         
         word = word.strip().lower()
-        source = source.strip().lower()
-        logger.debug(f"Calling {source} client for word: {word}, limit: {limit}")
-        return await self.clients[source].get_word_info(word, limit)
+        cached = await self.word_info_cache.get(source, word, limit)
+        if cached is not None:
+            return cached
+        return await self._fetch_word_info(word, source, limit)
+
+    async def get_word_info_batch(self, words: list, source: str, limit: int) -> dict:
+        """
+        Tra nhiều từ trong một request: từ đã có trong bộ đệm trả về ngay,
+        các từ còn lại gọi API song song (giới hạn bởi semaphore của nguồn).
+        Lỗi của một từ không làm hỏng cả lô mà được trả về trong "errors".
+        :return: {"results": {word: thông tin từ}, "errors": {word: lý do}}
+        """
+        if not isinstance(words, list) or not words:
+            raise HTTPException(status_code=400, detail="words must be a non-empty list")
+        source = self._validate_source(source)
+        # Chuẩn hóa và bỏ trùng, giữ nguyên thứ tự
+        words = list(dict.fromkeys(w.strip().lower() for w in words if isinstance(w, str) and w.strip()))
+        if not words:
+            raise HTTPException(status_code=400, detail="No word provided")
+        if len(words) > self.batch_max_words:
+            raise HTTPException(status_code=400, detail=f"Too many words (max {self.batch_max_words})")
+
+        results = await self.word_info_cache.get_many(source, words, limit)
+        missing = [word for word in words if word not in results]
+        logger.info(f"Word info batch ({source}): {len(results)} cached, {len(missing)} to fetch")
+        fetched = await asyncio.gather(
+            *(self._fetch_word_info(word, source, limit) for word in missing),
+            return_exceptions=True
+        )
+        errors = {}
+        for word, result in zip(missing, fetched):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to fetch word info for {word} from {source}: {getattr(result, 'detail', result)}")
+                errors[word] = getattr(result, "detail", "Failed to fetch word info")
+            else:
+                results[word] = result
+        return {
+            "results": {word: results[word] for word in words if word in results},
+            "errors": errors
+        }
+
+    async def _fetch_word_info(self, word: str, source: str, limit: int) -> dict:
+        """Gọi API từ điển (sau khi bộ đệm không có); các lượt tra cùng từ đang chạy đồng thời dùng chung một lời gọi"""
+        key = self.word_info_cache.make_key(source, word, limit)
+        return await self.single_flight.do("word_info", key, self._lookup_word_info, word, source, limit)
+
+    async def _lookup_word_info(self, word: str, source: str, limit: int) -> dict:
+        """Gọi API từ điển và lưu kết quả vào bộ đệm"""
+        async with self.semaphores[source]:
+            logger.debug(f"Calling {source} client for word: {word}, limit: {limit}")
+            result = await self.clients[source].get_word_info(word, limit)
+        if result.pop("cacheable", True):
+            # Không có definition, audio lẫn example: từ không có trong từ điển (negative cache, hết hạn sớm hơn)
+            found = result["definition"] != "No definition found" or bool(result["audio"]) or bool(result["examples"])
+            await self.word_info_cache.put(source, word, limit, result, found)
+        return result
         
     async def add_vocab(self, data:dict, user_id:str):
         """Thêm từ vựng mới"""
@@ -7,6 +7,9 @@ import os
 import json
 from minio import Minio
 from minio.error import S3Error
+from minio.commonconfig import ENABLED, Filter
+from minio.deleteobjects import DeleteObject
+from minio.lifecycleconfig import LifecycleConfig, Rule, Expiration
 from .storage_client import StorageClient
 from ..logging_config import logger
 
@@ -103,8 +106,21 @@ class MinioClient(StorageClient):
 
     def remove_object(self, bucket_name: str, object_name: str):
         self.client.remove_object(bucket_name, object_name)
+    
+    def remove_objects(self, bucket_name: str, object_names: list) -> list:
+        # remove_objects trả về iterator lười: phải duyệt hết thì request xóa mới được gửi
+        errors = self.client.remove_objects(bucket_name, [DeleteObject(name) for name in object_names])
+        return list(errors)
+    
+    def set_bucket_expiration(self, bucket_name: str, days: int):
+        """Cài quy tắc lifecycle hết hạn cho toàn bucket (ghi đè cấu hình lifecycle cũ của bucket)."""
+        config = LifecycleConfig([
+            Rule(ENABLED, rule_filter=Filter(prefix=""), rule_id="expire-cache", expiration=Expiration(days=days))
+        ])
+        self.client.set_bucket_lifecycle(bucket_name, config)
+        logger.info(f"Lifecycle expiration set for bucket {bucket_name}: {days} days")
         
-    def put_object(self, bucket_name: str, object_name: str, data, length: int, content_type: str):
+    def put_object(self, bucket_name: str, object_name: str, data, length: int, content_type: str, cache_control: str = None):
         """Tải file lên bucket."""
         try:
             self.client.put_object(
@@ -112,7 +128,9 @@ class MinioClient(StorageClient):
                 object_name=object_name,
                 data=data,
                 length=length,
-                content_type=content_type
+                content_type=content_type,
+                # Header chuẩn như Cache-Control được MinIO lưu cùng object và trả lại khi GET
+                metadata={"Cache-Control": cache_control} if cache_control else None
             )
             logger.info(f"Uploaded file to MinIO: {bucket_name}/{object_name}")
         except S3Error as e:
@@ -22,7 +22,7 @@ class StorageClient(ABC):
     
     @abstractmethod
     def list_objects(self, bucket_name: str, recursive: bool = True) -> list:
-        """Liệt kê các đối tượng trong bucket."""
+        """Liệt kê các đối tượng trong bucket (kèm object_name, last_modified)."""
         pass
     
     @abstractmethod
@@ -36,8 +36,18 @@ class StorageClient(ABC):
         pass
     
     @abstractmethod
-    def put_object(self, bucket_name: str, object_name: str, data, length:int, content_type: str):
-        """Tải file lên bucket."""
+    def remove_objects(self, bucket_name: str, object_names: list) -> list:
+        """Xóa nhiều đối tượng trong một request, trả về danh sách lỗi (rỗng nếu xóa hết)."""
+        pass
+    
+    @abstractmethod
+    def set_bucket_expiration(self, bucket_name: str, days: int):
+        """Cài quy tắc lifecycle để storage tự xóa đối tượng cũ hơn số ngày cho trước."""
+        pass
+    
+    @abstractmethod
+    def put_object(self, bucket_name: str, object_name: str, data, length:int, content_type: str, cache_control: str = None):
+        """Tải file lên bucket. cache_control: header Cache-Control trả về khi tải object."""
         pass
     
     @abstractmethod
@@ -20,6 +20,8 @@ VOSK_MODEL_DIR = os.getenv("VOSK_MODEL_DIR", "vosk-model-en-us-0.22-lgraph")
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 WORDNIK_API_KEY = os.getenv("WORDNIK_API_KEY")
 GOOGLE_APPLICATION_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+AI_HTTP_TIMEOUT = float(os.getenv("AI_HTTP_TIMEOUT", "60")) # Timeout (giây) cho mỗi lần gọi API của các AI provider
+AUDIO_CACHE_MAX_AGE_DAYS = int(os.getenv("AUDIO_CACHE_MAX_AGE_DAYS", "7")) # Audio trong AUDIO_BUCKET bị xóa sau số ngày này
 
 MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT")
 MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY")